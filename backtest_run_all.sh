@@ -2,5 +2,13 @@
 
 cd freqtrade
 
-# Run All the backtesting scripts
-./tests/kama_backtesting.sh
\ No newline at end of file
+# Check the candle files first (only new or changed files are scanned)
+docker compose run --rm --entrypoint python freqtrade /ws/freqtrade/tests/ohlcv_scan.py \
+    --datadir user_data/data/binance
+
+# Run the backtest matrix (all strategies, 5m/15m/30m) in parallel, one comparison table
+# Single strategy runs: ./tests/kama_backtesting.sh
+docker compose run --rm --entrypoint python freqtrade /ws/freqtrade/tests/backtest_matrix.py \
+    --userdir user_data --datadir user_data/data/binance \
+    --strategies KamaStrategy SampleStrategy ScalpingStrategy \
+    --timeframes 5m 15m 30m --timeranges 20240606- --stake-amount 1000 "$@"
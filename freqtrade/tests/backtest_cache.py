@@ -0,0 +1,187 @@
+"""
+Content-addressed cache of backtest results for the backtest matrix.
+
+freqtrade's own backtest cache (``--cache``) is keyed by the strategy name and config, so
+it returns stale results after strategy code changes, which is why the scripts run with
+``--cache none``. This cache keys every backtest by a SHA-256 over everything its result
+depends on:
+
+- the strategy file and every other module of its directory (the helper modules the
+  strategies import by name) plus the strategy's parameter file (``<Strategy>.json``),
+- the resolved backtesting configuration (config files, timeframe, timerange, stake
+  amount, ...) without the output-only keys,
+- the content of the data files of the whitelisted pairs (all timeframes and candle
+  types in the datadir, so detail, mark and funding rate candles are covered),
+- the freqtrade version.
+
+A hit returns the stored comparison row without running the backtest. File hashes are
+memoized by (path, size, mtime), so unchanged data files are not read again. Entries are
+evicted by age (since their last hit) and by the total size of the cache.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import freqtrade
+from freqtrade.misc import pair_to_filename
+from freqtrade.resolvers import StrategyResolver
+
+logger = logging.getLogger('backtest_matrix')
+
+# Configuration keys that name outputs or locations and do not change the backtest result
+IGNORED_CONFIG_KEYS = frozenset({
+    'original_config', 'config_files', 'user_data_dir', 'datadir', 'exportfilename', 'exportdirectory',
+    'export', 'backtest_cache', 'strategy_path', 'recursive_strategy_search', 'verbosity', 'logfile',
+})
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open('rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BacktestCache:
+    """
+    Stored backtest results by content hash.
+
+    Args:
+        directory (Path): Cache directory, one JSON file per entry.
+        max_age_days (float): Entries not hit for this long are evicted.
+        max_bytes (int): Oldest entries are evicted while the cache is larger.
+    """
+
+    def __init__(self, directory: Path, max_age_days: float = 30.0, max_bytes: int = 200 * 2 ** 20):
+        self.directory = Path(directory)
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.hits = self.misses = 0
+        self._file_index_path = self.directory / 'files.json'
+        self._file_index = None
+        self._strategy_files = {}
+
+    def key(self, config: dict) -> str:
+        """Content hash of the backtest described by a resolved backtesting ``config``."""
+        digest = hashlib.sha256()
+        digest.update(f'freqtrade {freqtrade.__version__}\n'.encode())
+        for path in self.strategy_files(config):
+            digest.update(f'{path.name} {self.file_hash(path)}\n'.encode())
+        relevant = {key: value for key, value in config.items() if key not in IGNORED_CONFIG_KEYS}
+        digest.update(json.dumps(relevant, sort_keys=True, default=str).encode())
+        for path in self.data_files(config):
+            digest.update(f'\n{path.name} {self.file_hash(path)}'.encode())
+        return digest.hexdigest()
+
+    def strategy_files(self, config: dict) -> list:
+        """The strategy's directory modules and its parameter file, sorted."""
+        name = config['strategy']
+        if name not in self._strategy_files:
+            extra_dirs = [config['strategy_path']] if config.get('strategy_path') else None
+            directories = StrategyResolver.build_search_paths(config, user_subdir='strategies',
+                                                              extra_dirs=extra_dirs)
+            path = None
+            for directory in directories:
+                _, path = StrategyResolver._search_object(directory=directory, object_name=name)
+                if path is not None:
+                    break
+            if path is None:
+                raise ValueError(f'Strategy {name} not found')
+            files = sorted(path.parent.glob('*.py'))
+            parameters = path.with_suffix('.json')
+            self._strategy_files[name] = files + ([parameters] if parameters.exists() else [])
+        return self._strategy_files[name]
+
+    @staticmethod
+    def data_files(config: dict) -> list:
+        """Data files of the whitelisted pairs in the datadir (spot and futures), sorted."""
+        datadir = Path(config['datadir'])
+        files = set()
+        for pair in config['exchange']['pair_whitelist']:
+            prefix = f'{pair_to_filename(pair)}-'
+            for directory in (datadir, datadir / 'futures'):
+                files.update(path for path in directory.glob(f'{prefix}*') if path.is_file())
+        return sorted(files)
+
+    def file_hash(self, path: Path) -> str:
+        """SHA-256 of a file's content, memoized by (size, mtime)."""
+        if self._file_index is None:
+            self._file_index = self._read_json(self._file_index_path) or {}
+        stat = path.stat()
+        signature = [stat.st_size, stat.st_mtime_ns]
+        entry = self._file_index.get(str(path))
+        if entry is None or entry[:2] != signature:
+            entry = self._file_index[str(path)] = signature + [_sha256_file(path)]
+        return entry[2]
+
+    def get(self, key: str, export: str = 'none'):
+        """
+        The stored row of ``key``, or None.
+
+        With an export, only entries whose exported result file still exists count as hits.
+        """
+        path = self._entry_path(key)
+        entry = self._read_json(path)
+        if entry is not None and export != 'none':
+            exported = entry.get('export')
+            if entry.get('export_type') != export or not exported or not Path(exported).exists():
+                entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # The modification time is the last use, see evict
+        os.utime(path)
+        return entry['row']
+
+    def put(self, key: str, row: dict, export: str = 'none', export_file=None) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = {'key': key, 'created': time.time(), 'row': row,
+                 'export_type': export, 'export': str(export_file) if export_file else None}
+        self._write_json(self._entry_path(key), entry)
+
+    def save(self) -> None:
+        """Writes the memoized file hashes."""
+        if self._file_index is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._write_json(self._file_index_path, self._file_index)
+
+    def evict(self) -> int:
+        """Removes entries older than max_age_days, then the oldest beyond max_bytes. Returns the count."""
+        entries = sorted(((path.stat().st_mtime, path.stat().st_size, path)
+                          for path in self.directory.glob('*/*.json')), key=lambda entry: entry[0])
+        cutoff = time.time() - self.max_age_days * 86400
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        if self._file_index:
+            # Forget hashes of deleted data files
+            self._file_index = {name: entry for name, entry in self._file_index.items() if Path(name).exists()}
+        return removed
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f'{key}.json'
+
+    @staticmethod
+    def _read_json(path: Path):
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_json(path: Path, content) -> None:
+        # Atomic: concurrent matrix runs never read a partial entry
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(f'.{os.getpid()}.tmp')
+        temporary.write_text(json.dumps(content, default=str))
+        os.replace(temporary, path)
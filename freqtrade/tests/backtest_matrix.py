@@ -0,0 +1,278 @@
+"""
+Parallel backtest matrix: strategies x timeframes x timeranges x configs in one run.
+
+Every combination is a freqtrade backtest (same engine and results as ``freqtrade
+backtesting``), run on a process pool sized to the available cores. The candles of each
+timeframe are loaded once in the parent process, before the pool starts. The forked
+workers inherit them read-only (copy-on-write) and trim them to their job's timerange plus
+startup candles (trim_dataframe) instead of every job reading the data files again. The
+results of all jobs are merged into one comparison table, which is also written as JSON/CSV
+to ``user_data/backtest_results``.
+
+Results are cached by content (strategy modules, parameters, config, timerange and data
+files, see backtest_cache) in ``user_data/backtest_results/matrix_cache``: unchanged
+combinations are read from the cache instead of being backtested again, so the whole
+matrix can be rerun after every change. ``--no-cache`` always backtests.
+
+Configs are file names in ``user_data/configs``. Without ``--configs`` each strategy
+runs with its own config (``<Strategy>.json``, ``config.json`` otherwise). Timeframes
+default to the config timeframe, timeranges to all available data.
+
+Usage (inside the freqtrade container, the repository is mounted at /ws):
+    python /ws/freqtrade/tests/backtest_matrix.py --userdir user_data \\
+        --strategies KamaStrategy SampleStrategy ScalpingStrategy \\
+        --timeframes 5m 15m 30m --timeranges 20240606- --stake-amount 1000
+"""
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from copy import deepcopy
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from freqtrade.commands.optimize_commands import setup_optimize_configuration
+from freqtrade.data import history
+from freqtrade.data.btanalysis import get_tick_size_over_time
+from freqtrade.data.converter import trim_dataframe
+from freqtrade.enums import CandleType, RunMode
+from freqtrade.exchange import timeframe_to_seconds
+from freqtrade.optimize.backtesting import Backtesting
+from freqtrade.optimize.optimize_reports import generate_backtest_stats, store_backtest_results
+from freqtrade.util import print_rich_table
+
+from backtest_cache import BacktestCache
+
+logger = logging.getLogger('backtest_matrix')
+
+STRATEGIES = ('KamaStrategy', 'SampleStrategy', 'ScalpingStrategy')
+# (column, header, format) of the comparison table
+COLUMNS = (
+    ('strategy', 'Strategy', '{}'),
+    ('config', 'Config', '{}'),
+    ('timeframe', 'TF', '{}'),
+    ('timerange', 'Timerange', '{}'),
+    ('total_trades', 'Trades', '{}'),
+    ('profit_total', 'Tot Profit %', '{:.2%}'),
+    ('profit_total_abs', 'Tot Profit', '{:.3f}'),
+    ('winrate', 'Win%', '{:.1%}'),
+    ('profit_factor', 'PF', '{:.2f}'),
+    ('expectancy', 'Expectancy', '{:.3f}'),
+    ('sharpe', 'Sharpe', '{:.2f}'),
+    ('sortino', 'Sortino', '{:.2f}'),
+    ('calmar', 'Calmar', '{:.2f}'),
+    ('max_drawdown_account', 'Drawdown', '{:.2%}'),
+    ('holding_avg', 'Avg Duration', '{}'),
+    ('seconds', 'Secs', '{:.1f}'),
+    ('cached', 'Cached', '{}'),
+)
+
+# Candles shared with the forked workers: {(datadir, format, candle type, timeframe): {pair: DataFrame}}
+_SHARED_DATA = {}
+
+
+def data_key(config: dict) -> tuple:
+    return (str(config['datadir']), config['dataformat_ohlcv'],
+            config.get('candle_type_def', CandleType.SPOT), config['timeframe'])
+
+
+def job_config(job: dict, args) -> dict:
+    """freqtrade's backtesting configuration of one matrix job (like the CLI arguments)."""
+    configs = [str(args.userdir / 'configs' / job['config'])] + [str(path) for path in args.extra_config]
+    return setup_optimize_configuration({
+        'config': configs,
+        'user_data_dir': str(args.userdir),
+        'datadir': str(args.datadir) if args.datadir else None,
+        'strategy': job['strategy'],
+        'timeframe': job['timeframe'],
+        'timerange': job['timerange'],
+        'stake_amount': args.stake_amount,
+        'export': args.export,
+        'backtest_cache': 'none',
+    }, RunMode.BACKTEST)
+
+
+def build_jobs(args) -> list:
+    userdir_configs = args.userdir / 'configs'
+    jobs = []
+    for strategy in args.strategies:
+        if args.configs:
+            configs = args.configs
+        elif (userdir_configs / f'{strategy}.json').exists():
+            configs = [f'{strategy}.json']
+        else:
+            configs = ['config.json']
+        for config, timeframe, timerange in itertools.product(configs, args.timeframes or [None],
+                                                              args.timeranges or [None]):
+            jobs.append({'strategy': strategy, 'config': config, 'timeframe': timeframe, 'timerange': timerange})
+    return jobs
+
+
+def load_shared_data(configs: list) -> None:
+    """Loads every pair of every timeframe (and candle type) used by the jobs once."""
+    pairs = {}
+    for config in configs:
+        pairs.setdefault(data_key(config), set()).update(config['exchange']['pair_whitelist'])
+    for key, key_pairs in pairs.items():
+        datadir, data_format, candle_type, timeframe = key
+        start = time.perf_counter()
+        _SHARED_DATA[key] = history.load_data(
+            datadir=Path(datadir), timeframe=timeframe, pairs=sorted(key_pairs),
+            data_format=data_format, candle_type=candle_type,
+        )
+        logger.info('Loaded %d pairs of %s candles in %.2fs', len(_SHARED_DATA[key]), timeframe,
+                    time.perf_counter() - start)
+
+
+def shared_bt_data(backtesting: Backtesting, config: dict) -> tuple:
+    """
+    The data Backtesting.load_bt_data would read, trimmed from the shared candles.
+
+    Returns:
+        tuple: ``(data, timerange)`` like Backtesting.load_bt_data.
+    """
+    timerange = backtesting.timerange
+    startup_range = deepcopy(timerange)
+    startup_range.subtract_start(backtesting.timeframe_secs * backtesting.required_startup)
+    shared = _SHARED_DATA[data_key(config)]
+    data = {pair: trim_dataframe(shared[pair], startup_range)
+            for pair in backtesting.pairlists.whitelist if pair in shared}
+    data = {pair: df for pair, df in data.items() if not df.empty}
+    if not data:
+        raise ValueError(f'No data for {config["strategy"]} {backtesting.timeframe} in {config["datadir"]}')
+    min_date, _ = history.get_timerange(data)
+    timerange.adjust_start_if_necessary(backtesting.timeframe_secs, backtesting.required_startup, min_date)
+    # Detail timeframe, funding and mark candles of the job's timerange
+    backtesting._load_bt_data_detail()
+    backtesting.price_pair_prec = {pair: get_tick_size_over_time(df) for pair, df in data.items()}
+    backtesting.available_pairs.extend(data)
+    return data, timerange
+
+
+def run_job(index: int, job: dict, config: dict) -> dict:
+    """Runs one backtest in a worker and returns its comparison row."""
+    start = time.perf_counter()
+    backtesting = Backtesting(config)
+    data, timerange = shared_bt_data(backtesting, config)
+    strategy = backtesting.strategylist[0]
+    min_date, max_date = backtesting.backtest_one_strategy(strategy, data, timerange)
+    results = generate_backtest_stats(data, backtesting.all_bt_content, min_date=min_date, max_date=max_date)
+    export_file = None
+    if config.get('export', 'none') in ('trades', 'signals'):
+        # Index suffix, jobs finishing within the same second must not share a file
+        dt_appendix = f'{datetime.now():%Y-%m-%d_%H-%M-%S}_{index}'
+        export_file = store_backtest_results(
+            config, results, dt_appendix, analysis_results=backtesting.analysis_results,
+            strategy_files={strategy.get_strategy_name(): strategy.__file__})
+    stats = results['strategy'][strategy.get_strategy_name()]
+    Backtesting.cleanup()
+    return {
+        **job,
+        'timeframe': backtesting.timeframe,
+        'timerange': job['timerange'] or f'{min_date:%Y%m%d}-{max_date:%Y%m%d}',
+        **{column: stats.get(column) for column, _, _ in COLUMNS if column in stats},
+        'seconds': time.perf_counter() - start,
+        'cached': False,
+        'export_file': str(export_file) if export_file else None,
+    }
+
+
+def print_table(rows: list) -> None:
+    tabular = [[fmt.format(row[column]) if row.get(column) is not None else '' for column, _, fmt in COLUMNS]
+               for row in rows]
+    print_rich_table(tabular, [header for _, header, _ in COLUMNS], summary='BACKTEST MATRIX')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--userdir', type=Path, default=Path('user_data'))
+    parser.add_argument('--strategies', nargs='+', default=list(STRATEGIES))
+    parser.add_argument('--timeframes', nargs='+', help='Default: the timeframe of the config')
+    parser.add_argument('--timeranges', nargs='+', help='Default: all available data')
+    parser.add_argument('--configs', nargs='+', help='Config files in <userdir>/configs, run for every strategy')
+    parser.add_argument('--extra-config', type=Path, nargs='+', default=[],
+                        help='Configs layered on top of every job config')
+    parser.add_argument('--datadir', type=Path)
+    parser.add_argument('--stake-amount')
+    parser.add_argument('--export', default='none', choices=['none', 'trades', 'signals'])
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='Worker processes')
+    parser.add_argument('--no-cache', action='store_true', help='Backtest every job, ignore cached results')
+    parser.add_argument('--cache-max-age', type=float, default=30.0,
+                        help='Days an unused cached result is kept (default: %(default)s)')
+    parser.add_argument('--cache-max-size', type=float, default=200.0,
+                        help='Cache size limit in MiB (default: %(default)s)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s: %(message)s')
+    # The freqtrade modules log every configuration step, once per job
+    logging.getLogger('freqtrade').setLevel(logging.WARNING)
+
+    start = time.perf_counter()
+    jobs = build_jobs(args)
+    configs = [job_config(job, args) for job in jobs]
+
+    rows = []
+    keys = [None] * len(jobs)
+    pending = list(range(len(jobs)))
+    cache = None
+    if not args.no_cache:
+        cache = BacktestCache(args.userdir / 'backtest_results' / 'matrix_cache', args.cache_max_age,
+                              int(args.cache_max_size * 2 ** 20))
+        keys = [cache.key(config) for config in configs]
+        pending = []
+        for index, key in enumerate(keys):
+            row = cache.get(key, args.export)
+            if row is None:
+                pending.append(index)
+            else:
+                rows.append({**row, 'cached': True})
+        logger.info('%d of %d backtests cached, hashing took %.2fs', len(rows), len(jobs),
+                    time.perf_counter() - start)
+
+    if pending:
+        load_shared_data([configs[index] for index in pending])
+    workers = max(1, min(args.jobs, len(pending)))
+    logger.info('Running %d backtests on %d workers', len(pending), workers)
+    # fork: the workers inherit _SHARED_DATA without pickling or reloading it
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as executor:
+        futures = {executor.submit(run_job, index, jobs[index], configs[index]): index for index in pending}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                rows.append(future.result())
+            except Exception:
+                logger.exception('Backtest failed: %s', jobs[index])
+                continue
+            logger.info('Done %(strategy)s %(config)s %(timeframe)s %(timerange)s in %(seconds).1fs', rows[-1])
+            if cache is not None:
+                cache.put(keys[index], rows[-1], args.export, rows[-1]['export_file'])
+
+    if cache is not None:
+        evicted = cache.evict()
+        cache.save()
+        if evicted:
+            logger.info('Evicted %d cached backtest results', evicted)
+
+    rows.sort(key=lambda row: (row['strategy'], row['config'], timeframe_to_seconds(row['timeframe']),
+                               row['timerange']))
+    print_table(rows)
+    wall = time.perf_counter() - start
+    slowest = max((row['seconds'] for row in rows if not row['cached']), default=0.0)
+    cached = sum(row['cached'] for row in rows)
+    print(f'{len(rows)}/{len(jobs)} backtests ({cached} cached) in {wall:.1f}s wall clock '
+          f'(slowest job {slowest:.1f}s, {workers} workers)')
+
+    output = args.userdir / 'backtest_results' / f'matrix-{datetime.now(timezone.utc):%Y-%m-%d_%H-%M-%S}'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.with_suffix('.json').write_text(json.dumps(rows, indent=2, default=str))
+    pd.DataFrame(rows).to_csv(output.with_suffix('.csv'), index=False)
+    print(f'Comparison written to {output}.json/.csv')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark ScalpingStrategy's batched live RSI against the per-pair computation.
+
+Simulates the live loop for 50, 200 and 500 pairs: every iteration the window of every
+pair gains one candle (and drops its first), bot_loop_start runs and then
+populate_indicators for each pair. The per-pair path computes TA-Lib's RSI over every window
+(through the indicator engine). The batched path (RsiBatch) computes the first window and
+then only continues every pair's RSI by its new candle, so its column must equal TA-Lib's RSI
+over the pair's history since the first window, and differs from the per-pair RSI of the
+window by the seed of the window's first candles, which has decayed by the last candle
+(printed as last diff, the candle the signals are read from).
+
+Usage:
+    python tests/bench_batched_rsi.py [--pairs 50 200 500] [--window 1000] [--steps 20]
+"""
+import argparse
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import talib
+
+from synthetic_ohlcv import add_strategies_path, generate_pairs, load_strategy
+
+add_strategies_path()
+from indicator_engine import engine  # noqa: E402
+
+
+def live_strategy(batched: bool, frames: dict):
+    """ScalpingStrategy in dry-run with a data provider serving ``frames`` (updated in place)."""
+    from freqtrade.enums import RunMode
+
+    strategy = load_strategy('ScalpingStrategy', 'dry_run')
+    strategy.use_batched_rsi = batched
+    strategy.dp = SimpleNamespace(
+        runmode=RunMode.DRY_RUN,
+        current_whitelist=lambda: list(frames),
+        ohlcv=lambda pair, timeframe=None, copy=True, candle_type='': frames[pair],
+    )
+    return strategy
+
+
+def run_loop(strategy, frames: dict, windows: list) -> tuple:
+    """Runs one loop per window, returns (seconds per loop, RSI of the last loop per pair)."""
+    elapsed = 0.0
+    rsi = {}
+    for window in windows:
+        frames.clear()
+        frames.update(window)
+        start = time.perf_counter()
+        strategy.bot_loop_start(current_time=None)
+        for pair, df in window.items():
+            rsi[pair] = strategy.populate_indicators(df, {'pair': pair})['rsi'].to_numpy()
+        elapsed += time.perf_counter() - start
+    return elapsed / len(windows), rsi
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--pairs', type=int, nargs='+', default=[50, 200, 500])
+    parser.add_argument('--window', type=int, default=1000, help='Candles per pair and loop')
+    parser.add_argument('--steps', type=int, default=20, help='Loops (new candles) to simulate')
+    args = parser.parse_args()
+
+    ok = True
+    print(f'window={args.window} candles, {args.steps} loops')
+    print(f'{"pairs":>6}{"per-pair ms":>14}{"batched ms":>12}{"speedup":>9}{"last diff":>11}')
+    for pairs in args.pairs:
+        history = generate_pairs(pairs, args.window + args.steps, timeframe='5m')
+        windows = [{pair: df.iloc[step:step + args.window] for pair, df in history.items()}
+                   for step in range(1, args.steps + 1)]
+        engine.clear()
+        frames = {}
+        per_pair, expected = run_loop(live_strategy(False, frames), frames, windows)
+        engine.clear()
+        batched_strategy = live_strategy(True, frames)
+        batched, actual = run_loop(batched_strategy, frames, windows)
+        diff = max(abs(expected[pair][-1] - actual[pair][-1]) for pair in expected)
+        # TA-Lib over everything since the first window, cut to the last window
+        continued = all(np.array_equal(
+            talib.RSI(history[pair]['close'].to_numpy()[1:], timeperiod=batched_strategy.rsi_period)[-args.window:],
+            actual[pair], equal_nan=True) for pair in actual)
+        batch = batched_strategy._rsi_batch
+        # Same candles again (a loop between two candles): nothing to update
+        ok &= continued and diff < 1e-9 and batch.misses == 0 and batch.computed == pairs and not batch.update(frames)
+        print(f'{pairs:>6}{per_pair * 1000:>14.2f}{batched * 1000:>12.2f}{per_pair / batched:>8.1f}x{diff:>11.1e}')
+    print('identical to TA-Lib since the first window, one full computation per pair:', ok)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
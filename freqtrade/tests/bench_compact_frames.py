@@ -0,0 +1,83 @@
+"""
+Per-pair memory report of the compact frame mode (use_compact_frames).
+
+Analyzes ``--pairs`` synthetic pairs with KamaStrategy and SampleStrategy (populate_indicators
+plus the entry/exit signals, like freqtrade's analyzed dataframe of a pair), once with the
+regular float64 frames and once in compact mode. It reports the memory per pair, projects it
+onto larger whitelists and checks that both modes produce the same signals.
+
+Usage:
+    python tests/bench_compact_frames.py [--pairs 4] [--candles 1000] [--project 100 200 500]
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from synthetic_ohlcv import add_strategies_path, generate_pairs, load_strategy
+
+add_strategies_path()
+from compact_frames import frame_nbytes  # noqa: E402
+
+STRATEGIES = ('KamaStrategy', 'SampleStrategy')
+SIGNALS = ('enter_long', 'enter_short', 'exit_long', 'exit_short')
+
+
+def analyze(strategy, data):
+    """Returns ``{pair: analyzed dataframe}``."""
+    analyzed = {}
+    for pair, ohlcv in data.items():
+        metadata = {'pair': pair}
+        df = strategy.populate_indicators(ohlcv.copy(), metadata)
+        df = strategy.populate_entry_trend(df, metadata)
+        if hasattr(strategy, 'populate_short_trend'):
+            df = strategy.populate_short_trend(df, metadata)
+        analyzed[pair] = strategy.populate_exit_trend(df, metadata)
+    return analyzed
+
+
+def signal_mismatches(regular, compact):
+    """Rows where a signal differs between the modes (NaN and 0 both mean no signal)."""
+    mismatches = 0
+    for pair, df in regular.items():
+        for column in SIGNALS:
+            if column in df.columns:
+                mismatches += int(((df[column].to_numpy() == 1) != (compact[pair][column].to_numpy() == 1)).sum())
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=4)
+    parser.add_argument('--candles', type=int, default=1000, help='Candles per pair (live: ~1000)')
+    parser.add_argument('--project', type=int, nargs='+', default=[100, 200, 500],
+                        help='Whitelist sizes to project the total memory onto')
+    args = parser.parse_args()
+
+    ok = True
+    for name in STRATEGIES:
+        regular = load_strategy(name, 'backtest', timeframe='15m')
+        compact = load_strategy(name, 'backtest', timeframe='15m')
+        compact.use_compact_frames = True
+        data = generate_pairs(args.pairs, args.candles, timeframe='15m')
+        regular_frames = analyze(regular, data)
+        compact_frames = analyze(compact, data)
+
+        before = np.mean([frame_nbytes(df) for df in regular_frames.values()])
+        after = np.mean([frame_nbytes(df) for df in compact_frames.values()])
+        mismatches = signal_mismatches(regular_frames, compact_frames)
+        ok &= mismatches == 0
+        columns = len(next(iter(regular_frames.values())).columns)
+        compact_columns = len(next(iter(compact_frames.values())).columns)
+        print(f'{name}: {args.pairs} pairs x {args.candles} candles, {columns} -> {compact_columns} columns')
+        print(f'  analyzed dataframe per pair: {before / 1024:8.1f} KiB -> {after / 1024:8.1f} KiB '
+              f'({1 - after / before:.0%} saved)')
+        print(f'  indicator step (memory_report): {compact.memory_report.summary()["saved_ratio"]:.0%} saved')
+        for pairs in args.project:
+            print(f'  {pairs:>4} pairs: {before * pairs / 2 ** 20:8.1f} MiB -> {after * pairs / 2 ** 20:8.1f} MiB')
+        print(f'  signal rows differing from float64: {mismatches}')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
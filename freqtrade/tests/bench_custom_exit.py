@@ -0,0 +1,87 @@
+"""
+Benchmark KamaStrategy.custom_exit latency with and without the last-candle snapshot store.
+
+Compares three variants for ``--trades`` open trades spread over ``--pairs`` pairs:
+    previous  : get_analyzed_dataframe + df.iloc[-1].get('atr') (the former implementation)
+    dataframe : the current backtesting fallback (get_analyzed_dataframe + df['atr'].iat[-1])
+    snapshot  : the live/dry-run path (one dict lookup + two float comparisons)
+
+Usage:
+    python tests/bench_custom_exit.py [--pairs 60] [--trades 60] [--rounds 200]
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from synthetic_ohlcv import generate_pairs, load_strategy
+
+
+def previous_custom_exit(strategy, pair, trade, current_time, current_rate, current_profit, **kwargs):
+    df_tuple = strategy.dp.get_analyzed_dataframe(pair, strategy.timeframe)
+    if df_tuple is None or trade is None:
+        return None
+    df = df_tuple[0] if isinstance(df_tuple, tuple) else df_tuple
+    if df is None or len(df) == 0:
+        return None
+    last_candle = df.iloc[-1]
+    atr = last_candle.get('atr', None)
+    if atr is None:
+        return None
+    if current_rate < (trade.open_rate - 2 * atr):
+        return 'atr_stoploss'
+    if current_rate > (trade.open_rate + 3 * atr):
+        return 'atr_takeprofit'
+    return None
+
+
+def time_calls(func, calls, rounds):
+    start = time.perf_counter()
+    results = None
+    for _ in range(rounds):
+        results = [func(pair, trade, now, rate, 0.0) for pair, trade, now, rate in calls]
+    return (time.perf_counter() - start) / (rounds * len(calls)), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=60)
+    parser.add_argument('--trades', type=int, default=60)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    strategy = load_strategy('KamaStrategy', 'dry_run', timeframe='15m')
+    analyzed = {}
+    for pair, ohlcv in generate_pairs(args.pairs, 1000).items():
+        analyzed[pair] = strategy.populate_indicators(ohlcv, {'pair': pair})
+    # Only the methods custom_exit uses, backed by the analyzed frames
+    dataprovider = SimpleNamespace(
+        runmode=strategy.dp.runmode,
+        get_analyzed_dataframe=lambda pair, timeframe: (analyzed[pair], datetime.now(timezone.utc)),
+    )
+    strategy.dp = dataprovider
+
+    pairs = list(analyzed)
+    now = datetime.now(timezone.utc)
+    calls = []
+    for i in range(args.trades):
+        pair = pairs[i % len(pairs)]
+        close = analyzed[pair]['close'].iat[-1]
+        trade = SimpleNamespace(pair=pair, open_rate=close * (0.97 + 0.06 * (i % 7) / 6))
+        calls.append((pair, trade, now, close))
+
+    previous, expected = time_calls(
+        lambda *call: previous_custom_exit(strategy, *call), calls, args.rounds)
+    snapshot, actual = time_calls(strategy.custom_exit, calls, args.rounds)
+    strategy._atr_snapshots.clear()
+    dataframe, fallback = time_calls(strategy.custom_exit, calls, args.rounds)
+
+    print(f'{args.trades} open trades over {args.pairs} pairs, {args.rounds} rounds')
+    print(f'previous  : {previous * 1e6:8.2f} us/call')
+    print(f'dataframe : {dataframe * 1e6:8.2f} us/call  ({previous / dataframe:.1f}x)')
+    print(f'snapshot  : {snapshot * 1e6:8.2f} us/call  ({previous / snapshot:.1f}x)')
+    print('same exit decisions:', expected == actual == fallback)
+
+
+if __name__ == '__main__':
+    main()
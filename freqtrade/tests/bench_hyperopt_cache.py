@@ -0,0 +1,116 @@
+"""
+Time a simulated KamaStrategy hyperopt run with and without the per-window KAMA cache.
+
+Without the cache every epoch has to rerun populate_indicators for its sampled kama_window
+(what ``--analyze-per-epoch`` does), the indicator engine is cleared before each epoch. With
+the cache populate_indicators runs once per pair in hyperopt mode (without KAMA), and each
+epoch copies the analyzed frame (freqtrade loads a copy per epoch) and evaluates the signal
+methods, which take KAMA/long-term KAMA of the epoch's kama_window from the engine: computed
+on the first epoch sampling the window, memoized for the later ones. The engine starts empty
+in both runs. The trade simulation itself is not included.
+
+Usage:
+    python tests/bench_hyperopt_cache.py [--epochs 100] [--pairs 4] [--candles 35000]
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+from freqtrade.enums import HyperoptState
+from freqtrade.optimize.hyperopt_tools import HyperoptStateContainer
+
+from synthetic_ohlcv import add_strategies_path, generate_pairs, load_strategy
+
+add_strategies_path()
+from indicator_engine import engine  # noqa: E402
+
+SIGNALS = ('enter_long', 'enter_short', 'exit_long', 'exit_short')
+
+
+def sample_epochs(strategy, epochs, seed=0):
+    rng = random.Random(seed)
+    return [{
+        'kama_window': rng.randint(strategy.kama_window.low, strategy.kama_window.high),
+        'adx_threshold': rng.randint(strategy.adx_threshold.low, strategy.adx_threshold.high),
+        'chop_threshold': rng.randint(strategy.chop_threshold.low, strategy.chop_threshold.high),
+        'bb_width_threshold': round(rng.uniform(0.01, 0.07), 3),
+    } for _ in range(epochs)]
+
+
+def apply_params(strategy, params):
+    for name, value in params.items():
+        getattr(strategy, name).value = value
+
+
+def populate_signals(strategy, df, metadata):
+    df = strategy.populate_entry_trend(df, metadata)
+    df = strategy.populate_short_trend(df, metadata)
+    return strategy.populate_exit_trend(df, metadata)
+
+
+def run_without_cache(strategy, data, epochs):
+    """Every epoch recomputes all indicators for its own kama_window."""
+    signals = []
+    for params in epochs:
+        apply_params(strategy, params)
+        engine.clear()
+        for pair, ohlcv in data.items():
+            df = strategy.populate_indicators(ohlcv.copy(), {'pair': pair})
+            df = populate_signals(strategy, df, {'pair': pair})
+            signals.append(df[list(SIGNALS)].fillna(0).to_numpy())
+    return signals
+
+
+def run_with_cache(strategy, data, epochs):
+    """Indicators once per pair for the whole kama_window range, signals per epoch."""
+    for parameter in (strategy.kama_window, strategy.adx_threshold,
+                      strategy.chop_threshold, strategy.bb_width_threshold):
+        parameter.in_space = True
+    HyperoptStateContainer.set_state(HyperoptState.INDICATORS)
+    processed = {pair: strategy.populate_indicators(ohlcv.copy(), {'pair': pair})
+                 for pair, ohlcv in data.items()}
+    HyperoptStateContainer.set_state(HyperoptState.OPTIMIZE)
+
+    signals = []
+    for params in epochs:
+        apply_params(strategy, params)
+        for pair, df in processed.items():
+            # freqtrade hands every epoch a fresh copy of the analyzed frame
+            df = populate_signals(strategy, df.copy(), {'pair': pair})
+            signals.append(df[list(SIGNALS)].fillna(0).to_numpy())
+    return signals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--epochs', type=int, default=100)
+    parser.add_argument('--pairs', type=int, default=4)
+    parser.add_argument('--candles', type=int, default=35_000, help='35k 15m candles ~ 1 year')
+    args = parser.parse_args()
+
+    data = generate_pairs(args.pairs, args.candles)
+    epochs = sample_epochs(load_strategy('KamaStrategy', 'hyperopt', timeframe='15m'), args.epochs)
+
+    start = time.perf_counter()
+    expected = run_without_cache(load_strategy('KamaStrategy', 'hyperopt', timeframe='15m'), data, epochs)
+    uncached = time.perf_counter() - start
+
+    engine.clear()
+    start = time.perf_counter()
+    actual = run_with_cache(load_strategy('KamaStrategy', 'hyperopt', timeframe='15m'), data, epochs)
+    cached = time.perf_counter() - start
+
+    identical = all(np.array_equal(a, b) for a, b in zip(expected, actual))
+    print(f'{args.epochs} epochs, {args.pairs} pairs x {args.candles} candles')
+    print(f'without cache: {uncached:8.2f} s ({uncached / args.epochs * 1000:8.1f} ms/epoch)')
+    print(f'with cache   : {cached:8.2f} s ({cached / args.epochs * 1000:8.1f} ms/epoch)  '
+          f'{uncached / cached:.1f}x faster')
+    print(f'identical signals: {identical}')
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
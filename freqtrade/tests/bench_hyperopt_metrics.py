@@ -0,0 +1,125 @@
+"""
+Benchmark hyperopt_metrics.trade_metrics against freqtrade's pandas metric functions.
+
+Builds a synthetic hyperopt results frame of ``--trades`` trades and computes Sharpe,
+Sortino, Calmar, max drawdown, expectancy, total profit and mean duration plus the
+MultiMetricHyperOptLoss value, once with freqtrade.data.metrics (a pandas pass per metric,
+like combining several loss functions) and once with the NumPy kernel, then compares them.
+
+Usage:
+    python tests/bench_hyperopt_metrics.py [--trades 10000] [--rounds 50]
+"""
+import argparse
+import sys
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from freqtrade.data.metrics import (calculate_calmar, calculate_expectancy, calculate_max_drawdown,
+                                    calculate_sharpe, calculate_sortino)
+
+from synthetic_ohlcv import add_hyperopts_path
+
+add_hyperopts_path()
+from hyperopt_metrics import multi_metric_loss, trade_metrics  # noqa: E402
+
+STARTING_BALANCE = 1000.0
+# MultiMetricHyperOptLoss constants
+DRAWDOWN_MULT = 0.055
+EXPECTANCY_CONST = 2.0
+PF_CONST = 1.0
+WINRATE_CONST = 1.2
+TARGET_TRADE_AMOUNT = 50
+
+
+def generate_trades(trades: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic hyperopt results (close dates unordered across pairs, like real results)."""
+    rng = np.random.default_rng(seed)
+    open_date = pd.Timestamp('2024-01-01', tz='UTC') + pd.to_timedelta(
+        np.sort(rng.integers(0, 365 * 24 * 4, trades)) * 15, unit='min')
+    duration = rng.integers(1, 96, trades) * 15
+    profit_ratio = rng.normal(0.001, 0.02, trades)
+    return pd.DataFrame({
+        'pair': [f'PAIR{i % 20}/USDT:USDT' for i in range(trades)],
+        'open_date': open_date,
+        'close_date': open_date + pd.to_timedelta(duration, unit='min'),
+        'trade_duration': duration,
+        'profit_ratio': profit_ratio,
+        'profit_abs': profit_ratio * 20.0,
+    })
+
+
+def pandas_metrics(results, min_date, max_date):
+    drawdown = calculate_max_drawdown(results, value_col='profit_abs', starting_balance=STARTING_BALANCE)
+    expectancy, expectancy_ratio = calculate_expectancy(results)
+    return {
+        'total_profit': results['profit_abs'].sum(),
+        'total_profit_ratio': results['profit_ratio'].sum(),
+        'mean_duration': results['trade_duration'].mean(),
+        'sharpe': calculate_sharpe(results, min_date, max_date, STARTING_BALANCE),
+        'sortino': calculate_sortino(results, min_date, max_date, STARTING_BALANCE),
+        'calmar': calculate_calmar(results, min_date, max_date, STARTING_BALANCE),
+        'max_drawdown_abs': drawdown.drawdown_abs,
+        'max_drawdown_relative': drawdown.relative_account_drawdown,
+        'expectancy': expectancy,
+        'expectancy_ratio': expectancy_ratio,
+        'multi_metric_loss': pandas_multi_metric_loss(results, drawdown, expectancy_ratio),
+    }
+
+
+def pandas_multi_metric_loss(results, drawdown, expectancy_ratio):
+    """MultiMetricHyperOptLoss.hyperopt_loss_function, reusing the drawdown and expectancy above."""
+    total_profit = results['profit_abs'].sum()
+    winning_profit = results.loc[results['profit_abs'] > 0, 'profit_abs'].sum()
+    losing_profit = results.loc[results['profit_abs'] < 0, 'profit_abs'].sum()
+    profit_factor = winning_profit / (abs(losing_profit) + 1e-6)
+    winrate = len(results.loc[results['profit_abs'] > 0]) / len(results)
+    trade_count_penalty = 1.0 if len(results) >= TARGET_TRADE_AMOUNT else max(
+        1 - abs(len(results) - TARGET_TRADE_AMOUNT) / TARGET_TRADE_AMOUNT, 0.1)
+    relative_account_drawdown = drawdown.relative_account_drawdown
+    profit_draw_function = total_profit - (relative_account_drawdown * total_profit) * (1 - DRAWDOWN_MULT)
+    return -1 * (profit_draw_function * np.log(profit_factor + PF_CONST)
+                 * np.log(min(10, expectancy_ratio) + EXPECTANCY_CONST)
+                 * np.log(WINRATE_CONST + winrate) * trade_count_penalty)
+
+
+def numpy_metrics(results, min_date, max_date):
+    metrics = trade_metrics(results, min_date, max_date, STARTING_BALANCE)
+    return {**metrics._asdict(), 'multi_metric_loss': multi_metric_loss(metrics, metrics.trade_count)}
+
+
+def time_rounds(func, rounds, *args):
+    result = func(*args)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(*args)
+    return (time.perf_counter() - start) / rounds, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--trades', type=int, default=10_000)
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    results = generate_trades(args.trades)
+    min_date = results['open_date'].min().to_pydatetime()
+    max_date = results['close_date'].max().to_pydatetime() + timedelta(minutes=15)
+
+    pandas_time, expected = time_rounds(pandas_metrics, args.rounds, results, min_date, max_date)
+    numpy_time, actual = time_rounds(numpy_metrics, args.rounds, results, min_date, max_date)
+
+    print(f'{args.trades} trades, {args.rounds} rounds')
+    print(f'pandas (freqtrade.data.metrics): {pandas_time * 1e3:8.3f} ms')
+    print(f'trade_metrics                  : {numpy_time * 1e3:8.3f} ms  ({pandas_time / numpy_time:.1f}x)')
+    ok = True
+    for name, value in expected.items():
+        difference = abs(actual[name] - value) / max(1.0, abs(value))
+        ok &= bool(difference <= 1e-9)
+        print(f'  {name:<22}{value:>16.8g}{actual[name]:>16.8g}  {"ok" if difference <= 1e-9 else "MISMATCH"}')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark KamaStrategy's incremental live-mode indicators against a full recompute.
+
+Simulates the live loop: a sliding window of ``--window`` closed candles gains one candle
+per iteration. For every iteration the incremental path (KamaIndicatorState) is compared
+with the full vectorized populate_indicators run over the complete history so far.
+
+Usage:
+    python tests/bench_incremental.py [--window 1000] [--steps 200] [--throttle 5]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from synthetic_ohlcv import generate_ohlcv, load_strategy
+
+COLUMNS = ('kama', 'adx', 'chop', 'bb_width', 'atr', 'long_term_kama')
+TOLERANCE = 1e-9
+
+
+def max_rel_diff(expected, actual):
+    if not np.array_equal(np.isnan(expected), np.isnan(actual)):
+        return np.inf
+    return np.nanmax(np.abs(expected - actual) / np.maximum(1.0, np.abs(expected)), initial=0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--window', type=int, default=1000, help='Candles in the analyzed window')
+    parser.add_argument('--steps', type=int, default=200, help='Number of new candles to simulate')
+    parser.add_argument('--throttle', type=float, default=5.0, help='process_throttle_secs')
+    args = parser.parse_args()
+
+    full = load_strategy('KamaStrategy', 'backtest', timeframe='15m')
+    live = load_strategy('KamaStrategy', 'dry_run', timeframe='15m')
+    metadata = {'pair': 'PAIR0/USDT:USDT'}
+
+    history = generate_ohlcv(args.window + args.steps)
+    live.populate_indicators(history.iloc[:args.window].copy(), metadata)
+
+    full_times, live_times, worst = [], [], 0.0
+    for step in range(1, args.steps + 1):
+        end = args.window + step
+        frame = history.iloc[end - args.window:end].copy()
+
+        start = time.perf_counter()
+        live_df = live.populate_indicators(frame.copy(), metadata)
+        live_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        full.populate_indicators(frame.copy(), metadata)
+        full_times.append(time.perf_counter() - start)
+
+        # Incremental values continue the full history, so compare against it.
+        reference = full.populate_indicators(history.iloc[:end].copy(), metadata)
+        for column in COLUMNS:
+            worst = max(worst, max_rel_diff(reference[column].to_numpy()[-args.window:],
+                                            live_df[column].to_numpy()))
+
+    full_ms = np.median(full_times) * 1000
+    live_ms = np.median(live_times) * 1000
+    print(f'window={args.window} steps={args.steps}')
+    print(f'full recompute per pair/candle : {full_ms:8.3f} ms')
+    print(f'incremental per pair/candle    : {live_ms:8.3f} ms ({full_ms / live_ms:.1f}x faster)')
+    print(f'pairs per {args.throttle:g}s loop (CPU bound) : full {args.throttle * 1000 / full_ms:,.0f}, '
+          f'incremental {args.throttle * 1000 / live_ms:,.0f}')
+    print(f'max relative deviation vs full history: {worst:.3e}')
+    if worst > TOLERANCE:
+        print(f'FAILED: incremental indicators deviate by more than {TOLERANCE}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
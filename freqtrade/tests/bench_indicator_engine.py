@@ -0,0 +1,48 @@
+"""
+Show the shared indicator engine's reuse across strategies in one process.
+
+Runs populate_indicators of KamaStrategy, SampleStrategy and ScalpingStrategy on the same
+synthetic pairs (like ``backtesting --strategy-list``), then repeats the run (like comparing
+strategies again in a notebook), and prints the engine's hit/miss counts and timings.
+
+Usage:
+    python tests/bench_indicator_engine.py [--pairs 4] [--candles 35000]
+"""
+import argparse
+import time
+
+from synthetic_ohlcv import add_strategies_path, generate_pairs, load_strategy
+
+add_strategies_path()
+from indicator_engine import engine  # noqa: E402
+
+STRATEGIES = ('KamaStrategy', 'SampleStrategy', 'ScalpingStrategy')
+
+
+def analyze_all(strategies, data):
+    start = time.perf_counter()
+    for strategy in strategies:
+        for pair, ohlcv in data.items():
+            strategy.populate_indicators(ohlcv.copy(), {'pair': pair})
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=4)
+    parser.add_argument('--candles', type=int, default=35_000)
+    args = parser.parse_args()
+
+    data = generate_pairs(args.pairs, args.candles, timeframe='5m')
+    strategies = [load_strategy(name, 'backtest', timeframe='5m') for name in STRATEGIES]
+    analyze_all(strategies, {pair: df.iloc[:100] for pair, df in data.items()})  # compile kernels
+    engine.clear()
+
+    first = analyze_all(strategies, data)
+    print(f'first run : {first:7.3f} s  {engine.stats()}')
+    second = analyze_all(strategies, data)
+    print(f'second run: {second:7.3f} s  {engine.stats()}')
+
+
+if __name__ == '__main__':
+    main()
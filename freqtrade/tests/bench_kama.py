@@ -0,0 +1,64 @@
+"""
+Benchmark the fast KAMA kernel against ``ta.momentum.KAMAIndicator``.
+
+Usage:
+    python tests/bench_kama.py [--candles 35000 100000] [--window 30] [--repeat 5]
+
+Fails (exit code 1) if the two implementations differ by more than 1e-9.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import ta
+
+from synthetic_ohlcv import add_strategies_path, generate_ohlcv
+
+add_strategies_path()
+from fast_indicators import kama  # noqa: E402
+
+TOLERANCE = 1e-9
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--candles', type=int, nargs='+', default=[35_000, 100_000])
+    parser.add_argument('--window', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # Warm up (compiles the kernel when numba is installed).
+    kama(generate_ohlcv(100)['close'].to_numpy(), window=args.window)
+
+    failed = False
+    print(f"{'candles':>10} {'ta [ms]':>10} {'fast [ms]':>10} {'speedup':>8} {'max abs diff':>14}")
+    for candles in args.candles:
+        close = generate_ohlcv(candles)['close']
+        ta_time, expected = best_of(
+            lambda: ta.momentum.KAMAIndicator(close, window=args.window).kama(), args.repeat)
+        fast_time, actual = best_of(lambda: kama(close.to_numpy(), window=args.window), args.repeat)
+
+        expected = expected.to_numpy()
+        same_nans = np.array_equal(np.isnan(expected), np.isnan(actual))
+        diff = np.nanmax(np.abs(expected - actual))
+        failed |= not same_nans or diff > TOLERANCE
+        print(f'{candles:>10} {ta_time * 1000:>10.2f} {fast_time * 1000:>10.2f} '
+              f'{ta_time / fast_time:>7.1f}x {diff:>14.3e}')
+
+    if failed:
+        print(f'FAILED: fast KAMA deviates from ta by more than {TOLERANCE}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+OHLCV integrity scan (ohlcv_scan) against loading every file into pandas.
+
+Writes ``--pairs`` x ``--timeframes`` synthetic futures candle files with freqtrade's data
+handler (``--format``) into a temporary data directory, with one defect in most files
+(gap, duplicate, swapped candles, broken OHLC, NaN close, zero-volume run, misaligned
+timestamp). Then checks them:
+    pandas : every file loaded with the data handler (no cleaning), checks with pandas
+    scan   : ohlcv_scan with 1 worker and with ``--jobs`` workers, without stored report
+    cached : ohlcv_scan again, every file unchanged (stored report)
+
+The counts of the scan (also with tiny chunks, i.e. many chunk boundaries) must equal the
+pandas ones, and every file with a defect must be flagged.
+
+Usage:
+    python tests/bench_ohlcv_scan.py [--pairs 50] [--timeframes 5m 15m 1h 4h] [--candles 35000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from freqtrade.data.history import get_datahandler
+from freqtrade.enums import CandleType
+from freqtrade.exchange import timeframe_to_msecs
+
+from ohlcv_scan import DAY_MS, file_status, ohlcv_files, scan, scan_file
+from synthetic_ohlcv import generate_ohlcv
+
+DEFECTS = ('gap', 'duplicate', 'swapped', 'ohlc', 'nan', 'zero_volume', 'misaligned')
+MAX_ZERO_VOLUME_RUN = 3
+
+
+def inject(df: pd.DataFrame, defect: str) -> pd.DataFrame:
+    """One defect in the middle of the candles."""
+    df = df.copy()
+    row = len(df) // 2
+    if defect == 'gap':
+        return df.drop(index=range(row, row + 5)).reset_index(drop=True)
+    if defect == 'duplicate':
+        return pd.concat([df.iloc[:row + 1], df.iloc[row:]], ignore_index=True)
+    if defect == 'swapped':
+        df.iloc[[row, row + 1]] = df.iloc[[row + 1, row]].to_numpy()
+    elif defect == 'ohlc':
+        df.loc[row, 'high'] = min(df.loc[row, 'open'], df.loc[row, 'close']) * 0.99
+    elif defect == 'nan':
+        df.loc[row, 'close'] = np.nan
+    elif defect == 'zero_volume':
+        df.loc[row:row + 9, 'volume'] = 0.0
+    elif defect == 'misaligned':
+        df.loc[row, 'date'] += pd.Timedelta(seconds=1)
+    return df
+
+
+def write_files(datadir: Path, pairs: int, timeframes: list, candles: int, data_format: str) -> dict:
+    """Writes the candle files, returns the injected defect (or None) by file name."""
+    handler = get_datahandler(datadir, data_format)
+    defects = {}
+    number = 0
+    for timeframe in timeframes:
+        base = generate_ohlcv(candles, seed=number, timeframe=timeframe)
+        for index in range(pairs):
+            pair = f'PAIR{index}/USDT:USDT'
+            # Every 8th file stays clean
+            slot = number % (len(DEFECTS) + 1)
+            defect = DEFECTS[slot] if slot < len(DEFECTS) else None
+            handler.ohlcv_store(pair, timeframe, inject(base, defect) if defect else base, CandleType.FUTURES)
+            path = handler._pair_data_filename(datadir, pair, timeframe, CandleType.FUTURES)
+            defects[str(path.relative_to(datadir))] = defect
+            number += 1
+    return defects
+
+
+def pandas_checks(df: pd.DataFrame, timeframe: str) -> dict:
+    """The counts of ohlcv_scan.CandleChecks, computed with pandas on the loaded frame."""
+    timeframe_ms = timeframe_to_msecs(timeframe)
+    dates = df['date'].astype('datetime64[ms, UTC]').astype('int64')
+    steps = dates.diff().iloc[1:]
+    gaps = steps[steps > timeframe_ms]
+    prices = df[['open', 'high', 'low', 'close']]
+    invalid = ~np.isfinite(prices).all(axis=1) | (prices <= 0).any(axis=1)
+    ohlc = (df['high'] < df[['open', 'close', 'low']].max(axis=1)) | (df['low'] > df[['open', 'close']].min(axis=1))
+    zero = df['volume'] == 0
+    runs = zero.groupby((~zero).cumsum()).sum()
+    return {
+        'rows': len(df),
+        'start': int(dates.iloc[0]),
+        'end': int(dates.iloc[-1]),
+        'gaps': len(gaps),
+        'missing': int((gaps // timeframe_ms - 1).sum()),
+        'max_gap': int(gaps.max() // timeframe_ms) if len(gaps) else 0,
+        'duplicates': int((steps == 0).sum()),
+        'unordered': int((steps < 0).sum()),
+        'misaligned': int((dates % timeframe_ms != 0).sum()) if timeframe_ms <= DAY_MS else 0,
+        'invalid_prices': int(invalid.sum()),
+        'invalid_ohlc': int((ohlc & ~invalid).sum()),
+        'negative_volume': int((df['volume'] < 0).sum()),
+        'zero_volume': int(zero.sum()),
+        'zero_volume_run': int(runs.max()) if len(runs) else 0,
+    }
+
+
+def scan_pandas(datadir: Path, data_format: str) -> dict:
+    handler = get_datahandler(datadir, data_format)
+    results = {}
+    for path in ohlcv_files(datadir):
+        match = handler._OHLCV_REGEX.search(path.name)
+        pair = handler.rebuild_pair_from_filename(match[1])
+        df = handler._ohlcv_load(pair, match[2], None, CandleType.FUTURES)
+        results[str(path.relative_to(datadir))] = pandas_checks(df, match[2])
+    return results
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=50)
+    parser.add_argument('--timeframes', nargs='+', default=['5m', '15m', '1h', '4h'])
+    parser.add_argument('--candles', type=int, default=35_000, help='Candles per file (35k 15m candles ~ 1 year)')
+    parser.add_argument('--format', default='feather', choices=['feather', 'parquet', 'json', 'jsongz'])
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        datadir = Path(directory)
+        defects = write_files(datadir, args.pairs, args.timeframes, args.candles, args.format)
+        size = sum(path.stat().st_size for path in ohlcv_files(datadir))
+        print(f'{len(defects)} {args.format} files x {args.candles} candles ({size / 2 ** 20:.0f} MiB), '
+              f'{sum(defect is not None for defect in defects.values())} with a defect')
+
+        pandas_time, expected = timed(scan_pandas, datadir, args.format)
+        single_time, (single, _, _) = timed(scan, datadir, jobs=1, use_cache=False)
+        parallel_time, (parallel, _, _) = timed(scan, datadir, jobs=args.jobs, use_cache=False)
+        cached_time, (cached, scanned, _) = timed(scan, datadir, jobs=args.jobs)
+        print(f'{"mode":16} {"seconds":>8} {"files/s":>9}')
+        for mode, seconds in (('pandas', pandas_time), ('scan 1 worker', single_time),
+                              (f'scan {args.jobs} workers', parallel_time), ('cached', cached_time)):
+            print(f'{mode:16} {seconds:8.3f} {len(defects) / seconds:9.0f}')
+
+        counted = {name: {key: value for key, value in entry.items()
+                          if key not in ('signature', 'timeframe', 'candle_type')} for name, entry in parallel.items()}
+        small_chunks = {name: scan_file(datadir / name, chunk_rows=997) for name in list(defects)[::7]}
+        mismatches = [name for name in defects if counted[name] != expected[name]]
+        mismatches += [name for name, entry in small_chunks.items()
+                       if {key: entry[key] for key in counted[name]} != counted[name]]
+        missed = [name for name, defect in defects.items()
+                  if (file_status(parallel[name], MAX_ZERO_VOLUME_RUN) == 'ok') != (defect is None)]
+        identical = single == parallel and cached == parallel and scanned == 0
+        print(f'counts equal to pandas: {not mismatches}, defects flagged: {not missed}, '
+              f'cached report identical: {identical}')
+        if mismatches or missed or not identical:
+            for name in (mismatches + missed)[:5]:
+                print(name, defects[name], counted[name], expected[name])
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
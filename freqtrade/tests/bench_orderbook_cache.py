@@ -0,0 +1,168 @@
+"""
+Benchmark and check the background order book cache against a slow exchange.
+
+Simulates ``--loops`` bot loops over ``--pairs`` pairs. Each loop reads every pair's best
+bid/ask and depth features:
+    blocking : one synchronous order book request per pair (``dp.orderbook`` in populate_indicators)
+    cache    : OrderBookCache.features, the books being refreshed concurrently in the background
+
+By default the exchange is an in-process fake whose requests take ``--latency`` seconds plus
+up to ``--jitter`` seconds. With ``--replay`` the cache fetches through ccxt from a running
+replay exchange instead (start it with ``--depth-latency``, see replay_exchange.py).
+
+Afterwards the exchange stalls for ``2 * --ttl`` seconds: every snapshot must turn stale
+(NaN features) and all pairs must be fresh again once it recovers.
+
+Usage:
+    python tests/bench_orderbook_cache.py [--pairs 50] [--latency 0.08] [--jitter 0.04] [--ttl 2]
+    python tests/replay_exchange.py --pairs 50 --depth-latency 0.08 --depth-jitter 0.04 &
+    python tests/bench_orderbook_cache.py --replay http://127.0.0.1:8090 --pairs 50
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+from synthetic_ohlcv import add_strategies_path
+
+add_strategies_path()
+from orderbook_cache import CcxtFetcher, OrderBookCache  # noqa: E402
+
+
+class FakeDepthExchange:
+    """
+    ``fetch(pair, limit)`` answering after a simulated latency, or not at all while stalled.
+
+    Args:
+        latency (float): Base delay of every request, seconds.
+        jitter (float): Additional uniformly random delay, seconds.
+    """
+
+    def __init__(self, latency: float, jitter: float, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.stalled = False
+        self.requests = 0
+        self.in_flight = self.max_in_flight = 0
+        self.rng = np.random.default_rng(seed)
+
+    def delay(self) -> float:
+        return self.latency + self.rng.uniform(0, self.jitter)
+
+    def book(self, pair: str, limit: int) -> dict:
+        mid = 100 + hash(pair) % 100
+        levels = np.arange(limit) * 0.01
+        amounts = self.rng.gamma(2.0, 1.0, (2, limit))
+        return {
+            'bids': [[mid - 0.01 - step, amount] for step, amount in zip(levels, amounts[0])],
+            'asks': [[mid + 0.01 + step, amount] for step, amount in zip(levels, amounts[1])],
+            'timestamp': int(time.time() * 1000),
+        }
+
+    async def __call__(self, pair: str, limit: int) -> dict:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay())
+            while self.stalled:
+                await asyncio.sleep(0.05)
+            return self.book(pair, limit)
+        finally:
+            self.in_flight -= 1
+
+    def fetch_blocking(self, pair: str, limit: int) -> dict:
+        """Synchronous request, like ``dp.orderbook`` from populate_indicators."""
+        time.sleep(self.delay())
+        return self.book(pair, limit)
+
+
+def run_loops(read, pairs: list, loops: int, loop_secs: float) -> tuple:
+    """Reads all pairs once per loop. Returns (read seconds per loop, features of the last loop)."""
+    elapsed = []
+    features = {}
+    for _ in range(loops):
+        start = time.perf_counter()
+        features = {pair: read(pair) for pair in pairs}
+        elapsed.append(time.perf_counter() - start)
+        time.sleep(max(0.0, loop_secs - elapsed[-1]))
+    return np.array(elapsed), features
+
+
+def wait_until(condition, timeout: float) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return condition()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.08, help='Fake exchange request latency, seconds')
+    parser.add_argument('--jitter', type=float, default=0.04, help='Fake exchange random extra latency, seconds')
+    parser.add_argument('--ttl', type=float, default=2.0, help='Snapshot time to live, seconds')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--depth', type=int, default=20)
+    parser.add_argument('--loops', type=int, default=10)
+    parser.add_argument('--loop-secs', type=float, default=0.5, help='Bot loop period (process_throttle_secs)')
+    parser.add_argument('--replay', help='Fetch from a running replay exchange (base URL) instead of the fake')
+    args = parser.parse_args()
+
+    fake = FakeDepthExchange(args.latency, args.jitter)
+    if args.replay:
+        from replay_exchange import available_pairs, replay_config
+
+        host, port = args.replay.rsplit('//', 1)[-1].split(':')
+        pairs = available_pairs()[:args.pairs]
+        fetch = CcxtFetcher(replay_config(pairs, '1m', host, int(port)))
+    else:
+        pairs = [f'PAIR{index}/USDT:USDT' for index in range(args.pairs)]
+        fetch = fake
+    ok = True
+
+    blocking, _ = run_loops(lambda pair: fake.fetch_blocking(pair, args.depth), pairs, min(args.loops, 3), 0)
+    print(f'{len(pairs)} pairs, latency {args.latency * 1000:.0f}+{args.jitter * 1000:.0f} ms, '
+          f'ttl {args.ttl:g}s, concurrency {args.concurrency}')
+    print(f'blocking  : {blocking.mean() * 1000:9.1f} ms per loop (fake exchange)')
+
+    cache = OrderBookCache(fetch, ttl=args.ttl, depth=args.depth, concurrency=args.concurrency)
+    start = time.perf_counter()
+    cache.set_pairs(pairs)
+    warm = wait_until(lambda: cache.stats()['snapshots'] == len(pairs), 30 + args.ttl)
+    print(f'warm-up   : {time.perf_counter() - start:9.2f} s until every pair has a snapshot')
+    ok &= warm
+
+    elapsed, features = run_loops(lambda pair: cache.features(pair), pairs, args.loops, args.loop_secs)
+    ages = np.array([row['book_age'] for row in features.values()])
+    missing = sum(np.isnan(row['best_bid']) for row in features.values())
+    stats = cache.stats()
+    print(f'cache     : {elapsed.mean() * 1000:9.3f} ms per loop (max {elapsed.max() * 1000:.3f} ms), '
+          f'{elapsed.mean() / len(pairs) * 1e6:.1f} us per pair')
+    print(f'freshness : max age {np.nanmax(ages):.2f}s, {missing} stale/missing, '
+          f'{stats["refreshes"]} refreshes, {stats["errors"]} errors, '
+          f'mean request {stats["mean_latency"] * 1000:.1f} ms')
+    ok &= missing == 0 and np.nanmax(ages) <= args.ttl
+    if not args.replay:
+        print(f'requests  : {fake.requests}, at most {fake.max_in_flight} in flight')
+        ok &= fake.max_in_flight <= args.concurrency
+
+        fake.stalled = True
+        stale = wait_until(lambda: cache.stats()['stale'] == len(pairs), 3 * args.ttl)
+        nan = all(np.isnan(cache.features(pair)['best_bid']) for pair in pairs)
+        fake.stalled = False
+        recovered = wait_until(lambda: cache.stats()['stale'] == 0, 30 + args.ttl)
+        print(f'stall     : all stale {stale}, features NaN {nan}, recovered {recovered}')
+        ok &= stale and nan and recovered
+
+    cache.stop()
+    print('OK' if ok else 'FAILED')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Memory and startup time of hyperopt workers with and without shared analyzed dataframes.
+
+Analyzes ``--pairs`` synthetic pairs with KamaStrategy in hyperopt mode (every kama_window
+precomputed) like freqtrade's advise_all_indicators, and dumps them with joblib like
+prepare_hyperopt_data, once per mode:
+    pickled : use_shared_frames = False, the dump holds every column
+    shared  : use_shared_frames = True, the columns live in the shared frame store and the dump
+              only holds their layout
+
+``--workers`` spawned processes then run ``--epochs`` epochs each, loading the dump at the
+start of every epoch (as generate_optimizer does) and evaluating the signals of every pair.
+Reported per mode: dump size, load time of the first and the following epochs, and the
+workers' unique (USS) and proportional (PSS) memory after the last epoch. The signals of
+both modes must be identical.
+
+Usage:
+    python tests/bench_shared_frames.py [--pairs 8] [--candles 35000] [--workers 4] [--epochs 10]
+"""
+import argparse
+import multiprocessing
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import psutil
+from freqtrade.enums import HyperoptState
+from freqtrade.optimize.hyperopt_tools import HyperoptStateContainer
+
+from bench_hyperopt_cache import SIGNALS, apply_params, populate_signals, sample_epochs
+from synthetic_ohlcv import add_strategies_path, generate_pairs, load_strategy
+
+add_strategies_path()
+from shared_frames import frame_store  # noqa: E402
+
+MiB = 2 ** 20
+
+
+def hyperopt_strategy(shared: bool):
+    strategy = load_strategy('KamaStrategy', 'hyperopt', timeframe='15m')
+    strategy.use_shared_frames = shared
+    for parameter in (strategy.kama_window, strategy.adx_threshold,
+                      strategy.chop_threshold, strategy.bb_width_threshold):
+        parameter.in_space = True
+    return strategy
+
+
+def analyze(strategy, data) -> dict:
+    """populate_indicators of every pair, copied on both sides like advise_all_indicators."""
+    HyperoptStateContainer.set_state(HyperoptState.INDICATORS)
+    processed = {pair: strategy.populate_indicators(ohlcv.copy(), {'pair': pair}).copy()
+                 for pair, ohlcv in data.items()}
+    HyperoptStateContainer.set_state(HyperoptState.OPTIMIZE)
+    return processed
+
+
+def worker(path: str, shared: bool, epochs: list, queue) -> None:
+    """Runs the epochs against the dump at ``path``, reports timings, signals and memory."""
+    strategy = hyperopt_strategy(shared)
+    loads, signals = [], []
+    for params in epochs:
+        start = time.perf_counter()
+        with open(path, 'rb') as f:
+            processed = joblib.load(f)
+        loads.append(time.perf_counter() - start)
+        apply_params(strategy, params)
+        for pair, df in processed.items():
+            df = populate_signals(strategy, df, {'pair': pair})
+            signals.append(df[list(SIGNALS)].fillna(0).to_numpy(dtype='int8'))
+    memory = psutil.Process().memory_full_info()
+    queue.put({'loads': loads, 'uss': memory.uss, 'pss': memory.pss, 'signals': signals})
+
+
+def run_workers(path: Path, shared: bool, workers: int, epochs: list) -> list:
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    processes = [context.Process(target=worker, args=(str(path), shared, epochs, queue)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=8)
+    parser.add_argument('--candles', type=int, default=35_000, help='35k 15m candles ~ 1 year')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--epochs', type=int, default=10, help='Epochs per worker')
+    args = parser.parse_args()
+
+    data = generate_pairs(args.pairs, args.candles)
+    epochs = sample_epochs(hyperopt_strategy(False), args.epochs, seed=random.randrange(1000))
+    print(f'{args.pairs} pairs x {args.candles} candles, {args.workers} workers x {args.epochs} epochs')
+    print(f'{"mode":8} {"analyze+dump":>12} {"dump":>9} {"store":>9} {"1st load":>9} {"load/ep":>9} '
+          f'{"USS/worker":>11} {"PSS/worker":>11}')
+
+    processed, signals = {}, {}
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ('pickled', 'shared'):
+            shared = mode == 'shared'
+            path = Path(directory) / f'{mode}.pkl'
+            start = time.perf_counter()
+            processed[mode] = analyze(hyperopt_strategy(shared), data)
+            joblib.dump(processed[mode], path)
+            prepared = time.perf_counter() - start
+
+            results = run_workers(path, shared, args.workers, epochs)
+            first = np.mean([result['loads'][0] for result in results])
+            following = np.mean([load for result in results for load in result['loads'][1:]] or [np.nan])
+            store = frame_store.nbytes if shared else 0
+            print(f'{mode:8} {prepared:10.2f} s {path.stat().st_size / MiB:5.1f} MiB {store / MiB:5.1f} MiB '
+                  f'{first * 1000:6.1f} ms {following * 1000:6.1f} ms '
+                  f'{np.mean([result["uss"] for result in results]) / MiB:7.1f} MiB '
+                  f'{np.mean([result["pss"] for result in results]) / MiB:7.1f} MiB')
+            signals[mode] = results[0]['signals']
+
+    identical_frames = all(processed['pickled'][pair].equals(processed['shared'][pair]) for pair in data)
+    identical_signals = all(np.array_equal(a, b) for a, b in zip(signals['pickled'], signals['shared']))
+    print(f'identical frames: {identical_frames}, identical signals: {identical_signals}')
+    if not (identical_frames and identical_signals):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Time the entry/exit signal methods with the shared-subexpression signal engine.
+
+For KamaStrategy and SampleStrategy, every round evaluates all entry/exit signals on an
+analyzed dataframe, like one hyperopt epoch per pair, once with the former per-column
+``df.loc[cond1 & cond2 & ..., col] = 1`` expressions and once through ``signal_rules``.
+The signal columns of both variants are compared.
+
+Usage:
+    python tests/bench_signal_engine.py [--candles 100000] [--rounds 50]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+from technical import qtpylib
+
+from synthetic_ohlcv import generate_ohlcv, load_strategy
+
+SIGNALS = ('enter_long', 'enter_short', 'exit_long', 'exit_short')
+
+
+def previous_kama_signals(strategy, df):
+    for column, above in (('enter_long', True), ('enter_short', False), ('exit_long', False), ('exit_short', True)):
+        if above:
+            trend = (df['close'] > df['kama']) & (df['close'] > df['long_term_kama'])
+        else:
+            trend = (df['close'] < df['kama']) & (df['close'] < df['long_term_kama'])
+        df.loc[
+            trend &
+            (df['adx'] > strategy.adx_threshold.value) &
+            (df['chop'] < strategy.chop_threshold.value) &
+            (df['bb_width'] < float(strategy.bb_width_threshold.value)),
+            column
+        ] = 1
+    return df
+
+
+def previous_sample_signals(strategy, df):
+    for column, threshold, rising in (('enter_long', strategy.buy_rsi, True), ('enter_short', strategy.short_rsi, False),
+                                      ('exit_long', strategy.sell_rsi, False), ('exit_short', strategy.exit_short_rsi, True)):
+        if rising:
+            guard = (df['tema'] <= df['bb_middleband']) & (df['tema'] > df['tema'].shift(1))
+        else:
+            guard = (df['tema'] > df['bb_middleband']) & (df['tema'] < df['tema'].shift(1))
+        df.loc[qtpylib.crossed_above(df['rsi'], threshold.value) & guard & (df['volume'] > 0), column] = 1
+    return df
+
+
+def engine_signals(strategy, df):
+    df = strategy.populate_entry_trend(df, {})
+    if hasattr(strategy, 'populate_short_trend'):
+        df = strategy.populate_short_trend(df, {})
+    return strategy.populate_exit_trend(df, {})
+
+
+def time_rounds(func, strategy, analyzed, rounds):
+    df = analyzed.copy()
+    elapsed = 0.0
+    for _ in range(rounds):
+        # Fresh epoch: no signal columns and no memoized masks (hyperopt hands out a new copy)
+        for column in SIGNALS:
+            if column in df.columns:
+                del df[column]
+        strategy.signal_rules._memo = None
+        start = time.perf_counter()
+        df = func(strategy, df)
+        elapsed += time.perf_counter() - start
+    return elapsed / rounds, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--candles', type=int, default=100_000)
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    ok = True
+    print(f'{args.candles} candles, {args.rounds} rounds')
+    print(f'{"strategy":<16}{"previous ms":>12}{"engine ms":>12}{"speedup":>9}  identical')
+    for name, previous in (('KamaStrategy', previous_kama_signals), ('SampleStrategy', previous_sample_signals)):
+        strategy = load_strategy(name, 'backtest', timeframe='15m')
+        analyzed = strategy.populate_indicators(generate_ohlcv(args.candles), {'pair': 'BENCH/USDT:USDT'})
+        before, expected = time_rounds(previous, strategy, analyzed, args.rounds)
+        after, actual = time_rounds(engine_signals, strategy, analyzed, args.rounds)
+        identical = all(np.array_equal(expected[column].to_numpy(), actual[column].to_numpy(), equal_nan=True)
+                        for column in SIGNALS)
+        ok &= identical
+        print(f'{name:<16}{before * 1e3:12.2f}{after * 1e3:12.2f}{before / after:8.1f}x  {identical}')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
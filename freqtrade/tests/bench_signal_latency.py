@@ -0,0 +1,135 @@
+"""
+KamaStrategy's candle-close-to-signal latency tracking (signal_latency) in a simulated loop.
+
+Runs ``--loops`` dry-run loop iterations over ``--pairs`` synthetic 15m pairs: every other
+iteration a candle closes ``--fetch-delay`` seconds before bot_loop_start, then every pair
+is analyzed (populate_indicators, populate_entry_trend, populate_exit_trend) like freqtrade
+does. The iterations in between analyze the same candles again (process_only_new_candles =
+False), one iteration sleeps past process_throttle_secs. Checks:
+    - exactly one record per pair and new candle, the ring buffer holds the last ``capacity``
+    - the fetch latency is the simulated delay, the stages add up to the total
+    - the slow iteration (and only that one) is flagged
+    - the exported JSON file is valid and matches the summary
+and prints the tracking overhead per analyzed pair.
+
+Usage:
+    python tests/bench_signal_latency.py [--pairs 20] [--loops 20] [--fetch-delay 0.4]
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from synthetic_ohlcv import add_strategies_path, generate_pairs, load_strategy
+
+add_strategies_path()
+from signal_latency import STAGES, signal_latency  # noqa: E402
+
+TIMEFRAME = '15m'
+
+
+def live_strategy(track: bool, user_data_dir: str, throttle_secs: float):
+    from freqtrade.enums import RunMode
+
+    strategy = load_strategy('KamaStrategy', 'dry_run', timeframe=TIMEFRAME, config={
+        'user_data_dir': user_data_dir, 'internals': {'process_throttle_secs': throttle_secs}})
+    strategy.track_signal_latency = track
+    strategy.dp = SimpleNamespace(runmode=RunMode.DRY_RUN)
+    return strategy
+
+
+def run_loops(strategy, history: dict, loops: int, window: int, fetch_delay: float,
+              throttle_secs: float, slow_loop: int) -> float:
+    """Runs the simulated loop, returns the seconds spent analyzing per pair and loop."""
+    step = pd.Timedelta(TIMEFRAME)
+    analyzed = 0
+    elapsed = 0.0
+    for loop in range(loops):
+        if loop % 2 == 0:
+            candle = window + loop // 2
+            frames = {}
+            for pair, df in history.items():
+                df = df.iloc[candle - window:candle].copy()
+                # The last candle closes now, the loop starts fetch_delay seconds later
+                df['date'] += pd.Timestamp.now('UTC') - step - df['date'].iat[-1]
+                frames[pair] = df
+            time.sleep(fetch_delay)
+        strategy.bot_loop_start(current_time=None)
+        start = time.perf_counter()
+        for pair, df in frames.items():
+            metadata = {'pair': pair}
+            df = strategy.populate_indicators(df, metadata)
+            df = strategy.populate_entry_trend(df, metadata)
+            strategy.populate_exit_trend(df, metadata)
+        elapsed += time.perf_counter() - start
+        analyzed += len(frames)
+        # Throttle like freqtrade's worker, the next candle's fetch delay is part of it
+        pause = throttle_secs - (time.perf_counter() - start) - (fetch_delay if loop % 2 else 0)
+        time.sleep(max(pause, 0) + (throttle_secs if loop == slow_loop else 0))
+    return elapsed / analyzed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=20)
+    parser.add_argument('--loops', type=int, default=20, help='Loop iterations (a new candle every other one)')
+    parser.add_argument('--window', type=int, default=500, help='Candles per analyzed dataframe')
+    parser.add_argument('--fetch-delay', type=float, default=0.4, help='Seconds from candle close to loop start')
+    parser.add_argument('--capacity', type=int, default=100, help='Ring buffer size')
+    args = parser.parse_args()
+
+    history = generate_pairs(args.pairs, args.window + args.loops, timeframe=TIMEFRAME)
+    slow_loop = args.loops // 2
+    with tempfile.TemporaryDirectory() as directory:
+        # Untracked first: its analysis time (plus the fetch delay slept per new candle) sets
+        # process_throttle_secs, so only the slow iteration overruns
+        plain = run_loops(live_strategy(False, directory, 0), history, 4, args.window, 0, 0, -1)
+        throttle_secs = 3 * (plain * args.pairs + args.fetch_delay)
+        signal_latency.capacity = args.capacity
+        signal_latency.log_interval = 0
+        signal_latency.clear()
+        strategy = live_strategy(True, directory, throttle_secs)
+        # The bot's first iteration: candles that closed before it are not recorded
+        strategy.bot_loop_start(current_time=None)
+        tracked = run_loops(strategy, history, args.loops, args.window, args.fetch_delay, throttle_secs, slow_loop)
+        # bot_loop_start of the next iteration closes the last one
+        strategy.bot_loop_start(current_time=None)
+        signal_latency.export()
+        exported = json.loads(Path(directory, 'metrics', 'signal_latency.json').read_text())
+        summary = signal_latency.summary()
+
+    candles = args.pairs * ((args.loops + 1) // 2)
+    records = signal_latency.recent()
+    latencies = signal_latency.latencies()
+    stages_sum = sum(latencies[stage] for stage in STAGES if stage != 'total')
+    checks = {
+        'one record per pair and candle': signal_latency.records == candles,
+        'ring buffer holds the last candles': len(records) == min(candles, args.capacity)
+        and np.all(np.diff(records['close']) >= 0) and records['loop'][-1] == (args.loops - 1) // 2 * 2 + 2,
+        'histograms count every candle': all(value['count'] == candles for value in summary['stages'].values()),
+        'fetch latency is the delay': bool(np.all(np.abs(latencies['fetch'] - args.fetch_delay) < 0.1)),
+        'stages add up to the total': bool(np.allclose(stages_sum, latencies['total'])),
+        'slow iteration flagged': signal_latency.overruns == 1
+        and signal_latency.recent_overruns[0]['pairs'] == (args.pairs if slow_loop % 2 == 0 else 0),
+        'exported file matches': exported['candles'] == candles and exported['stages'] == summary['stages']
+        and len(exported['pairs']) == args.pairs,
+    }
+    print(f'{args.pairs} pairs, {args.loops} loop iterations, {candles} candles recorded, '
+          f'{signal_latency.overruns} of {args.loops} iterations overran')
+    print(f'{"stage":<12}{"p50 ms":>9}{"p99 ms":>9}')
+    for stage, values in summary['stages'].items():
+        print(f'{stage:<12}{values["p50"] * 1000:>9.2f}{values["p99"] * 1000:>9.2f}')
+    print(f'analysis per pair: {plain * 1000:.2f} ms untracked, {tracked * 1000:.2f} ms tracked')
+    for name, ok in checks.items():
+        print(f'{name}: {ok}')
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == '__main__':
+    main()
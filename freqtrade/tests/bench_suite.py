@@ -0,0 +1,167 @@
+"""
+Offline benchmark suite for the populate_* hot path of every strategy.
+
+Times populate_indicators, populate_entry_trend and populate_exit_trend of KamaStrategy,
+SampleStrategy and ScalpingStrategy on deterministic synthetic OHLCV (see synthetic_ohlcv)
+for several candle counts and pairs, and records the peak memory allocated by each step
+(tracemalloc, in a separate untimed run). No network, exchange or downloaded data needed.
+
+Results are written as JSON (default ``user_data/metrics/bench_results.json``, not tracked)
+and compared against a stored baseline. A step regresses when
+it is slower than the baseline by more than ``--time-tolerance`` (and ``--min-seconds``), or
+allocates more than ``--memory-tolerance`` above it. Any regression exits with code 1.
+Baselines are machine specific, record one with ``--update-baseline`` on an otherwise idle
+machine before comparing.
+
+Usage:
+    python tests/bench_suite.py [--sizes 10000 100000 1000000] [--pairs 2] [--repeat 3]
+                                [--strategies KamaStrategy ...] [--output results.json]
+                                [--baseline tests/bench_baseline.json] [--update-baseline]
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from synthetic_ohlcv import add_strategies_path, generate_pairs, load_strategy
+
+add_strategies_path()
+from indicator_engine import engine  # noqa: E402
+
+STRATEGIES = ('KamaStrategy', 'SampleStrategy', 'ScalpingStrategy')
+STEPS = ('populate_indicators', 'populate_entry_trend', 'populate_exit_trend')
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'bench_baseline.json'
+DEFAULT_OUTPUT = Path(__file__).resolve().parents[1] / 'user_data' / 'metrics' / 'bench_results.json'
+
+
+def run_steps(strategy, data, trace=False):
+    """
+    Runs all STEPS for every pair, like freqtrade's analyze per pair.
+
+    Returns:
+        dict: ``{step: seconds summed over pairs}``, or ``{step: peak MiB}`` when tracing.
+    """
+    # Fresh caches, every run measures the full computation
+    engine.clear()
+    measured = dict.fromkeys(STEPS, 0.0)
+    for pair, ohlcv in data.items():
+        df = ohlcv.copy()
+        metadata = {'pair': pair}
+        for step in STEPS:
+            if trace:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            df = getattr(strategy, step)(df, metadata)
+            elapsed = time.perf_counter() - start
+            if trace:
+                peak = (tracemalloc.get_traced_memory()[1] - before) / 2 ** 20
+                measured[step] = max(measured[step], peak)
+            else:
+                measured[step] += elapsed
+    return measured
+
+
+def benchmark(strategies, sizes, pairs, repeat):
+    results = {}
+    for name in strategies:
+        strategy = load_strategy(name, 'backtest', timeframe='15m' if name == 'KamaStrategy' else None)
+        # Warm up (numba compilation, lazy imports)
+        run_steps(strategy, generate_pairs(1, 500, timeframe=strategy.timeframe))
+        for candles in sizes:
+            data = generate_pairs(pairs, candles, timeframe=strategy.timeframe)
+            timings = [run_steps(strategy, data) for _ in range(repeat)]
+            tracemalloc.start()
+            memory = run_steps(strategy, data, trace=True)
+            tracemalloc.stop()
+            for step in STEPS:
+                seconds = min(timing[step] for timing in timings)
+                results[f'{name}/{candles}/{step}'] = {
+                    'seconds': round(seconds, 6),
+                    'peak_mib': round(memory[step], 3),
+                }
+                print(f'{name:<18}{candles:>9} {step:<22}{seconds * 1000:>10.2f} ms{memory[step]:>10.1f} MiB')
+            engine.clear()
+    return results
+
+
+def compare(results, baseline, time_tolerance, memory_tolerance, min_seconds):
+    """Returns a description of every step that regressed against the baseline."""
+    regressions = []
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        slower = current['seconds'] - reference['seconds']
+        if slower > min_seconds and current['seconds'] > reference['seconds'] * (1 + time_tolerance):
+            regressions.append(f"{key}: {current['seconds'] * 1000:.2f} ms vs baseline "
+                               f"{reference['seconds'] * 1000:.2f} ms")
+        larger = current['peak_mib'] - reference['peak_mib']
+        if larger > 1.0 and current['peak_mib'] > reference['peak_mib'] * (1 + memory_tolerance):
+            regressions.append(f"{key}: {current['peak_mib']:.1f} MiB vs baseline "
+                               f"{reference['peak_mib']:.1f} MiB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--pairs', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--strategies', nargs='+', default=list(STRATEGIES), choices=STRATEGIES)
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Store the results as the new baseline instead of comparing')
+    parser.add_argument('--time-tolerance', type=float, default=0.25)
+    parser.add_argument('--memory-tolerance', type=float, default=0.10)
+    parser.add_argument('--min-seconds', type=float, default=0.002,
+                        help='Ignore slowdowns smaller than this (timer noise on small inputs)')
+    args = parser.parse_args()
+
+    results = benchmark(args.strategies, args.sizes, args.pairs, args.repeat)
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'pairs': args.pairs,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f'Results written to {args.output}')
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f'Baseline updated: {args.baseline}')
+        return
+    if not args.baseline.exists():
+        print(f'No baseline at {args.baseline}, run with --update-baseline to record one')
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(results, baseline['results'], args.time_tolerance,
+                          args.memory_tolerance, args.min_seconds)
+    compared = len(results.keys() & baseline['results'].keys())
+    if regressions:
+        print(f'FAILED: {len(regressions)} regression(s) against {args.baseline}:')
+        for regression in regressions:
+            print(f'  {regression}')
+        sys.exit(1)
+    print(f'OK: {compared} steps within tolerance of {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Micro-benchmark of the fused true range kernel against the ta-based indicators it replaces.
+
+The reference is what KamaStrategy computed before: ``ADXIndicator(14).adx()``,
+``AverageTrueRange(14)`` and a Choppiness Index built from ``AverageTrueRange(window=1)``
+with rolling max/min/sum. Timings are reported per 100k candles.
+
+Usage:
+    python tests/bench_true_range.py [--candles 100000] [--repeat 3]
+
+Fails (exit code 1) if any column differs from the reference.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import ta
+
+from synthetic_ohlcv import add_strategies_path, generate_ohlcv
+
+add_strategies_path()
+from fast_indicators import true_range_indicators  # noqa: E402
+
+
+def reference_indicators(df):
+    high, low, close = df['high'], df['low'], df['close']
+    adx = ta.trend.ADXIndicator(high, low, close, window=14)
+    tr = ta.volatility.AverageTrueRange(high, low, close, window=1).average_true_range()
+    chop = 100 * np.log10(
+        tr.rolling(14).sum() / (high.rolling(14).max() - low.rolling(14).min())) / np.log10(14)
+    return {
+        'atr': ta.volatility.AverageTrueRange(high, low, close, window=14).average_true_range(),
+        'adx': adx.adx(),
+        'plus_di': adx.adx_pos(),
+        'minus_di': adx.adx_neg(),
+        'chop': chop,
+    }
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--candles', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = generate_ohlcv(args.candles)
+    high, low, close = (df[c].to_numpy() for c in ('high', 'low', 'close'))
+    true_range_indicators(high[:100], low[:100], close[:100])  # compile
+
+    ta_time, expected = best_of(lambda: reference_indicators(df), args.repeat)
+    fused_time, actual = best_of(lambda: true_range_indicators(high, low, close), args.repeat)
+
+    scale = 100_000 / args.candles
+    print(f'ta (ADX + ATR + chop): {ta_time * scale * 1000:9.2f} ms per 100k candles')
+    print(f'fused kernel         : {fused_time * scale * 1000:9.2f} ms per 100k candles '
+          f'({ta_time / fused_time:.0f}x faster)')
+
+    mismatches = [name for name, values in expected.items()
+                  if not np.array_equal(values.to_numpy(), actual[name], equal_nan=True)]
+    print('identical columns:', 'yes' if not mismatches else f'no ({", ".join(mismatches)})')
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Unpickles the strategies and hyperopt losses in a fresh process, like freqtrade's parallel
+hyperopt workers.
+
+Freqtrade puts ``user_data/strategies`` (``user_data/hyperopts``) on sys.path only while it
+loads the strategy (loss) class. Hyperopt pickles both with cloudpickle into loky worker
+processes, where the helper modules they import (fast_indicators, indicator_engine,
+hyperopt_metrics, ...) must be importable through PYTHONPATH. The Docker image sets it
+(``ENV PYTHONPATH`` in Dockerfile.custom).
+
+Every strategy and loss is loaded with freqtrade's resolvers and pickled like joblib does,
+as is a frame published in the shared frame store (use_shared_frames). Then a fresh
+interpreter unpickles it (and runs a strategy's populate_indicators/entry/exit on synthetic
+candles, writes to the shared frame), once with the image's PYTHONPATH (mapped onto this
+user_data directory, must work) and once without it (shows that the check reaches the
+helper imports). The benchmarks cannot catch this, they add the strategies directory to
+sys.path themselves.
+
+Usage:
+    python tests/check_worker_imports.py [--strategies KamaStrategy SampleStrategy ...]
+                                         [--losses CompositeMetricsHyperOptLoss ...]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import cloudpickle
+
+from synthetic_ohlcv import add_strategies_path, generate_ohlcv
+
+add_strategies_path()
+from shared_frames import frame_store  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+DOCKERFILE = ROOT / 'Dockerfile.custom'
+CONTAINER_USER_DATA = '/freqtrade/user_data'
+
+# Runs in the fresh interpreter: the pickled object and candles come from stdin. A shared
+# frame is written to, which must not change the published frame.
+WORKER = """
+import pickle, sys
+payload = sys.stdin.buffer.read()
+obj, df = pickle.loads(payload)
+if hasattr(obj, 'populate_indicators'):
+    metadata = {'pair': 'BTC/USDT:USDT'}
+    df = obj.populate_entry_trend(obj.populate_indicators(df, metadata), metadata)
+    obj.populate_exit_trend(df, metadata)
+elif hasattr(obj, 'shared'):
+    close = obj['close'].iat[0]
+    try:
+        obj.loc[obj.index[0], 'close'] = -1.0
+    except ValueError:
+        pass
+    assert pickle.loads(payload)[0]['close'].iat[0] == close, 'write reached the published frame'
+"""
+
+
+def image_pythonpath(user_data_dir: Path) -> str:
+    """PYTHONPATH of Dockerfile.custom, with the container's user_data mapped onto ``user_data_dir``."""
+    match = re.search(r'^ENV PYTHONPATH=(\S+)', DOCKERFILE.read_text(), re.MULTILINE)
+    if match is None:
+        return ''
+    return os.pathsep.join(path.replace(CONTAINER_USER_DATA, str(user_data_dir))
+                           for path in match[1].split(':'))
+
+
+def hyperopt_config(strategy: str, user_data_dir: Path, loss: str = None) -> dict:
+    from freqtrade.enums import RunMode
+
+    return {
+        'strategy': strategy,
+        'hyperopt_loss': loss,
+        'user_data_dir': user_data_dir,
+        'runmode': RunMode.HYPEROPT,
+        'timeframe': '15m',
+        'stake_currency': 'USDT',
+        'stake_amount': 100,
+        'max_open_trades': 3,
+        'dry_run': True,
+        'trading_mode': 'futures',
+        'margin_mode': 'isolated',
+        'exchange': {'name': 'binance'},
+        'pairlists': [],
+    }
+
+
+def pickled_objects(strategies: list, losses: list, user_data_dir: Path) -> dict:
+    """``{name: cloudpickle bytes}`` of everything hyperopt ships to its workers."""
+    from freqtrade.data.dataprovider import DataProvider
+    from freqtrade.resolvers import StrategyResolver
+    from freqtrade.resolvers.hyperopt_resolver import HyperOptLossResolver
+
+    candles = generate_ohlcv(1000)
+    # Published first: the strategies below reference the store, whose file is open now
+    payloads = {'SharedFrame': cloudpickle.dumps((frame_store.publish(candles, 'BTC/USDT:USDT'), None))}
+    for name in strategies:
+        config = hyperopt_config(name, user_data_dir)
+        strategy = StrategyResolver.load_strategy(config)
+        strategy.dp = DataProvider(config, None)
+        payloads[name] = cloudpickle.dumps((strategy, candles))
+    for name in losses:
+        loss = HyperOptLossResolver.load_hyperoptloss(hyperopt_config(strategies[0], user_data_dir, name))
+        payloads[name] = cloudpickle.dumps((loss, None))
+    return payloads
+
+
+def unpickle(payload: bytes, pythonpath: str) -> tuple:
+    """(ok, last error line) of the worker code in a fresh interpreter."""
+    env = {key: value for key, value in os.environ.items() if key != 'PYTHONPATH'}
+    if pythonpath:
+        env['PYTHONPATH'] = pythonpath
+    result = subprocess.run([sys.executable, '-c', WORKER], input=payload, capture_output=True, env=env,
+                            cwd=Path.home())
+    errors = result.stderr.decode().strip().splitlines()
+    return result.returncode == 0, errors[-1] if errors else ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--strategies', nargs='+', default=['KamaStrategy', 'SampleStrategy', 'ScalpingStrategy'])
+    parser.add_argument('--losses', nargs='+', default=['CompositeMetricsHyperOptLoss', 'FastMultiMetricHyperOptLoss'])
+    parser.add_argument('--userdir', type=Path, default=ROOT / 'user_data')
+    args = parser.parse_args()
+
+    user_data_dir = args.userdir.resolve()
+    pythonpath = image_pythonpath(user_data_dir)
+    print(f'PYTHONPATH of {DOCKERFILE.name}: {pythonpath or "(not set)"}')
+    ok = True
+    for name, payload in pickled_objects(args.strategies, args.losses, user_data_dir).items():
+        with_path, error = unpickle(payload, pythonpath)
+        without_path, reason = unpickle(payload, '')
+        ok &= with_path
+        print(f'{name:<32} with PYTHONPATH: {"ok" if with_path else error}'
+              f' | without: {"ok" if without_path else reason}')
+    print('importable in the workers:', ok)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -15,7 +15,10 @@
 
 # GOOD 15m
 # docker compose run --rm freqtrade download-data --exchange binance -t 15m --timerange 20240606-
-docker compose run --rm freqtrade backtesting --strategy KamaStrategy -i 15m --datadir user_data/data/binance --export signals --stake-amount 1000 --timerange 20240606- --cache none
+# Results are cached by strategy source, parameters, config, timerange and data content (tests/backtest_cache.py),
+# reruns without changes return instantly. Uncached: add --no-cache
+docker compose run --rm --entrypoint python freqtrade /ws/freqtrade/tests/backtest_matrix.py --userdir user_data --strategies KamaStrategy --timeframes 15m --datadir user_data/data/binance --export signals --stake-amount 1000 --timeranges 20240606-
+# docker compose run --rm freqtrade backtesting --strategy KamaStrategy -i 15m --datadir user_data/data/binance --export signals --stake-amount 1000 --timerange 20240606- --cache none
 
 # Not good 5m
 # docker compose run --rm freqtrade download-data --exchange binance -t 5m --timerange 20240606-
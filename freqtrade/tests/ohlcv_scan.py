@@ -0,0 +1,339 @@
+"""
+Integrity scan of the stored candle files of a data directory.
+
+Backtests and hyperopt trust whatever ``download-data`` stored. Gaps, duplicate or
+unordered timestamps and broken candles (high below the close, NaN prices, runs of zero
+volume) silently distort indicators like KAMA and Choppiness. This scans every OHLCV file
+of ``--datadir`` (and its ``futures`` directory) without loading it into pandas:
+
+- feather files are memory-mapped (``pyarrow.memory_map``, only the date and price columns
+  are touched), parquet files are read batch by batch from a memory map, JSON files
+  (text) are parsed whole,
+- the checks run on NumPy arrays in chunks of ``--chunk-rows`` rows, carrying the last
+  timestamp and the open zero-volume run from one chunk to the next,
+- the files are spread over a process pool.
+
+Checked per file:
+    errors  : unordered and duplicate timestamps, NaN/infinite or non-positive prices,
+              high/low not enclosing open and close, negative volume, empty file
+    warnings: gaps (missing candles against the timeframe), timestamps not aligned to the
+              timeframe, zero-volume runs longer than ``--max-zero-volume-run`` candles
+
+Funding rate files only get the timestamp checks, mark/index candles no volume checks.
+
+The per-file counts are stored in ``<datadir>/.ohlcv_scan.json`` keyed by the file's size
+and mtime: a rerun only scans new or changed files, so the scan can run before every
+backtest. Exits with 1 when a file has errors and ``--strict`` is given.
+
+Usage (inside the freqtrade container, the repository is mounted at /ws):
+    python /ws/freqtrade/tests/ohlcv_scan.py --datadir user_data/data/binance [--all] [--strict]
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from freqtrade.data.history.datahandlers.idatahandler import IDataHandler
+from freqtrade.exchange import timeframe_to_msecs
+from freqtrade.util import print_rich_table
+
+logger = logging.getLogger('ohlcv_scan')
+
+REPORT_NAME = '.ohlcv_scan.json'
+# Bumped when the checks change, invalidates every stored report entry
+SCAN_VERSION = 1
+EXTENSIONS = ('.feather', '.parquet', '.json', '.json.gz')
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+# freqtrade's json format: [[date ms, open, high, low, close, volume], ...]
+JSON_COLUMNS = ('date', 'open', 'high', 'low', 'close', 'volume')
+# Candle types without prices (funding rate) or without a traded volume
+NO_PRICES = frozenset({'funding_rate'})
+NO_VOLUME = frozenset({'funding_rate', 'mark', 'index', 'premiumIndex'})
+DAY_MS = 86_400_000
+ERROR_COUNTS = ('unordered', 'duplicates', 'invalid_prices', 'invalid_ohlc', 'negative_volume')
+# (column, header, format) of the issue table
+COLUMNS = (
+    ('file', 'File', '{}'),
+    ('status', 'Status', '{}'),
+    ('rows', 'Rows', '{}'),
+    ('start', 'From', '{}'),
+    ('end', 'To', '{}'),
+    ('gaps', 'Gaps', '{}'),
+    ('missing', 'Missing', '{}'),
+    ('max_gap', 'Max gap', '{}'),
+    ('duplicates', 'Dups', '{}'),
+    ('unordered', 'Unordered', '{}'),
+    ('misaligned', 'Misaligned', '{}'),
+    ('invalid_prices', 'Bad prices', '{}'),
+    ('invalid_ohlc', 'Bad OHLC', '{}'),
+    ('zero_volume', 'Zero vol', '{}'),
+    ('zero_volume_run', 'Zero vol run', '{}'),
+)
+
+
+def ohlcv_files(datadir: Path) -> list:
+    """OHLCV files of the data directory and its futures directory (no trades files), sorted."""
+    files = []
+    for directory in (datadir, datadir / 'futures'):
+        if directory.is_dir():
+            files += [path for path in directory.iterdir() if path.is_file() and path.name.endswith(EXTENSIONS)
+                      and IDataHandler._OHLCV_REGEX.search(path.name)]
+    return sorted(files)
+
+
+def file_signature(path: Path) -> list:
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class CandleChecks:
+    """
+    Counters of one file, updated chunk by chunk.
+
+    Args:
+        timeframe_ms (int): Candle length, None for variable lengths (1M).
+        prices (bool): Check OHLC prices.
+        volume (bool): Check the volume.
+    """
+
+    def __init__(self, timeframe_ms, prices: bool = True, volume: bool = True):
+        self.timeframe_ms = timeframe_ms
+        self.prices = prices
+        self.volume = volume
+        self.rows = 0
+        self.start = self.end = None
+        self.last = None
+        self.counts = dict.fromkeys(('gaps', 'missing', 'max_gap', 'duplicates', 'unordered', 'misaligned',
+                                     'invalid_prices', 'invalid_ohlc', 'negative_volume', 'zero_volume',
+                                     'zero_volume_run'), 0)
+        self._zero_run = 0
+
+    def update(self, dates: np.ndarray, columns: dict) -> None:
+        """
+        Checks one chunk.
+
+        Args:
+            dates (np.ndarray): Candle open times in ms (int64), in file order.
+            columns (dict): ``{'open': ..., 'volume': ...}`` float arrays of the chunk.
+        """
+        if not len(dates):
+            return
+        counts = self.counts
+        self.start = dates[0] if self.start is None else self.start
+        self.end = dates[-1]
+        self.rows += len(dates)
+        steps = np.diff(dates) if self.last is None else np.diff(dates, prepend=self.last)
+        self.last = dates[-1]
+        counts['unordered'] += int(np.count_nonzero(steps < 0))
+        counts['duplicates'] += int(np.count_nonzero(steps == 0))
+        if self.timeframe_ms:
+            gaps = steps[steps > self.timeframe_ms]
+            counts['gaps'] += len(gaps)
+            counts['missing'] += int((gaps // self.timeframe_ms - 1).sum())
+            counts['max_gap'] = max(counts['max_gap'], int(gaps.max(initial=0) // self.timeframe_ms))
+            if self.timeframe_ms <= DAY_MS:
+                counts['misaligned'] += int(np.count_nonzero(dates % self.timeframe_ms))
+
+        if self.prices:
+            open_, high, low, close = (columns[column] for column in PRICE_COLUMNS)
+            with np.errstate(invalid='ignore'):
+                invalid = ~(np.isfinite(open_) & np.isfinite(high) & np.isfinite(low) & np.isfinite(close))
+                invalid |= (open_ <= 0) | (high <= 0) | (low <= 0) | (close <= 0)
+                ohlc = (high < np.maximum(np.maximum(open_, close), low)) | (low > np.minimum(open_, close))
+            counts['invalid_prices'] += int(np.count_nonzero(invalid))
+            counts['invalid_ohlc'] += int(np.count_nonzero(ohlc & ~invalid))
+        if self.volume:
+            volume = columns['volume']
+            counts['negative_volume'] += int(np.count_nonzero(volume < 0))
+            zero = volume == 0
+            counts['zero_volume'] += int(np.count_nonzero(zero))
+            self._zero_runs(zero)
+
+    def _zero_runs(self, zero: np.ndarray) -> None:
+        """Longest run of zero-volume candles, continued across chunks."""
+        traded = np.flatnonzero(~zero)
+        if not len(traded):
+            self._zero_run += len(zero)
+            longest = self._zero_run
+        else:
+            inner = np.diff(traded) - 1
+            longest = max(self._zero_run + traded[0], int(inner.max(initial=0)))
+            self._zero_run = len(zero) - traded[-1] - 1
+            longest = max(longest, self._zero_run)
+        self.counts['zero_volume_run'] = max(self.counts['zero_volume_run'], int(longest))
+
+    def report(self) -> dict:
+        return {
+            'rows': self.rows,
+            'start': None if self.start is None else int(self.start),
+            'end': None if self.end is None else int(self.end),
+            **self.counts,
+        }
+
+
+def _arrow_chunks(batches, chunk_rows: int, columns: tuple):
+    """``(dates in ms, {column: float array})`` chunks of Arrow record batches."""
+    for batch in batches:
+        dates = batch.column('date')
+        if pa.types.is_timestamp(dates.type):
+            # UTC datetime64 in the stored unit (zero-copy), as ms
+            dates = dates.to_numpy().astype('datetime64[ms]').view(np.int64)
+        else:
+            dates = dates.to_numpy()
+        values = {column: batch.column(column).to_numpy(zero_copy_only=False) for column in columns}
+        for start in range(0, len(dates), chunk_rows):
+            yield dates[start:start + chunk_rows], {column: array[start:start + chunk_rows]
+                                                    for column, array in values.items()}
+
+
+def read_chunks(path: Path, chunk_rows: int, columns: tuple):
+    """Chunks of a stored candle file, memory-mapped where the format allows."""
+    name = path.name
+    if name.endswith('.feather'):
+        with pa.memory_map(str(path)) as source:
+            reader = ipc.open_file(source)
+            batches = (reader.get_batch(index).select(['date', *columns])
+                       for index in range(reader.num_record_batches))
+            yield from _arrow_chunks(batches, chunk_rows, columns)
+    elif name.endswith('.parquet'):
+        parquet = pq.ParquetFile(str(path), memory_map=True)
+        yield from _arrow_chunks(parquet.iter_batches(batch_size=chunk_rows, columns=['date', *columns]),
+                                 chunk_rows, columns)
+    else:
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(path, 'rb') as file:
+            candles = np.asarray(json.load(file), dtype=np.float64).reshape(-1, len(JSON_COLUMNS))
+        dates = candles[:, 0].astype(np.int64)
+        for start in range(0, len(dates), chunk_rows):
+            chunk = candles[start:start + chunk_rows]
+            yield dates[start:start + chunk_rows], {column: chunk[:, JSON_COLUMNS.index(column)]
+                                                    for column in columns}
+
+
+def scan_file(path: Path, chunk_rows: int = 1 << 16) -> dict:
+    """Counters of one file (see CandleChecks), or the error reading it."""
+    match = IDataHandler._OHLCV_REGEX.search(path.name)
+    timeframe, candle_type = match[2], match[3] or 'spot'
+    prices, volume = candle_type not in NO_PRICES, candle_type not in NO_VOLUME
+    columns = (PRICE_COLUMNS if prices else ()) + (('volume',) if volume else ())
+    checks = CandleChecks(None if timeframe.endswith('M') else timeframe_to_msecs(timeframe), prices, volume)
+    try:
+        for dates, values in read_chunks(path, chunk_rows, columns):
+            checks.update(dates, values)
+    except Exception as error:
+        return {'timeframe': timeframe, 'candle_type': candle_type, 'read_error': f'{type(error).__name__}: {error}'}
+    return {'timeframe': timeframe, 'candle_type': candle_type, **checks.report()}
+
+
+def file_status(entry: dict, max_zero_volume_run: int) -> str:
+    if entry.get('read_error') or not entry['rows'] or any(entry[count] for count in ERROR_COUNTS):
+        return 'error'
+    if entry['gaps'] or entry['misaligned'] or entry['zero_volume_run'] > max_zero_volume_run:
+        return 'warning'
+    return 'ok'
+
+
+def load_report(path: Path) -> dict:
+    try:
+        report = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return report.get('files', {}) if report.get('version') == SCAN_VERSION else {}
+
+
+def write_report(path: Path, files: dict) -> None:
+    # Atomic, like the backtest cache: a concurrent scan never reads a partial report
+    temporary = path.with_suffix(f'.{os.getpid()}.tmp')
+    temporary.write_text(json.dumps({'version': SCAN_VERSION, 'files': files}, separators=(',', ':')))
+    os.replace(temporary, path)
+
+
+def scan(datadir: Path, jobs: int = None, chunk_rows: int = 1 << 16, use_cache: bool = True) -> tuple:
+    """
+    Scans every changed file of ``datadir`` and updates the stored report.
+
+    Returns:
+        tuple: ``({relative path: entry}, files scanned, files read from the report)``.
+    """
+    report_path = datadir / REPORT_NAME
+    stored = load_report(report_path) if use_cache else {}
+    files, pending = {}, []
+    for path in ohlcv_files(datadir):
+        name = str(path.relative_to(datadir))
+        signature = file_signature(path)
+        entry = stored.get(name)
+        if entry is not None and entry['signature'] == signature:
+            files[name] = entry
+        else:
+            pending.append((name, path, signature))
+    cached = len(files)
+    workers = max(1, min(jobs or os.cpu_count(), len(pending)))
+    paths = [path for _, path, _ in pending]
+    if workers == 1:
+        entries = [scan_file(path, chunk_rows) for path in paths]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            entries = list(executor.map(scan_file, paths, [chunk_rows] * len(paths),
+                                        chunksize=max(1, len(paths) // (workers * 4))))
+    for (name, _, signature), entry in zip(pending, entries):
+        files[name] = {'signature': signature, **entry}
+    if pending or len(files) != len(stored):
+        write_report(report_path, files)
+    return files, len(pending), cached
+
+
+def format_row(name: str, entry: dict, status: str) -> dict:
+    row = {'file': name, 'status': f'{status}: {entry["read_error"]}' if entry.get('read_error') else status,
+           **{column: value for column, value in entry.items() if column != 'read_error'}}
+    for column in ('start', 'end'):
+        if row.get(column) is not None:
+            row[column] = f'{datetime.fromtimestamp(row[column] / 1000, tz=timezone.utc):%Y-%m-%d %H:%M}'
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--datadir', type=Path, default=Path('user_data/data/binance'))
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='Worker processes')
+    parser.add_argument('--chunk-rows', type=int, default=1 << 16, help='Rows per checked chunk')
+    parser.add_argument('--max-zero-volume-run', type=int, default=3,
+                        help='Longer runs of zero-volume candles are reported (default: %(default)s)')
+    parser.add_argument('--all', action='store_true', help='List every file, not only the ones with issues')
+    parser.add_argument('--no-cache', action='store_true', help='Scan every file, ignore the stored report')
+    parser.add_argument('--strict', action='store_true', help='Exit with 1 when a file has errors')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s: %(message)s')
+
+    start = time.perf_counter()
+    files, scanned, cached = scan(args.datadir, args.jobs, args.chunk_rows, use_cache=not args.no_cache)
+    rows = []
+    for name, entry in files.items():
+        status = file_status(entry, args.max_zero_volume_run)
+        if args.all or status != 'ok':
+            rows.append(format_row(name, entry, status))
+    if rows:
+        tabular = [[fmt.format(row[column]) if row.get(column) is not None else '' for column, _, fmt in COLUMNS]
+                   for row in rows]
+        print_rich_table(tabular, [header for _, header, _ in COLUMNS], summary='OHLCV INTEGRITY')
+    statuses = [file_status(entry, args.max_zero_volume_run) for entry in files.values()]
+    errors, warnings = statuses.count('error'), statuses.count('warning')
+    print(f'{len(files)} files ({scanned} scanned, {cached} unchanged), '
+          f'{sum(entry.get("rows", 0) for entry in files.values())} candles in {time.perf_counter() - start:.2f}s: '
+          f'{errors} with errors, {warnings} with warnings. Report: {args.datadir / REPORT_NAME}')
+    if args.strict and errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+"""
+Pre-screen signal parameter sets with the vectorized simulator, backtest only the best.
+
+Samples ``--candidates`` combinations of the strategy's hyperoptable signal parameters
+(kama_window, adx_threshold, chop_threshold and bb_width_threshold for KamaStrategy; the
+strategy's current values are always the first candidate) and ranks them all with
+vector_backtest:
+
+1. the candles are loaded and analyzed once, in hyperopt mode (KAMA of each sampled
+   kama_window is computed once, see KamaStrategy.signal_masks),
+2. the price exits (minimal_roi, stoploss, trailing stop, custom_exit ATR bands) of a trade
+   opened at every candle are computed once per pair and side,
+3. the candidates are simulated in batches of ``--batch`` parameter sets.
+
+The ``--top`` candidates plus ``--sample`` random other ones then run through freqtrade's
+backtest (in parallel, like the backtest matrix; the forked workers reuse the candles and
+Backtesting loaded for the pre-screen) and the fidelity report compares both per
+candidate: trades, profit, win rate, entries found by both and, of those, exits on the same
+candle with the same reason; plus the rank correlation of the profits over all backtested
+candidates. Every candidate's simulated metrics are written to
+``user_data/backtest_results/prescreen-*.csv``, the report to ``prescreen-*.json``.
+
+Usage (inside the freqtrade container, the repository is mounted at /ws):
+    python /ws/freqtrade/tests/prescreen.py --userdir user_data --config KamaStrategy.json \\
+        --timerange 20240606- --candidates 5000 --top 10
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from freqtrade.commands.optimize_commands import setup_optimize_configuration
+from freqtrade.data.converter import trim_dataframes
+from freqtrade.enums import HyperoptState, RunMode
+from freqtrade.optimize.backtesting import Backtesting
+from freqtrade.optimize.hyperopt_tools import HyperoptStateContainer
+from freqtrade.util import print_rich_table
+
+from synthetic_ohlcv import add_strategies_path
+from vector_backtest import EXIT_REASONS, SIGNALS, ExitSettings, candle_arrays, price_exits, simulate
+
+add_strategies_path()
+from signal_engine import parameter_values  # noqa: E402
+
+logger = logging.getLogger('prescreen')
+
+# (column, header, format) of the ranking and fidelity tables
+RANKING_COLUMNS = (
+    ('rank', '#', '{}'),
+    ('params', 'Parameters', '{}'),
+    ('trades', 'Trades', '{:.0f}'),
+    ('profit_sum', 'Profit sum %', '{:.2%}'),
+    ('winrate', 'Win%', '{:.1%}'),
+    ('profit_factor', 'PF', '{:.2f}'),
+)
+FIDELITY_COLUMNS = (
+    ('rank', '#', '{}'),
+    ('trades', 'Trades', '{:.0f}'),
+    ('bt_trades', 'BT Trades', '{:.0f}'),
+    ('profit_sum', 'Profit sum %', '{:.2%}'),
+    ('bt_profit_sum', 'BT Profit sum %', '{:.2%}'),
+    ('winrate', 'Win%', '{:.1%}'),
+    ('bt_winrate', 'BT Win%', '{:.1%}'),
+    ('entries_matched', 'Entries matched', '{:.1%}'),
+    ('exits_matched', 'Exits matched', '{:.1%}'),
+)
+TRADE_KEY = ['pair', 'open_date', 'is_short']
+
+# Loaded once in the parent, inherited by the forked backtest workers:
+# {'backtesting': Backtesting, 'data': {pair: DataFrame}, 'timerange': TimeRange}
+_SHARED = {}
+
+
+def apply_params(strategy, params: dict) -> None:
+    for name, value in params.items():
+        getattr(strategy, name).value = value
+
+
+def signal_parameters(strategy) -> dict:
+    """The strategy's Int/DecimalParameters: ``{name: parameter}``."""
+    return {name: parameter for name, parameter in strategy.enumerate_parameters()
+            if hasattr(parameter, 'low') and hasattr(parameter, 'high')}
+
+
+def sample_candidates(strategy, count: int, seed: int = 0) -> list:
+    """``count`` distinct parameter sets, the strategy's current values first."""
+    spaces = {name: parameter_values(parameter) for name, parameter in signal_parameters(strategy).items()}
+    candidates = [{name: parameter.value for name, parameter in signal_parameters(strategy).items()}]
+    seen = {tuple(candidates[0].values())}
+    size = np.prod([len(values) for values in spaces.values()], dtype=float)
+    rng = random.Random(seed)
+    while len(candidates) < min(count, size):
+        params = {name: rng.choice(values) for name, values in spaces.items()}
+        if tuple(params.values()) not in seen:
+            seen.add(tuple(params.values()))
+            candidates.append(params)
+    return candidates
+
+
+def analyze(strategy, data: dict, timerange, startup: int) -> dict:
+    """advise_all_indicators in hyperopt mode (indicators for the whole parameter space), trimmed."""
+    parameters = signal_parameters(strategy).values()
+    for parameter in parameters:
+        parameter.in_space = True
+    # The frames stay in this process, no need to share them
+    strategy.use_shared_frames = False
+    HyperoptStateContainer.set_state(HyperoptState.INDICATORS)
+    try:
+        analyzed = strategy.advise_all_indicators(data)
+    finally:
+        HyperoptStateContainer.set_state(HyperoptState.OPTIMIZE)
+    return trim_dataframes(analyzed, timerange, startup)
+
+
+def produced_signals(strategy, df: pd.DataFrame, pair: str) -> set:
+    """
+    Signal columns the strategy's populate_entry_trend/populate_exit_trend set, the others
+    stay 0 in freqtrade's backtest (KamaStrategy computes enter_short in populate_short_trend,
+    which freqtrade does not call).
+    """
+    signals = strategy.ft_advise_signals(df.copy(), {'pair': pair})
+    return {signal for signal in SIGNALS if signal in signals.columns}
+
+
+def candidate_signals(strategy, df: pd.DataFrame, pair: str, candidates: list, produced: set) -> dict:
+    """``{signal: (candidates x candles) bool}`` of one pair, for the ``produced`` signals."""
+    masks = {signal: np.zeros((len(candidates), len(df)), dtype=bool) for signal in SIGNALS}
+    metadata = {'pair': pair}
+    for row, params in enumerate(candidates):
+        apply_params(strategy, params)
+        if hasattr(strategy, 'signal_masks'):
+            # KamaStrategy: the shared signal evaluation, without the signal columns
+            evaluated = strategy.signal_masks(df, metadata)
+        else:
+            signals = strategy.populate_exit_trend(strategy.populate_entry_trend(df.copy(), metadata), metadata)
+            evaluated = {signal: signals[signal].to_numpy() == 1 for signal in SIGNALS if signal in signals}
+        for signal in produced:
+            if signal in evaluated:
+                masks[signal][row] = evaluated[signal]
+    return masks
+
+
+def prescreen(strategy, analyzed: dict, candidates: list, settings: ExitSettings, batch: int = 128,
+              record: set = frozenset()) -> tuple:
+    """
+    Simulates every candidate on every pair.
+
+    Args:
+        record (set): Candidate numbers whose trades are returned.
+
+    Returns:
+        tuple: ``(metrics DataFrame by candidate, trades DataFrame of the recorded candidates)``.
+    """
+    totals = {name: np.zeros(len(candidates)) for name in ('trades', 'wins', 'profit_sum', 'gross_profit',
+                                                            'gross_loss', 'candles_held')}
+    reasons = np.zeros((len(candidates), len(EXIT_REASONS)), dtype=np.int64)
+    trades = []
+    for pair, df in analyzed.items():
+        candles = candle_arrays(df)
+        exits = {short: price_exits(candles, settings, short) for short in (False, True)}
+        dates = df['date'].to_numpy()
+        produced = produced_signals(strategy, df, pair)
+        for first in range(0, len(candidates), batch):
+            chunk = candidates[first:first + batch]
+            recorded = any(first <= number < first + len(chunk) for number in record)
+            signals = candidate_signals(strategy, df, pair, chunk, produced)
+            result = simulate(candles, exits, signals, settings, recorded)
+            for name, values in totals.items():
+                values[first:first + len(chunk)] += result[name]
+            reasons[first:first + len(chunk)] += result['reasons']
+            if recorded:
+                rows, entry, exit_index, short, reason, profit = result['trade_list']
+                keep = np.isin(rows + first, list(record))
+                trades.append(pd.DataFrame({
+                    'candidate': rows[keep] + first, 'pair': pair, 'open_date': dates[entry[keep]],
+                    'close_date': dates[exit_index[keep]], 'is_short': short[keep],
+                    'exit_reason': np.array(EXIT_REASONS)[reason[keep]], 'profit_ratio': profit[keep],
+                }))
+
+    metrics = pd.DataFrame(candidates)
+    metrics['params'] = [' '.join(f'{name}={value}' for name, value in params.items()) for params in candidates]
+    for name, values in totals.items():
+        metrics[name] = values
+    with np.errstate(divide='ignore', invalid='ignore'):
+        metrics['profit_mean'] = totals['profit_sum'] / totals['trades']
+        metrics['winrate'] = totals['wins'] / totals['trades']
+        metrics['profit_factor'] = totals['gross_profit'] / totals['gross_loss']
+    for code, reason in enumerate(EXIT_REASONS):
+        metrics[f'exit_{reason}'] = reasons[:, code]
+    trades = pd.concat(trades, ignore_index=True) if trades else pd.DataFrame()
+    return metrics, trades
+
+
+def run_backtest(params: dict) -> pd.DataFrame:
+    """freqtrade backtest of one candidate in a worker, returns its trades."""
+    backtesting = _SHARED['backtesting']
+    data, timerange = _SHARED['data'], _SHARED['timerange']
+    strategy = backtesting.strategylist[0]
+    apply_params(strategy, params)
+    backtesting.backtest_one_strategy(strategy, data, timerange)
+    results = backtesting.all_bt_content[strategy.get_strategy_name()]['results']
+    Backtesting.cleanup()
+    return results[TRADE_KEY + ['close_date', 'exit_reason', 'profit_ratio']]
+
+
+def fidelity(simulated: pd.DataFrame, backtested: pd.DataFrame) -> dict:
+    """Trades, profit and win rate of the backtest, and how many trades both found alike."""
+    simulated = simulated.assign(open_date=pd.to_datetime(simulated['open_date'], utc=True),
+                                 close_date=pd.to_datetime(simulated['close_date'], utc=True))
+    backtested = backtested.assign(open_date=pd.to_datetime(backtested['open_date'], utc=True),
+                                   close_date=pd.to_datetime(backtested['close_date'], utc=True))
+    matched = simulated.merge(backtested, on=TRADE_KEY, suffixes=('', '_bt'))
+    same_exit = ((matched['close_date'] == matched['close_date_bt'])
+                 & (matched['exit_reason'] == matched['exit_reason_bt']))
+    return {
+        'bt_trades': len(backtested),
+        'bt_profit_sum': backtested['profit_ratio'].sum(),
+        'bt_winrate': (backtested['profit_ratio'] > 0).mean() if len(backtested) else np.nan,
+        'entries_matched': len(matched) / max(len(simulated), len(backtested), 1),
+        'exits_matched': same_exit.mean() if len(matched) else np.nan,
+        'bt_exit_reasons': backtested['exit_reason'].value_counts().to_dict(),
+    }
+
+
+def print_table(rows: list, columns: tuple, summary: str) -> None:
+    tabular = [[fmt.format(row[column]) if row.get(column) is not None and not pd.isna(row[column]) else ''
+                for column, _, fmt in columns] for row in rows]
+    print_rich_table(tabular, [header for _, header, _ in columns], summary=summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--userdir', type=Path, default=Path('user_data'))
+    parser.add_argument('--strategy', default='KamaStrategy')
+    parser.add_argument('--config', default='KamaStrategy.json', help='Config file in <userdir>/configs')
+    parser.add_argument('--extra-config', type=Path, nargs='+', default=[],
+                        help='Configs layered on top of the config')
+    parser.add_argument('--datadir', type=Path)
+    parser.add_argument('--timeframe')
+    parser.add_argument('--timerange')
+    parser.add_argument('--stake-amount')
+    parser.add_argument('--candidates', type=int, default=2000, help='Parameter sets to simulate')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--batch', type=int, default=128, help='Parameter sets simulated at once')
+    parser.add_argument('--top', type=int, default=10, help='Best candidates to backtest')
+    parser.add_argument('--sample', type=int, default=5,
+                        help='Random other candidates to backtest for the fidelity report')
+    parser.add_argument('--min-trades', type=int, default=10, help='Candidates with fewer trades are not ranked')
+    parser.add_argument('--no-backtest', action='store_true', help='Only rank, no backtests or fidelity report')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='Backtest worker processes')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s: %(message)s')
+    logging.getLogger('freqtrade').setLevel(logging.WARNING)
+
+    config = setup_optimize_configuration({
+        'config': [str(args.userdir / 'configs' / args.config)] + [str(path) for path in args.extra_config],
+        'user_data_dir': str(args.userdir),
+        'datadir': str(args.datadir) if args.datadir else None,
+        'strategy': args.strategy,
+        'timeframe': args.timeframe,
+        'timerange': args.timerange,
+        'stake_amount': args.stake_amount,
+        'export': 'none',
+        'backtest_cache': 'none',
+    }, RunMode.BACKTEST)
+
+    start = time.perf_counter()
+    # setup_optimize_configuration configured freqtrade's logging again
+    logging.getLogger('freqtrade').setLevel(logging.WARNING)
+    backtesting = Backtesting(config)
+    data, timerange = backtesting.load_bt_data()
+    strategy = backtesting.strategylist[0]
+    backtesting._set_strategy(strategy)
+    candidates = sample_candidates(strategy, args.candidates, args.seed)
+    settings = ExitSettings(strategy, backtesting.fee)
+    analyzed = analyze(strategy, data, timerange, backtesting.required_startup)
+    loaded = time.perf_counter() - start
+
+    start = time.perf_counter()
+    metrics, _ = prescreen(strategy, analyzed, candidates, settings, args.batch)
+    screened = time.perf_counter() - start
+    candles = sum(len(df) for df in analyzed.values())
+    logger.info('Loaded and analyzed %d pairs (%d candles) in %.1fs', len(analyzed), candles, loaded)
+    logger.info('Simulated %d candidates in %.1fs (%.1f ms per candidate)', len(candidates), screened,
+                screened / len(candidates) * 1000)
+
+    ranked = metrics[metrics['trades'] >= args.min_trades].sort_values('profit_sum', ascending=False)
+    metrics['rank'] = pd.Series(range(1, len(ranked) + 1), index=ranked.index)
+    top = ranked.index[:args.top].tolist()
+    print_table(metrics.loc[top].to_dict('records'), RANKING_COLUMNS,
+                f'PRE-SCREEN: TOP {len(top)} OF {len(candidates)} ({screened:.1f}s)')
+
+    output = args.userdir / 'backtest_results' / f'prescreen-{datetime.now(timezone.utc):%Y-%m-%d_%H-%M-%S}'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    metrics.sort_values('rank').to_csv(output.with_suffix('.csv'), index=False)
+    if args.no_backtest:
+        print(f'Candidates written to {output}.csv')
+        return
+
+    rng = random.Random(args.seed)
+    others = [number for number in metrics.index if number not in top]
+    checked = top + sorted(rng.sample(others, min(args.sample, len(others))))
+    _, simulated = prescreen(strategy, analyzed, [candidates[number] for number in checked], settings,
+                             args.batch, record=set(range(len(checked))))
+
+    start = time.perf_counter()
+    _SHARED.update(backtesting=backtesting, data=data, timerange=timerange)
+    workers = max(1, min(args.jobs, len(checked)))
+    # fork: the workers inherit the loaded candles (with the funding and mark data of the
+    # Backtesting) instead of reading the data files again for every candidate
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as executor:
+        backtests = list(executor.map(run_backtest, [candidates[number] for number in checked]))
+    backtested = time.perf_counter() - start
+
+    rows = []
+    for position, (number, trades) in enumerate(zip(checked, backtests)):
+        row = metrics.loc[number].to_dict()
+        row.update(fidelity(simulated[simulated['candidate'] == position], trades))
+        row['rank'] = '' if pd.isna(row['rank']) else int(row['rank'])
+        rows.append(row)
+    report = pd.DataFrame(rows)
+    correlation = report['profit_sum'].corr(report['bt_profit_sum'], method='spearman')
+    print_table(rows, FIDELITY_COLUMNS, f'FIDELITY: {len(rows)} BACKTESTS ({backtested:.1f}s)')
+    print(f'Profit rank correlation (Spearman) {correlation:.2f}, '
+          f'mean profit sum error {(report["profit_sum"] - report["bt_profit_sum"]).abs().mean() * 100:.2f} points, '
+          f'entries matched {report["entries_matched"].mean():.1%}, exits matched {report["exits_matched"].mean():.1%}')
+    print(f'Pre-screen {screened / len(candidates) * 1000:.1f} ms per candidate, '
+          f'backtest {backtested * workers / len(checked):.1f}s per candidate')
+
+    output.with_suffix('.json').write_text(json.dumps({
+        'strategy': args.strategy,
+        'candidates': len(candidates),
+        'prescreen_seconds': screened,
+        'backtest_seconds': backtested,
+        'rank_correlation': correlation,
+        'backtests': rows,
+    }, indent=2, default=str))
+    print(f'Candidates written to {output}.csv, fidelity report to {output}.json')
+
+
+if __name__ == '__main__':
+    main()
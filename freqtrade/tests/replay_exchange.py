@@ -0,0 +1,491 @@
+"""
+Local replay exchange: a stand-in for the Binance USDT-M futures public REST API.
+
+Serves stored (freqtrade feather/json data) or synthetic candles plus synthetic order books
+for 4 to several hundred pairs, so an unmodified dry-run bot (KamaStrategy config) can run
+offline and its loop throughput can be measured against ``process_throttle_secs``.
+
+Replay speed: freqtrade schedules candle refreshes from its own wall clock, so the replay
+compresses time instead of shifting it. Candles of ``--source-timeframe`` are served as
+``--timeframe`` candles aligned to the wall clock, e.g. 15m data served as 1m candles runs
+the bot through the data 15x faster (``--speed 15`` picks that timeframe). Older candles
+are served as history, so startup candle requests are answered as well.
+
+Endpoints (what freqtrade/ccxt use in dry-run): fapi/v1 exchangeInfo, klines,
+markPriceKlines, indexPriceKlines, depth, ticker/24hr, ticker/bookTicker, ticker/price,
+premiumIndex, fundingRate, time and ping. ``GET /replay/stats`` returns request counts,
+handler latencies and, per served candle, when the bot fetched it for its pairs. A candle
+is flagged as overrun when fetching it for all pairs took longer than ``--throttle`` secs.
+``--depth-latency`` / ``--depth-jitter`` delay the order book requests to simulate a slow
+exchange (see bench_orderbook_cache.py).
+
+Usage (inside the freqtrade container, the repository is mounted at /ws):
+    python /ws/freqtrade/tests/replay_exchange.py --pairs 50 --speed 15 \\
+        --write-config /freqtrade/user_data/configs/replay_exchange.json
+    freqtrade trade --config user_data/configs/KamaStrategy.json \\
+        --config user_data/configs/replay_exchange.json --strategy KamaStrategy \\
+        --db-url sqlite:////tmp/replay.sqlite
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import logging
+import math
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from aiohttp import web
+
+from synthetic_ohlcv import generate_ohlcv
+
+logger = logging.getLogger('replay_exchange')
+
+TIMEFRAME_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000, '8h': 28_800_000,
+    '12h': 43_200_000, '1d': 86_400_000,
+}
+# KamaStrategy.json whitelist first, then other Binance USDT-M perpetuals
+DEFAULT_PAIRS = ('BTC/USDT:USDT', 'ETH/USDT:USDT', 'SOL/USDT:USDT', 'XRP/USDT:USDT')
+FUNDING_INTERVAL_MS = 8 * 3_600_000
+FUNDING_RATE = 0.0001
+HISTORY_CANDLES = 1500
+ROUND_HISTORY = 100
+
+
+def available_pairs() -> list:
+    """USDT-M perpetual pairs freqtrade knows leverage tiers for (needed in dry-run)."""
+    from freqtrade import exchange
+
+    tiers = Path(exchange.__file__).parent / 'binance_leverage_tiers.json'
+    pairs = [pair for pair in json.loads(tiers.read_text()) if pair.endswith('/USDT:USDT')]
+    return list(DEFAULT_PAIRS) + sorted(set(pairs) - set(DEFAULT_PAIRS))
+
+
+def load_candles(pair: str, datadir: Path, timeframe: str, candles: int, seed: int) -> pd.DataFrame:
+    """Stored futures candles of ``pair`` if present in ``datadir``, synthetic ones otherwise."""
+    if datadir is not None:
+        name = pair.replace('/', '_').replace(':', '_')
+        for path in (datadir / 'futures' / f'{name}-{timeframe}-futures.feather',
+                     datadir / 'futures' / f'{name}-{timeframe}-futures.json'):
+            if path.exists():
+                if path.suffix == '.feather':
+                    df = pd.read_feather(path)
+                else:
+                    df = pd.read_json(path, orient='values')
+                    df.columns = ['date', 'open', 'high', 'low', 'close', 'volume']
+                logger.info('%s: replaying %d stored candles from %s', pair, len(df), path)
+                return df
+    rng = np.random.default_rng(seed)
+    return generate_ohlcv(candles, seed=seed, timeframe=timeframe, start_price=10 ** rng.uniform(-2, 4))
+
+
+class ReplayMarket:
+    """Candles of one pair plus the exchange filters derived from its price level."""
+
+    def __init__(self, pair: str, candles: pd.DataFrame):
+        self.pair = pair
+        self.base = pair.split('/')[0]
+        self.symbol = f'{self.base}USDT'
+        self.ohlcv = candles[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)
+        magnitude = math.floor(math.log10(float(np.median(self.ohlcv[:, 3]))))
+        self.price_decimals = min(8, max(0, 5 - magnitude))
+        self.quantity_decimals = min(8, max(0, magnitude + 2))
+
+    def row(self, index: int) -> np.ndarray:
+        return self.ohlcv[index % len(self.ohlcv)]
+
+    def price(self, value: float) -> str:
+        return f'{value:.{self.price_decimals}f}'
+
+    def quantity(self, value: float) -> str:
+        return f'{value:.{self.quantity_decimals}f}'
+
+    def exchange_info(self) -> dict:
+        tick = f'{10 ** -self.price_decimals:.{self.price_decimals}f}'
+        step = f'{10 ** -self.quantity_decimals:.{self.quantity_decimals}f}'
+        return {
+            'symbol': self.symbol, 'pair': self.symbol, 'contractType': 'PERPETUAL',
+            'deliveryDate': 4133404800000, 'onboardDate': 1569398400000, 'status': 'TRADING',
+            'baseAsset': self.base, 'quoteAsset': 'USDT', 'marginAsset': 'USDT',
+            'pricePrecision': self.price_decimals, 'quantityPrecision': self.quantity_decimals,
+            'baseAssetPrecision': 8, 'quotePrecision': 8, 'underlyingType': 'COIN',
+            'settlePlan': 0, 'triggerProtect': '0.0500', 'liquidationFee': '0.012500',
+            'marketTakeBound': '0.05',
+            'filters': [
+                {'filterType': 'PRICE_FILTER', 'minPrice': tick, 'maxPrice': '1000000', 'tickSize': tick},
+                {'filterType': 'LOT_SIZE', 'minQty': step, 'maxQty': '10000000', 'stepSize': step},
+                {'filterType': 'MARKET_LOT_SIZE', 'minQty': step, 'maxQty': '10000000', 'stepSize': step},
+                {'filterType': 'MAX_NUM_ORDERS', 'limit': 200},
+                {'filterType': 'MIN_NOTIONAL', 'notional': '5'},
+                {'filterType': 'PERCENT_PRICE', 'multiplierUp': '1.0500', 'multiplierDown': '0.9500',
+                 'multiplierDecimal': '4'},
+            ],
+            'orderTypes': ['LIMIT', 'MARKET', 'STOP', 'STOP_MARKET', 'TAKE_PROFIT',
+                           'TAKE_PROFIT_MARKET', 'TRAILING_STOP_MARKET'],
+            'timeInForce': ['GTC', 'IOC', 'FOK', 'GTX'],
+        }
+
+
+class ReplayExchange:
+    """
+    Maps wall-clock candle slots of the served timeframe onto the replayed candle rows.
+
+    Args:
+        markets (list): ReplayMarket per pair.
+        timeframe (str): Timeframe the candles are served (and the bot runs) with.
+        throttle (float): Bot process_throttle_secs, used to flag overrunning candles.
+        depth_latency (float): Seconds every order book request is delayed by (simulated latency).
+        depth_jitter (float): Additional uniformly random delay of order book requests, seconds.
+    """
+
+    def __init__(self, markets: list, timeframe: str, throttle: float, depth_latency: float = 0.0,
+                 depth_jitter: float = 0.0):
+        self.markets = {market.symbol: market for market in markets}
+        self.timeframe = timeframe
+        self.interval = TIMEFRAME_MS[timeframe]
+        self.throttle = throttle
+        self.depth_latency = depth_latency
+        self.depth_jitter = depth_jitter
+        self.rng = np.random.default_rng()
+        now = self.now()
+        # The current candle slot replays row HISTORY_CANDLES, earlier slots the rows before
+        self.anchor = now - now % self.interval - HISTORY_CANDLES * self.interval
+        self.requests = defaultdict(list)
+        self.rounds = {}
+
+    @staticmethod
+    def now() -> int:
+        return int(time.time() * 1000)
+
+    def market(self, request) -> ReplayMarket:
+        symbol = request.query.get('symbol')
+        if symbol not in self.markets:
+            raise web.HTTPBadRequest(text=json.dumps({'code': -1121, 'msg': 'Invalid symbol.'}),
+                                     content_type='application/json')
+        return self.markets[symbol]
+
+    def current_price(self, market: ReplayMarket, now: int) -> float:
+        """Price moving from the open to the close of the replayed row during the candle."""
+        row = market.row((now - self.anchor) // self.interval)
+        progress = (now % self.interval) / self.interval
+        return row[0] + (row[3] - row[0]) * progress
+
+    def klines(self, market: ReplayMarket, interval: str, start, end, limit: int) -> list:
+        interval_ms = TIMEFRAME_MS[interval]
+        now = self.now()
+        last = now - now % interval_ms
+        if end is not None:
+            last = min(last, int(end) - int(end) % interval_ms)
+        first = last - (limit - 1) * interval_ms
+        if start is not None:
+            first = max(first, int(start) + (-int(start)) % interval_ms)
+            last = min(last, first + (limit - 1) * interval_ms)
+        # Other intervals (mark/funding candles) reuse the rows on their own grid
+        anchor = self.anchor - self.anchor % interval_ms
+        candles = []
+        for open_time in range(first, last + 1, interval_ms):
+            open_, high, low, close, volume = market.row((open_time - anchor) // interval_ms)
+            candles.append([
+                open_time, market.price(open_), market.price(high), market.price(low),
+                market.price(close), market.quantity(volume), open_time + interval_ms - 1,
+                market.price(volume * close), 100, market.quantity(volume / 2),
+                market.price(volume * close / 2), '0',
+            ])
+        return candles
+
+    def record_round(self, market: ReplayMarket, now: int) -> None:
+        """Tracks when the bot fetched the current candle slot for each pair."""
+        slot = now - now % self.interval
+        stats = self.rounds.get(slot)
+        if stats is None:
+            self.log_round(slot - self.interval)
+            stats = self.rounds[slot] = {'first': now, 'last': now, 'pairs': set()}
+            while len(self.rounds) > ROUND_HISTORY:
+                self.rounds.pop(min(self.rounds))
+        stats['last'] = now
+        stats['pairs'].add(market.symbol)
+
+    def round_summary(self, slot: int) -> dict:
+        stats = self.rounds[slot]
+        spread = (stats['last'] - stats['first']) / 1000
+        return {
+            'candle': pd.Timestamp(slot, unit='ms', tz='UTC').isoformat(),
+            'pairs': len(stats['pairs']),
+            'first_fetch_secs': (stats['first'] - slot) / 1000,
+            'last_fetch_secs': (stats['last'] - slot) / 1000,
+            'fetch_spread_secs': spread,
+            'overrun': spread > self.throttle,
+        }
+
+    def log_round(self, slot: int) -> None:
+        if slot in self.rounds:
+            summary = self.round_summary(slot)
+            logger.info('candle %(candle)s: %(pairs)d pairs fetched between +%(first_fetch_secs).2fs and '
+                        '+%(last_fetch_secs).2fs after open, spread %(fetch_spread_secs).2fs%(flag)s',
+                        {**summary, 'flag': ' OVERRUN' if summary['overrun'] else ''})
+
+    def stats(self) -> dict:
+        endpoints = {}
+        for endpoint, timings in self.requests.items():
+            array = np.array(timings[-10_000:]) * 1000
+            endpoints[endpoint] = {
+                'requests': len(timings),
+                'mean_ms': round(float(array.mean()), 3),
+                'p99_ms': round(float(np.percentile(array, 99)), 3),
+            }
+        rounds = [self.round_summary(slot) for slot in sorted(self.rounds)]
+        return {
+            'timeframe': self.timeframe,
+            'pairs': len(self.markets),
+            'endpoints': endpoints,
+            'rounds': rounds,
+            'overruns': sum(summary['overrun'] for summary in rounds),
+        }
+
+
+def order_book(exchange: ReplayExchange, market: ReplayMarket, limit: int, now: int) -> dict:
+    """Synthetic book around the current replay price (deterministic per candle slot)."""
+    price = exchange.current_price(market, now)
+    tick = 10 ** -market.price_decimals
+    half_spread = max(tick, price * 0.0001)
+    row = market.row((now - exchange.anchor) // exchange.interval)
+    rng = np.random.default_rng(abs(hash((market.symbol, now // 1000))) % 2 ** 32)
+    sizes = rng.gamma(2.0, row[4] / 2000 + 10 ** -market.quantity_decimals, (2, limit))
+    levels = np.arange(limit) * tick
+    return {
+        'lastUpdateId': now,
+        'E': now,
+        'T': now,
+        'bids': [[market.price(price - half_spread - step), market.quantity(size)]
+                 for step, size in zip(levels, sizes[0])],
+        'asks': [[market.price(price + half_spread + step), market.quantity(size)]
+                 for step, size in zip(levels, sizes[1])],
+    }
+
+
+def ticker(exchange: ReplayExchange, market: ReplayMarket, now: int) -> dict:
+    slot = (now - exchange.anchor) // exchange.interval
+    day = [market.row(slot - i) for i in range(max(1, 86_400_000 // exchange.interval))]
+    price = exchange.current_price(market, now)
+    open_ = day[-1][0]
+    volume = sum(row[4] for row in day)
+    return {
+        'symbol': market.symbol, 'priceChange': market.price(price - open_),
+        'priceChangePercent': f'{(price / open_ - 1) * 100:.3f}', 'weightedAvgPrice': market.price(price),
+        'lastPrice': market.price(price), 'lastQty': market.quantity(1), 'openPrice': market.price(open_),
+        'highPrice': market.price(max(row[1] for row in day)), 'lowPrice': market.price(min(row[2] for row in day)),
+        'volume': market.quantity(volume), 'quoteVolume': market.price(volume * price),
+        'openTime': now - 86_400_000, 'closeTime': now, 'firstId': 1, 'lastId': 2, 'count': 2,
+    }
+
+
+def premium_index(market: ReplayMarket, price: float, now: int) -> dict:
+    return {
+        'symbol': market.symbol, 'markPrice': market.price(price), 'indexPrice': market.price(price),
+        'estimatedSettlePrice': market.price(price), 'lastFundingRate': f'{FUNDING_RATE:.8f}',
+        'interestRate': '0.00010000', 'nextFundingTime': now - now % FUNDING_INTERVAL_MS + FUNDING_INTERVAL_MS,
+        'time': now,
+    }
+
+
+def create_app(exchange: ReplayExchange) -> web.Application:
+    routes = web.RouteTableDef()
+
+    def timed(name):
+        def decorator(handler):
+            async def wrapper(request):
+                start = time.perf_counter()
+                try:
+                    return await handler(request)
+                finally:
+                    exchange.requests[name].append(time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    @routes.get('/fapi/v1/ping')
+    @timed('ping')
+    async def ping(request):
+        return web.json_response({})
+
+    @routes.get('/fapi/v1/time')
+    @timed('time')
+    async def server_time(request):
+        return web.json_response({'serverTime': exchange.now()})
+
+    @routes.get('/fapi/v1/exchangeInfo')
+    @timed('exchangeInfo')
+    async def exchange_info(request):
+        return web.json_response({
+            'timezone': 'UTC', 'serverTime': exchange.now(), 'futuresType': 'U_MARGINED',
+            'rateLimits': [], 'exchangeFilters': [],
+            'assets': [{'asset': 'USDT', 'marginAvailable': True, 'autoAssetExchange': '-10000'}],
+            'symbols': [market.exchange_info() for market in exchange.markets.values()],
+        })
+
+    async def klines(request):
+        market = exchange.market(request)
+        interval = request.query.get('interval', exchange.timeframe)
+        limit = min(int(request.query.get('limit', 500)), 1500)
+        candles = exchange.klines(market, interval, request.query.get('startTime'),
+                                  request.query.get('endTime'), limit)
+        if interval == exchange.timeframe:
+            exchange.record_round(market, exchange.now())
+        return web.json_response(candles)
+
+    routes.get('/fapi/v1/klines')(timed('klines')(klines))
+    routes.get('/fapi/v1/markPriceKlines')(timed('markPriceKlines')(klines))
+    routes.get('/fapi/v1/indexPriceKlines')(timed('indexPriceKlines')(klines))
+
+    @routes.get('/fapi/v1/depth')
+    @timed('depth')
+    async def depth(request):
+        limit = min(int(request.query.get('limit', 100)), 1000)
+        if exchange.depth_latency or exchange.depth_jitter:
+            await asyncio.sleep(exchange.depth_latency + exchange.rng.uniform(0, exchange.depth_jitter))
+        return web.json_response(order_book(exchange, exchange.market(request), limit, exchange.now()))
+
+    @routes.get('/fapi/v1/ticker/24hr')
+    @timed('ticker24hr')
+    async def ticker_24hr(request):
+        now = exchange.now()
+        if 'symbol' in request.query:
+            return web.json_response(ticker(exchange, exchange.market(request), now))
+        return web.json_response([ticker(exchange, market, now) for market in exchange.markets.values()])
+
+    def book_ticker(market, now):
+        book = order_book(exchange, market, 1, now)
+        return {'symbol': market.symbol, 'bidPrice': book['bids'][0][0], 'bidQty': book['bids'][0][1],
+                'askPrice': book['asks'][0][0], 'askQty': book['asks'][0][1], 'time': now}
+
+    @routes.get('/fapi/v1/ticker/bookTicker')
+    @timed('bookTicker')
+    async def book_tickers(request):
+        now = exchange.now()
+        if 'symbol' in request.query:
+            return web.json_response(book_ticker(exchange.market(request), now))
+        return web.json_response([book_ticker(market, now) for market in exchange.markets.values()])
+
+    @routes.get('/fapi/v1/ticker/price')
+    @routes.get('/fapi/v2/ticker/price')
+    @timed('tickerPrice')
+    async def ticker_price(request):
+        now = exchange.now()
+        prices = [{'symbol': market.symbol, 'price': market.price(exchange.current_price(market, now)), 'time': now}
+                  for market in ([exchange.market(request)] if 'symbol' in request.query
+                                 else exchange.markets.values())]
+        return web.json_response(prices[0] if 'symbol' in request.query else prices)
+
+    @routes.get('/fapi/v1/premiumIndex')
+    @timed('premiumIndex')
+    async def premium(request):
+        now = exchange.now()
+        if 'symbol' in request.query:
+            market = exchange.market(request)
+            return web.json_response(premium_index(market, exchange.current_price(market, now), now))
+        return web.json_response([premium_index(market, exchange.current_price(market, now), now)
+                                  for market in exchange.markets.values()])
+
+    @routes.get('/fapi/v1/fundingRate')
+    @timed('fundingRate')
+    async def funding_rate(request):
+        market = exchange.market(request)
+        limit = min(int(request.query.get('limit', 100)), 1000)
+        now = exchange.now()
+        end = min(int(request.query.get('endTime', now)), now)
+        last = end - end % FUNDING_INTERVAL_MS
+        first = last - (limit - 1) * FUNDING_INTERVAL_MS
+        if 'startTime' in request.query:
+            start = int(request.query['startTime'])
+            first = max(first, start + (-start) % FUNDING_INTERVAL_MS)
+        return web.json_response([
+            {'symbol': market.symbol, 'fundingTime': funding_time, 'fundingRate': f'{FUNDING_RATE:.8f}',
+             'markPrice': market.price(market.row((funding_time - exchange.anchor) // exchange.interval)[3])}
+            for funding_time in range(first, last + 1, FUNDING_INTERVAL_MS)
+        ][-limit:])
+
+    @routes.get('/replay/stats')
+    async def replay_stats(request):
+        return web.json_response(exchange.stats())
+
+    app = web.Application()
+    app.add_routes(routes)
+    return app
+
+
+def replay_config(pairs: list, timeframe: str, host: str, port: int) -> dict:
+    """Config to pass after the strategy config (``--config <strategy>.json --config <this>``)."""
+    base = f'http://{host}:{port}'
+    return {
+        'timeframe': timeframe,
+        'max_open_trades': len(pairs),
+        'telegram': {'enabled': False},
+        'exchange': {
+            'name': 'binance',
+            'enable_ws': False,
+            'pair_whitelist': pairs,
+            'ccxt_config': {
+                'enableRateLimit': False,
+                'options': {'fetchMarkets': {'types': ['linear']}},
+                'urls': {'api': {
+                    'fapiPublic': f'{base}/fapi/v1',
+                    'fapiPublicV2': f'{base}/fapi/v2',
+                    'fapiPublicV3': f'{base}/fapi/v3',
+                    'fapiData': f'{base}/futures/data',
+                }},
+            },
+        },
+        'pairlists': [{'method': 'StaticPairList'}],
+    }
+
+
+def served_timeframe(source_timeframe: str, speed: int) -> str:
+    source_ms = TIMEFRAME_MS[source_timeframe]
+    for timeframe, interval in TIMEFRAME_MS.items():
+        if interval * speed == source_ms:
+            return timeframe
+    valid = sorted(source_ms // interval for interval in TIMEFRAME_MS.values() if source_ms % interval == 0)
+    raise SystemExit(f'--speed {speed} is not possible for {source_timeframe} candles, use one of {valid}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=4, help='Number of pairs to serve (4-200+)')
+    parser.add_argument('--source-timeframe', default='15m', choices=TIMEFRAME_MS)
+    parser.add_argument('--speed', type=int, default=1,
+                        help='Replay speed multiple, serves source candles as source/speed candles')
+    parser.add_argument('--timeframe', choices=TIMEFRAME_MS, help='Served timeframe (instead of --speed)')
+    parser.add_argument('--datadir', type=Path, help='freqtrade datadir with stored futures candles '
+                                                     '(user_data/data/binance), synthetic otherwise')
+    parser.add_argument('--candles', type=int, default=20_000, help='Synthetic candles per pair')
+    parser.add_argument('--throttle', type=float, default=5.0, help='Bot process_throttle_secs')
+    parser.add_argument('--depth-latency', type=float, default=0.0,
+                        help='Delay of every order book (depth) request in seconds, simulates exchange latency')
+    parser.add_argument('--depth-jitter', type=float, default=0.0,
+                        help='Additional random delay (0 to this many seconds) of order book requests')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--write-config', type=Path, help='Write the matching bot config override here')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s: %(message)s')
+
+    timeframe = args.timeframe or served_timeframe(args.source_timeframe, args.speed)
+    pairs = available_pairs()[:args.pairs]
+    markets = [ReplayMarket(pair, load_candles(pair, args.datadir, args.source_timeframe, args.candles, seed))
+               for seed, pair in enumerate(pairs)]
+    exchange = ReplayExchange(markets, timeframe, args.throttle, args.depth_latency, args.depth_jitter)
+    if args.write_config:
+        args.write_config.write_text(json.dumps(replay_config(pairs, timeframe, args.host, args.port), indent=4))
+        logger.info('Bot config override written to %s', args.write_config)
+    speed = TIMEFRAME_MS[args.source_timeframe] / TIMEFRAME_MS[timeframe]
+    logger.info('Replaying %d pairs of %s candles as %s candles (%.0fx) on http://%s:%d',
+                len(pairs), args.source_timeframe, timeframe, speed, args.host, args.port)
+    web.run_app(create_app(exchange), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Deterministic synthetic OHLCV data for the offline benchmarks.
+
+The candles follow a seeded geometric random walk with regime changes, so trending and
+ranging phases both occur and the strategies produce signals without any exchange data.
+"""
+import importlib
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+STRATEGIES_DIR = Path(__file__).resolve().parents[1] / 'user_data' / 'strategies'
+HYPEROPTS_DIR = Path(__file__).resolve().parents[1] / 'user_data' / 'hyperopts'
+
+
+def add_strategies_path():
+    """Make the modules in ``user_data/strategies`` importable from the benchmarks."""
+    if str(STRATEGIES_DIR) not in sys.path:
+        sys.path.insert(0, str(STRATEGIES_DIR))
+
+
+def add_hyperopts_path():
+    """Make the modules in ``user_data/hyperopts`` importable from the benchmarks."""
+    if str(HYPEROPTS_DIR) not in sys.path:
+        sys.path.insert(0, str(HYPEROPTS_DIR))
+
+
+def load_strategy(name: str, runmode: str = 'backtest', timeframe: str = None, config: dict = None):
+    """
+    Instantiate a strategy from ``user_data/strategies`` without a running bot.
+
+    Args:
+        name (str): Strategy class name (and module name).
+        runmode (str): Value of ``dp.runmode`` seen by the strategy ('backtest', 'hyperopt',
+            'dry_run', ...). Only the runmode is provided, there is no exchange behind it.
+        timeframe (str): Overrides the strategy timeframe (for strategies without one).
+        config (dict): Extra configuration keys.
+
+    Returns:
+        IStrategy: The strategy instance.
+    """
+    from freqtrade.enums import RunMode
+
+    add_strategies_path()
+    strategy_class = getattr(importlib.import_module(name), name)
+    strategy = strategy_class({'stake_currency': 'USDT', 'runmode': RunMode(runmode), **(config or {})})
+    if timeframe:
+        strategy.timeframe = timeframe
+    strategy.dp = SimpleNamespace(runmode=RunMode(runmode))
+    return strategy
+
+
+def generate_ohlcv(candles: int, seed: int = 0, timeframe: str = '15m',
+                   start_price: float = 100.0, start: str = '2024-01-01') -> pd.DataFrame:
+    """
+    Generate a freqtrade-style OHLCV dataframe.
+
+    Args:
+        candles (int): Number of candles.
+        seed (int): Random seed, the same seed always yields the same frame.
+        timeframe (str): Candle interval, used for the ``date`` column.
+        start_price (float): Close price of the first candle.
+        start (str): Open time of the first candle (UTC).
+
+    Returns:
+        DataFrame: Columns ``date, open, high, low, close, volume``.
+    """
+    rng = np.random.default_rng(seed)
+    # Slowly varying drift produces alternating trend and range regimes.
+    drift = np.repeat(rng.normal(0, 0.0006, candles // 500 + 1), 500)[:candles]
+    returns = drift + rng.normal(0, 0.004, candles)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.002, candles)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread * rng.uniform(0.5, 1.5, candles)
+    volume = rng.gamma(2.0, 500.0, candles)
+    date = pd.date_range(start, periods=candles, freq=timeframe.replace('m', 'min'), tz='UTC')
+    return pd.DataFrame({
+        'date': date,
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume,
+    })
+
+
+def generate_pairs(pairs: int, candles: int, seed: int = 0, timeframe: str = '15m') -> dict:
+    """
+    Generate one independent OHLCV frame per synthetic pair.
+
+    Returns:
+        dict: ``{'PAIR0/USDT:USDT': DataFrame, ...}``.
+    """
+    return {
+        f'PAIR{i}/USDT:USDT': generate_ohlcv(candles, seed=seed + i, timeframe=timeframe,
+                                            start_price=10.0 * (i + 1))
+        for i in range(pairs)
+    }
@@ -0,0 +1,327 @@
+"""
+Vectorized approximation of freqtrade's backtest, for ranking many signal parameter sets.
+
+freqtrade replays every candle of every pair in Python. For a sweep of signal thresholds
+most of that work is shared: whether a trade opened at a given candle hits its stoploss,
+ROI, trailing stop or ATR exit does not depend on the signal parameters at all. So the
+simulation runs in two stages:
+
+``price_exits``
+    For every candle of a pair and each side, where a trade opened at that candle's open
+    would be closed by the price based exits, in freqtrade's order of precedence:
+    custom_exit ATR bands (checked at the candle open), stoploss, minimal_roi, trailing stop.
+    Computed once per pair with 2D windows of the following candles (running maximum of the
+    trailing stop with ``np.maximum.accumulate``, first hit with ``argmax``).
+
+``simulate``
+    Chains the trades of a batch of parameter sets at once: every set is a row of (sets x
+    candles) entry/exit signal arrays, "next signal at or after candle i" lookups come from
+    reversed ``np.minimum.accumulate``, and every step opens the next trade of all sets and
+    closes it at the earlier of its exit signal and its price exit.
+
+Same rules as freqtrade's backtest for a strategy without position adjustment: signals act
+on the next candle's open, one trade per pair, an exit signal only counts without an entry
+signal of the same side, custom_exit is only consulted without an exit signal, trades open
+at the end are closed at the last close ('force_exit'). Not modelled: max_open_trades and
+the wallet (every trade has the same stake), the exchange's amount precision (a stake too
+small for one lot still trades), funding fees, leverage, timeframe-detail, protections and
+the special cases of ROI on the opening candle.
+"""
+import numpy as np
+
+from freqtrade.exchange import timeframe_to_minutes
+
+# Exit reasons as in freqtrade's results (custom_exit returns the ATR ones)
+EXIT_REASONS = ('exit_signal', 'atr_stoploss', 'atr_takeprofit', 'stop_loss', 'roi',
+                'trailing_stop_loss', 'force_exit')
+EXIT_SIGNAL, ATR_STOPLOSS, ATR_TAKEPROFIT, STOP_LOSS, ROI, TRAILING_STOP_LOSS, FORCE_EXIT = range(len(EXIT_REASONS))
+SIGNALS = ('enter_long', 'enter_short', 'exit_long', 'exit_short')
+
+
+class ExitSettings:
+    """
+    Exit configuration of a strategy, as used by the simulation.
+
+    Args:
+        strategy (IStrategy): Strategy to read minimal_roi, stoploss, the trailing stop and
+            the ATR exit multipliers (``atr_stoploss_multiplier``/``atr_takeprofit_multiplier``,
+            without them there are no ATR exits) from.
+        fee (float): Fee ratio per order (entry and exit).
+
+    Attributes:
+        roi (tuple): ``(minutes, roi)`` tiers sorted by minutes.
+    """
+
+    def __init__(self, strategy, fee: float = 0.0005):
+        self.fee = fee
+        self.timeframe_minutes = timeframe_to_minutes(strategy.timeframe)
+        self.roi = tuple(sorted((int(minutes), float(roi)) for minutes, roi in strategy.minimal_roi.items()))
+        self.stoploss = abs(strategy.stoploss)
+        self.trailing_stop = strategy.trailing_stop
+        self.trailing_stop_positive = strategy.trailing_stop_positive
+        self.trailing_stop_positive_offset = strategy.trailing_stop_positive_offset or 0.0
+        self.trailing_only_offset_is_reached = strategy.trailing_only_offset_is_reached
+        self.use_exit_signal = strategy.use_exit_signal
+        self.can_short = strategy.can_short
+        self.atr_stoploss_multiplier = getattr(strategy, 'atr_stoploss_multiplier', None)
+        self.atr_takeprofit_multiplier = getattr(strategy, 'atr_takeprofit_multiplier', None)
+
+    def profit(self, open_rate, close_rate, short):
+        """freqtrade's profit ratio of a trade (leverage 1, fees on both orders)."""
+        fee = self.fee
+        return np.where(short, 1 - close_rate * (1 + fee) / (open_rate * (1 - fee)),
+                        close_rate * (1 - fee) / (open_rate * (1 + fee)) - 1)
+
+
+def candle_arrays(df) -> dict:
+    """The float64 arrays of an analyzed dataframe the simulation reads."""
+    arrays = {column: df[column].to_numpy(dtype=np.float64) for column in ('open', 'high', 'low', 'close')}
+    # custom_exit sees the last closed candle's ATR when evaluated at a candle's open
+    atr = df['atr'].to_numpy(dtype=np.float64) if 'atr' in df.columns else np.full(len(df), np.nan)
+    arrays['atr_prev'] = np.concatenate([[np.nan], atr[:-1]])
+    return arrays
+
+
+def _roi_thresholds(settings: ExitSettings, minutes: np.ndarray) -> np.ndarray:
+    tiers = np.array([tier for tier, _ in settings.roi])
+    values = np.array([roi for _, roi in settings.roi] + [np.inf])
+    position = np.searchsorted(tiers, minutes, side='right') - 1
+    # Before the first tier there is no ROI
+    return values[np.where(position < 0, len(values) - 1, position)]
+
+
+def _first_exits(candles: dict, settings: ExitSettings, short: bool, entries: np.ndarray,
+                 start: int, width: int, carry: np.ndarray) -> tuple:
+    """
+    Price exits of ``entries`` within candles ``entry + start .. entry + start + width - 1``.
+
+    Returns:
+        tuple: ``(offset, rate, reason, stop)``, offset -1 where none hit in the window; stop
+        is the (trailing) stop level at the end of the window, to continue with.
+    """
+    n = len(candles['open'])
+    offsets = start + np.arange(width)
+    index = entries[:, None] + offsets[None, :]
+    valid = index < n
+    index = np.minimum(index, n - 1)
+    open_, high, low = candles['open'][index], candles['high'][index], candles['low'][index]
+    rate = candles['open'][entries][:, None]
+    fee = settings.fee
+    first_candle = offsets[None, :] == 0
+
+    hit = np.zeros(index.shape, dtype=bool)
+    reason = np.full(index.shape, -1, dtype=np.int8)
+    exit_rate = np.full(index.shape, np.nan)
+
+    # custom_exit: ATR bands around the open rate, checked against the candle open
+    if settings.use_exit_signal and settings.atr_stoploss_multiplier is not None:
+        atr = candles['atr_prev'][index]
+        atr_stop = open_ < rate - settings.atr_stoploss_multiplier * atr
+        atr_target = open_ > rate + settings.atr_takeprofit_multiplier * atr
+        reason[atr_target] = ATR_TAKEPROFIT
+        reason[atr_stop] = ATR_STOPLOSS
+        hit = atr_stop | atr_target
+        exit_rate[hit] = open_[hit]
+
+    # Profit at the candle's best price (high for longs, low for shorts)
+    if short:
+        bound = low
+        best_profit = 1 - bound * (1 + fee) / (rate * (1 - fee))
+        initial_stop = rate * (1 + settings.stoploss)
+    else:
+        bound = high
+        best_profit = bound * (1 - fee) / (rate * (1 + fee)) - 1
+        initial_stop = rate * (1 - settings.stoploss)
+
+    # Trailing stop: moved with the candle's best price before the stop is checked, never back
+    if settings.trailing_stop:
+        offset = settings.trailing_stop_positive_offset
+        positive = settings.trailing_stop_positive is not None and settings.trailing_stop_positive
+        distance = np.where(best_profit > offset, settings.trailing_stop_positive, settings.stoploss) \
+            if positive else np.full(index.shape, settings.stoploss)
+        trail = bound * (1 + distance) if short else bound * (1 - distance)
+        if settings.trailing_only_offset_is_reached:
+            trail[best_profit < offset] = np.inf if short else -np.inf
+    else:
+        trail = np.full(index.shape, np.inf if short else -np.inf)
+    accumulate = np.minimum.accumulate if short else np.maximum.accumulate
+    stop = accumulate(np.concatenate([carry[:, None], trail], axis=1), axis=1)
+    previous, stop = stop[:, :-1], stop[:, 1:]
+    # A stop already hit by this candle is not moved any more
+    if short:
+        stop = np.where(previous <= high, previous, stop)
+        stop_hit = stop <= high
+        gapped = stop < low
+    else:
+        stop = np.where(previous >= low, previous, stop)
+        stop_hit = stop >= low
+        gapped = stop > high
+    trailing = stop != initial_stop
+    stop_rate = np.where(gapped, open_, stop)
+    if settings.trailing_stop and settings.trailing_only_offset_is_reached and settings.trailing_stop_positive:
+        # freqtrade's worst case for a trailing stop hit on the opening candle
+        sign = -1 if short else 1
+        worst = open_ * (1 + sign * settings.trailing_stop_positive_offset
+                         - sign * settings.trailing_stop_positive)
+        worst = np.minimum(high, worst) if short else np.maximum(low, worst)
+        stop_rate = np.where(trailing & first_candle & ~gapped, worst, stop_rate)
+
+    # minimal_roi of the trade duration, reached at the candle's best price
+    minutes = offsets * settings.timeframe_minutes
+    roi = _roi_thresholds(settings, minutes)[None, :]
+    roi_hit = best_profit > roi
+    with np.errstate(invalid='ignore'):
+        roi_rate = rate * (1 - fee) * (1 - roi) / (1 + fee) if short else rate * (1 + fee) * (1 + roi) / (1 - fee)
+    tiers = [tier for tier, _ in settings.roi if tier > 0 and tier % settings.timeframe_minutes == 0]
+    new_tier = np.isin(minutes, tiers)
+    beyond = open_ < roi_rate if short else open_ > roi_rate
+    roi_rate = np.where(new_tier[None, :] & beyond, open_, np.minimum(np.maximum(roi_rate, low), high))
+
+    # Order of precedence of freqtrade's should_exit: custom_exit, stoploss, ROI, trailing stop
+    for condition, code, values in ((stop_hit & ~trailing, STOP_LOSS, stop_rate), (roi_hit, ROI, roi_rate),
+                                    (stop_hit & trailing, TRAILING_STOP_LOSS, stop_rate)):
+        new = condition & ~hit
+        reason[new] = code
+        exit_rate[new] = values[new]
+        hit |= new
+    hit &= valid
+
+    first = np.argmax(hit, axis=1)
+    rows = np.arange(len(entries))
+    found = hit[rows, first]
+    return (np.where(found, offsets[first], -1), exit_rate[rows, first], reason[rows, first],
+            np.where(valid[:, -1], stop[:, -1], carry))
+
+
+def price_exits(candles: dict, settings: ExitSettings, short: bool, window: int = 64,
+                max_cells: int = 2 ** 19) -> tuple:
+    """
+    Price based exit of a trade opened at every candle's open.
+
+    Args:
+        candles (dict): candle_arrays of the pair.
+        settings (ExitSettings): Exit configuration.
+        short (bool): Short trades instead of long ones.
+        window (int): Candles examined per entry in the first pass, doubled for the entries
+            still open after each pass.
+        max_cells (int): Entries x candles evaluated per 2D block, bounds the memory.
+
+    Returns:
+        tuple: ``(index, rate, reason)`` arrays by entry candle; index is the exit candle
+        (``len(candles)`` if the trade is never closed by a price exit).
+    """
+    n = len(candles['open'])
+    exit_index = np.full(n, n, dtype=np.int64)
+    exit_rate = np.full(n, np.nan)
+    exit_reason = np.full(n, FORCE_EXIT, dtype=np.int8)
+    pending = np.arange(n)
+    rate = candles['open']
+    carry = rate * (1 + settings.stoploss) if short else rate * (1 - settings.stoploss)
+    start = 0
+    while pending.size and start < n:
+        width = min(window, n - start)
+        block = max(1, max_cells // width)
+        still_open = []
+        for first in range(0, len(pending), block):
+            entries = pending[first:first + block]
+            offset, rates, reasons, stops = _first_exits(candles, settings, short, entries, start, width,
+                                                         carry[entries])
+            found = offset >= 0
+            exit_index[entries[found]] = entries[found] + offset[found]
+            exit_rate[entries[found]] = rates[found]
+            exit_reason[entries[found]] = reasons[found]
+            carry[entries] = stops
+            still_open.append(entries[~found & (entries + start + width < n)])
+        pending = np.concatenate(still_open)
+        start += width
+        window *= 2
+    return exit_index, exit_rate, exit_reason
+
+
+def next_true(mask: np.ndarray) -> np.ndarray:
+    """(sets x candles) -> (sets x candles + 1): first True at or after each candle, ``candles`` if none."""
+    n = mask.shape[-1]
+    index = np.where(mask, np.arange(n), n)
+    following = np.minimum.accumulate(index[..., ::-1], axis=-1)[..., ::-1]
+    return np.concatenate([following, np.full(mask.shape[:-1] + (1,), n)], axis=-1)
+
+
+def simulate(candles: dict, exits: dict, signals: dict, settings: ExitSettings, record: bool = False) -> dict:
+    """
+    Trades of a batch of parameter sets on one pair.
+
+    Args:
+        candles (dict): candle_arrays of the pair.
+        exits (dict): ``{False: price_exits(long), True: price_exits(short)}`` of the pair.
+        signals (dict): ``{signal column: (sets x candles) bool}`` of the analyzed candles.
+        settings (ExitSettings): Exit configuration.
+        record (bool): Also return every trade.
+
+    Returns:
+        dict: Per set arrays ``trades``, ``wins``, ``profit_sum``, ``gross_profit``,
+        ``gross_loss``, ``candles_held``, ``reasons`` (sets x EXIT_REASONS); with ``record``
+        also ``trade_list``: ``(set, entry, exit, short, reason, profit)`` arrays.
+    """
+    enter_long, enter_short = signals['enter_long'], signals['enter_short']
+    exit_long, exit_short = signals['exit_long'], signals['exit_short']
+    sets, n = enter_long.shape
+    open_, close = candles['open'], candles['close']
+
+    # Signals of candle i act at the open of candle i + 1
+    def delayed(mask):
+        shifted = np.zeros((sets, n), dtype=bool)
+        shifted[:, 1:] = mask[:, :-1]
+        return shifted
+
+    long_entry = delayed(enter_long & ~exit_long & ~enter_short)
+    short_entry = delayed(enter_short & ~exit_short & ~enter_long) if settings.can_short \
+        else np.zeros((sets, n), dtype=bool)
+    next_entry = next_true(long_entry | short_entry)
+    if settings.use_exit_signal:
+        next_exit = {False: next_true(delayed(exit_long & ~enter_long)),
+                     True: next_true(delayed(exit_short & ~enter_short))}
+    else:
+        next_exit = {side: np.full((sets, n + 1), n) for side in (False, True)}
+
+    result = {name: np.zeros(sets) for name in ('trades', 'wins', 'profit_sum', 'gross_profit', 'gross_loss',
+                                                'candles_held')}
+    result['reasons'] = np.zeros((sets, len(EXIT_REASONS)), dtype=np.int64)
+    trade_list = []
+    rows = np.arange(sets)
+    position = np.zeros(sets, dtype=np.int64)
+    while rows.size:
+        entry = next_entry[rows, position[rows]]
+        open_trade = entry < n
+        rows, entry = rows[open_trade], entry[open_trade]
+        if not rows.size:
+            break
+        short = short_entry[rows, entry]
+        price_index = np.where(short, exits[True][0][entry], exits[False][0][entry])
+        signal_index = np.where(short, next_exit[True][rows, entry], next_exit[False][rows, entry])
+        by_signal = signal_index <= price_index
+        exit_index = np.minimum(signal_index, price_index)
+        rate = np.where(short, exits[True][1][entry], exits[False][1][entry])
+        reason = np.where(short, exits[True][2][entry], exits[False][2][entry])
+        rate = np.where(by_signal, open_[np.minimum(exit_index, n - 1)], rate)
+        reason = np.where(by_signal, EXIT_SIGNAL, reason)
+        forced = exit_index >= n
+        exit_index = np.where(forced, n - 1, exit_index)
+        rate = np.where(forced, close[-1], rate)
+        reason = np.where(forced, FORCE_EXIT, reason)
+
+        profit = settings.profit(open_[entry], rate, short)
+        result['trades'][rows] += 1
+        result['wins'][rows] += profit > 0
+        result['profit_sum'][rows] += profit
+        result['gross_profit'][rows] += np.maximum(profit, 0)
+        result['gross_loss'][rows] -= np.minimum(profit, 0)
+        result['candles_held'][rows] += exit_index - entry
+        np.add.at(result['reasons'], (rows, reason), 1)
+        if record:
+            trade_list.append((rows, entry, exit_index, short, reason, profit))
+        # One trade per pair: the next one opens after the exit candle
+        position[rows] = exit_index + 1
+    if record:
+        result['trade_list'] = (tuple(map(np.concatenate, zip(*trade_list))) if trade_list
+                                else tuple(np.array([], dtype=np.int64) for _ in range(6)))
+    return result
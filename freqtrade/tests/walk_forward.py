@@ -0,0 +1,352 @@
+"""
+Walk-forward optimization: rolling train/test windows, the train windows optimized in parallel.
+
+``freqtrade hyperopt --timerange 20240606-`` optimizes over one range and reports the same
+range it was fitted on. Here the data is split into rolling windows of ``--train-days``
+followed by ``--test-days`` (advancing by ``--step-days``, the test length by default):
+every train window is optimized on its own, its best parameters are then backtested on the
+following test window, which it has not seen (out-of-sample).
+
+The indicators of every strategy are computed once over the whole history, in hyperopt mode
+(KamaStrategy: every kama_window and the threshold bitsets), in the parent process. The
+forked workers slice the analyzed frames per window (copy-on-write, nothing is pickled or
+recomputed), with the strategy's startup candles in front of each window like
+Backtesting.load_bt_data. Recursive indicators (KAMA, EMA) computed over the longer
+history are past their warm-up at every window start, so a signal right at a threshold in
+the first days of a window can differ from a standalone backtest of that window.
+
+One job per strategy and window: ``--epochs`` parameter sets of the strategy's buy/sell
+parameters (the current values first, then random samples, the same for every window)
+are evaluated like a hyperopt epoch: entry/exit signals of the train window, freqtrade's
+backtest, ``--hyperopt-loss``. The lowest loss wins and is backtested on the test window,
+as are the current values for comparison.
+
+Per window and per strategy (out-of-sample aggregates: profit, profitable windows,
+walk-forward efficiency = out-of-sample profit per day / train profit per day), also
+written as JSON/CSV to ``user_data/backtest_results/walk-forward-*``.
+
+Usage (inside the freqtrade container, the repository is mounted at /ws):
+    python /ws/freqtrade/tests/walk_forward.py --userdir user_data \\
+        --strategies KamaStrategy SampleStrategy --timerange 20240606- \\
+        --train-days 90 --test-days 30 --epochs 100 --hyperopt-loss SharpeHyperOptLoss
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from freqtrade.commands.optimize_commands import setup_optimize_configuration
+from freqtrade.configuration import TimeRange
+from freqtrade.data.metrics import calculate_market_change
+from freqtrade.enums import HyperoptState, RunMode
+from freqtrade.exchange import timeframe_to_minutes
+from freqtrade.optimize.backtesting import Backtesting
+from freqtrade.optimize.hyperopt.hyperopt_optimizer import MAX_LOSS
+from freqtrade.optimize.hyperopt_tools import HyperoptStateContainer
+from freqtrade.optimize.optimize_reports import generate_strategy_stats
+from freqtrade.resolvers.hyperopt_resolver import HyperOptLossResolver
+from freqtrade.util import print_rich_table
+from freqtrade.util.dry_run_wallet import get_dry_run_wallet
+
+from prescreen import apply_params, sample_candidates, signal_parameters
+
+logger = logging.getLogger('walk_forward')
+
+STRATEGIES = ('KamaStrategy', 'SampleStrategy')
+DEFAULT_LOSS = 'SharpeHyperOptLoss'
+# (column, header, format) of the window and summary tables
+WINDOW_COLUMNS = (
+    ('strategy', 'Strategy', '{}'),
+    ('window', '#', '{}'),
+    ('train', 'Train', '{}'),
+    ('test', 'Test', '{}'),
+    ('train_trades', 'Train trades', '{}'),
+    ('train_profit', 'Train profit %', '{:.2%}'),
+    ('test_trades', 'OOS trades', '{}'),
+    ('test_profit', 'OOS profit %', '{:.2%}'),
+    ('test_winrate', 'OOS win%', '{:.1%}'),
+    ('test_drawdown', 'OOS drawdown', '{:.2%}'),
+    ('current_profit', 'Current params OOS %', '{:.2%}'),
+    ('seconds', 'Secs', '{:.1f}'),
+)
+SUMMARY_COLUMNS = (
+    ('strategy', 'Strategy', '{}'),
+    ('windows', 'Windows', '{}'),
+    ('test_trades', 'OOS trades', '{}'),
+    ('test_profit', 'OOS profit %', '{:.2%}'),
+    ('test_profit_abs', 'OOS profit', '{:.3f}'),
+    ('profitable_windows', 'Profitable windows', '{:.0%}'),
+    ('worst_window', 'Worst window %', '{:.2%}'),
+    ('max_drawdown', 'Max drawdown', '{:.2%}'),
+    ('efficiency', 'WF efficiency', '{:.2f}'),
+    ('current_profit', 'Current params OOS %', '{:.2%}'),
+)
+
+# Analyzed candles and configuration of every strategy, shared with the forked workers:
+# {strategy: {'config': dict, 'backtesting': Backtesting, 'analyzed': {pair: DataFrame}, 'startup': int}}
+_SHARED = {}
+
+
+def strategy_config(strategy: str, args) -> dict:
+    """freqtrade's hyperopt configuration of a strategy, from its own config like the backtest matrix."""
+    config = f'{strategy}.json' if (args.userdir / 'configs' / f'{strategy}.json').exists() else 'config.json'
+    config = setup_optimize_configuration({
+        'config': [str(args.userdir / 'configs' / config)] + [str(path) for path in args.extra_config],
+        'user_data_dir': str(args.userdir),
+        'datadir': str(args.datadir) if args.datadir else None,
+        'strategy': strategy,
+        'timeframe': args.timeframe,
+        'timerange': args.timerange,
+        'stake_amount': args.stake_amount,
+        'hyperopt_min_trades': args.min_trades,
+    }, RunMode.HYPEROPT)
+    config['hyperopt_loss'] = args.hyperopt_loss or config.get('hyperopt_loss') or DEFAULT_LOSS
+    return config
+
+
+def prepare_strategy(strategy) -> None:
+    """Puts the buy/sell parameters in the search space, like hyperopt's indicator step."""
+    for parameter in signal_parameters(strategy).values():
+        parameter.in_space = True
+    # The analyzed frames reach the workers by fork, not by pickle
+    if hasattr(strategy, 'use_shared_frames'):
+        strategy.use_shared_frames = False
+
+
+def analyze_once(config: dict) -> dict:
+    """
+    Loads the whole timerange and computes the indicators of the whole parameter space once.
+
+    The Backtesting instance (with its funding rates and mark prices for futures) is kept
+    for the workers, like hyperopt keeps one for all epochs.
+    """
+    backtesting = Backtesting(config)
+    data, _ = backtesting.load_bt_data()
+    strategy = backtesting.strategylist[0]
+    backtesting._set_strategy(strategy)
+    prepare_strategy(strategy)
+    HyperoptStateContainer.set_state(HyperoptState.INDICATORS)
+    try:
+        analyzed = strategy.advise_all_indicators(data)
+    finally:
+        HyperoptStateContainer.set_state(HyperoptState.OPTIMIZE)
+    return {'config': config, 'backtesting': backtesting, 'analyzed': analyzed, 'startup': backtesting.required_startup}
+
+
+def build_windows(analyzed: dict, startup: int, timeframe: str, train: timedelta, test: timedelta,
+                  step: timedelta) -> list:
+    """
+    Rolling ``(train start, test start, test end)`` windows (end exclusive) from the first
+    midnight after the startup period, complete windows only.
+    """
+    first = min(df['date'].iloc[startup] for df in analyzed.values() if len(df) > startup).ceil('D')
+    end = max(df['date'].iloc[-1] for df in analyzed.values()) + timedelta(minutes=timeframe_to_minutes(timeframe))
+    windows = []
+    start = first
+    while start + train + test <= end:
+        windows.append((start, start + train, start + train + test))
+        start += step
+    return windows
+
+
+def window_data(analyzed: dict, start: datetime, stop: datetime, startup: int) -> dict:
+    """
+    The candles of ``[start, stop)`` with the startup candles in front, sliced from the
+    analyzed frames without copying (Backtesting trims the startup after the signals).
+    """
+    processed = {}
+    for pair, df in analyzed.items():
+        dates = df['date']
+        first, last = dates.searchsorted(start), dates.searchsorted(stop)
+        if last - first > 0:
+            processed[pair] = df.iloc[max(first - startup, 0):last]
+    return processed
+
+
+class WindowEvaluator:
+    """
+    Evaluates parameter sets on windows of the shared analyzed frames, like hyperopt's
+    generate_optimizer: signals, backtest, strategy stats and loss.
+    """
+
+    def __init__(self, name: str):
+        shared = _SHARED[name]
+        self.config = shared['config']
+        self.analyzed = shared['analyzed']
+        self.startup = shared['startup']
+        self.backtesting = shared['backtesting']
+        self.strategy = self.backtesting.strategy
+        self.loss_function = HyperOptLossResolver.load_hyperoptloss(self.config).hyperopt_loss_function
+        self.starting_balance = get_dry_run_wallet(self.config)
+        self.candle = timedelta(minutes=timeframe_to_minutes(self.config['timeframe']))
+
+    def evaluate(self, params: dict, start: datetime, stop: datetime) -> dict:
+        """Backtests ``params`` on the candles of ``[start, stop)``, returns the stats and the loss."""
+        apply_params(self.strategy, params)
+        processed = window_data(self.analyzed, start, stop, self.startup)
+        end = stop - self.candle
+        self.backtesting.timerange = TimeRange('date', 'date', int(start.timestamp()), int(end.timestamp()))
+        market_change = calculate_market_change(processed, 'close', min_date=start)
+        backtest_start = int(time.time())
+        results = self.backtesting.backtest(processed=processed, start_date=start, end_date=end)
+        results.update({'backtest_start_time': backtest_start, 'backtest_end_time': int(time.time())})
+        stats = generate_strategy_stats(list(processed), self.strategy.get_strategy_name(), results, start, end,
+                                        market_change=market_change, is_hyperopt=True)
+        loss = MAX_LOSS
+        if stats['total_trades'] >= self.config['hyperopt_min_trades']:
+            loss = self.loss_function(
+                results=results['results'], trade_count=stats['total_trades'], min_date=start, max_date=end,
+                config=self.config, processed=processed, backtest_stats=stats,
+                starting_balance=self.starting_balance,
+            )
+        return {'loss': loss, 'stats': stats}
+
+
+def run_window(name: str, index: int, window: tuple, epochs: int, seed: int) -> dict:
+    """Optimizes one train window in a worker and backtests the best parameters out-of-sample."""
+    started = time.perf_counter()
+    train_start, test_start, test_end = window
+    evaluator = WindowEvaluator(name)
+    candidates = sample_candidates(evaluator.strategy, epochs, seed)
+    best, best_params = None, None
+    for params in candidates:
+        result = evaluator.evaluate(params, train_start, test_start)
+        if best is None or result['loss'] < best['loss']:
+            best, best_params = result, params
+    test = evaluator.evaluate(best_params, test_start, test_end)['stats']
+    current = evaluator.evaluate(candidates[0], test_start, test_end)['stats']
+    train = best['stats']
+    return {
+        'strategy': name,
+        'window': index,
+        'train': f'{train_start:%Y%m%d}-{test_start:%Y%m%d}',
+        'test': f'{test_start:%Y%m%d}-{test_end:%Y%m%d}',
+        'train_days': (test_start - train_start).days,
+        'test_days': (test_end - test_start).days,
+        'params': ' '.join(f'{key}={value}' for key, value in best_params.items()),
+        'best_params': best_params,
+        'epochs': len(candidates),
+        'loss': best['loss'],
+        'train_trades': train['total_trades'],
+        'train_profit': train['profit_total'],
+        'test_trades': test['total_trades'],
+        'test_profit': test['profit_total'],
+        'test_profit_abs': test['profit_total_abs'],
+        'test_winrate': test['winrate'],
+        'test_drawdown': test['max_drawdown_account'],
+        'current_trades': current['total_trades'],
+        'current_profit': current['profit_total'],
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def summarize(rows: list) -> list:
+    """Out-of-sample aggregates per strategy over all its windows."""
+    summary = []
+    frame = pd.DataFrame(rows)
+    for name, windows in frame.groupby('strategy', sort=True):
+        train_rate = windows['train_profit'].sum() / windows['train_days'].sum()
+        test_rate = windows['test_profit'].sum() / windows['test_days'].sum()
+        summary.append({
+            'strategy': name,
+            'windows': len(windows),
+            'test_trades': int(windows['test_trades'].sum()),
+            # Every window starts with the full wallet: profits add up, they don't compound
+            'test_profit': windows['test_profit'].sum(),
+            'test_profit_abs': windows['test_profit_abs'].sum(),
+            'profitable_windows': (windows['test_profit'] > 0).mean(),
+            'worst_window': windows['test_profit'].min(),
+            'max_drawdown': windows['test_drawdown'].max(),
+            'efficiency': test_rate / train_rate if train_rate > 0 else np.nan,
+            'current_profit': windows['current_profit'].sum(),
+        })
+    return summary
+
+
+def print_table(rows: list, columns: tuple, summary: str) -> None:
+    tabular = [[fmt.format(row[column]) if row.get(column) is not None and not pd.isna(row[column]) else ''
+                for column, _, fmt in columns] for row in rows]
+    print_rich_table(tabular, [header for _, header, _ in columns], summary=summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--userdir', type=Path, default=Path('user_data'))
+    parser.add_argument('--strategies', nargs='+', default=list(STRATEGIES))
+    parser.add_argument('--extra-config', type=Path, nargs='+', default=[],
+                        help='Configs layered on top of every strategy config')
+    parser.add_argument('--datadir', type=Path)
+    parser.add_argument('--timeframe')
+    parser.add_argument('--timerange', help='Whole walk-forward range, default: all available data')
+    parser.add_argument('--stake-amount')
+    parser.add_argument('--train-days', type=float, default=90.0)
+    parser.add_argument('--test-days', type=float, default=30.0)
+    parser.add_argument('--step-days', type=float, help='Default: --test-days (adjacent test windows)')
+    parser.add_argument('--epochs', type=int, default=100, help='Parameter sets per train window')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--hyperopt-loss', help=f'Default: the config\'s hyperopt_loss, {DEFAULT_LOSS} otherwise')
+    parser.add_argument('--min-trades', type=int, default=1, help='Fewer trades in a train window: max loss')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='Worker processes')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s: %(message)s')
+
+    start = time.perf_counter()
+    train, test = timedelta(days=args.train_days), timedelta(days=args.test_days)
+    step = timedelta(days=args.step_days or args.test_days)
+    jobs = []
+    for name in args.strategies:
+        config = strategy_config(name, args)
+        # The freqtrade modules log every configuration step, once per window
+        logging.getLogger('freqtrade').setLevel(logging.WARNING)
+        analyzing = time.perf_counter()
+        _SHARED[name] = analyze_once(config)
+        windows = build_windows(_SHARED[name]['analyzed'], _SHARED[name]['startup'], config['timeframe'],
+                                train, test, step)
+        logger.info('%s: indicators of %d pairs computed once in %.2fs for %d windows', name,
+                    len(_SHARED[name]['analyzed']), time.perf_counter() - analyzing, len(windows))
+        jobs += [(name, index, window) for index, window in enumerate(windows, start=1)]
+    if not jobs:
+        raise SystemExit(f'No window of {args.train_days:g}+{args.test_days:g} days in the data')
+
+    rows = []
+    workers = max(1, min(args.jobs, len(jobs)))
+    logger.info('Optimizing %d train windows x %d epochs on %d workers', len(jobs), args.epochs, workers)
+    # fork: the workers inherit _SHARED without pickling or recomputing the analyzed frames
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as executor:
+        futures = {executor.submit(run_window, *job, args.epochs, args.seed): job for job in jobs}
+        for future in as_completed(futures):
+            name, index, _ = futures[future]
+            try:
+                rows.append(future.result())
+            except Exception:
+                logger.exception('Walk-forward window failed: %s #%d', name, index)
+                continue
+            logger.info('Done %(strategy)s #%(window)d in %(seconds).1fs: train %(train)s, test %(test)s, '
+                        'best %(params)s', rows[-1])
+
+    rows.sort(key=lambda row: (row['strategy'], row['window']))
+    summary = summarize(rows) if rows else []
+    print_table(rows, WINDOW_COLUMNS, 'WALK-FORWARD WINDOWS')
+    print_table(summary, SUMMARY_COLUMNS, 'OUT-OF-SAMPLE SUMMARY')
+    wall = time.perf_counter() - start
+    slowest = max((row['seconds'] for row in rows), default=0.0)
+    print(f'{len(rows)}/{len(jobs)} windows in {wall:.1f}s wall clock (slowest window {slowest:.1f}s, '
+          f'{workers} workers)')
+
+    output = args.userdir / 'backtest_results' / f'walk-forward-{datetime.now(timezone.utc):%Y-%m-%d_%H-%M-%S}'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.with_suffix('.json').write_text(json.dumps({'windows': rows, 'summary': summary}, indent=2, default=str))
+    pd.DataFrame(rows).drop(columns='best_params', errors='ignore').to_csv(output.with_suffix('.csv'), index=False)
+    print(f'Windows and summary written to {output}.json/.csv')
+
+
+if __name__ == '__main__':
+    main()
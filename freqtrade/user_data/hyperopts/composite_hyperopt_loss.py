@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import numpy as np
+from pandas import DataFrame
+
+from freqtrade.constants import Config
+from freqtrade.optimize.hyperopt import IHyperOptLoss
+
+from hyperopt_metrics import multi_metric_loss, trade_metrics
+
+
+# Weights of the risk adjusted ratios in CompositeMetricsHyperOptLoss
+SHARPE_WEIGHT = 1.0
+SORTINO_WEIGHT = 0.5
+CALMAR_WEIGHT = 0.5
+# Ratios are clipped, so a run without losing trades (infinite sortino) can't dominate
+MAX_RATIO = 20.0
+# Below this amount of trades the loss is scaled down linearly (at least 10%)
+TARGET_TRADE_AMOUNT = 50
+
+
+def trade_count_penalty(trade_count: int) -> float:
+    if trade_count >= TARGET_TRADE_AMOUNT:
+        return 1.0
+    return max(1 - (TARGET_TRADE_AMOUNT - trade_count) / TARGET_TRADE_AMOUNT, 0.1)
+
+
+class CompositeMetricsHyperOptLoss(IHyperOptLoss):
+    """
+    Weighted Sharpe, Sortino and Calmar ratios, scaled by the relative account drawdown and
+    a trade count penalty. All metrics come from one hyperopt_metrics.trade_metrics call.
+    """
+
+    @staticmethod
+    def hyperopt_loss_function(
+        results: DataFrame,
+        trade_count: int,
+        min_date: datetime,
+        max_date: datetime,
+        config: Config,
+        starting_balance: float,
+        *args,
+        **kwargs,
+    ) -> float:
+        """
+        Objective function, returns smaller number for better results
+        """
+        metrics = trade_metrics(results, min_date, max_date, starting_balance)
+        ratios = np.clip([metrics.sharpe, metrics.sortino, metrics.calmar], -MAX_RATIO, MAX_RATIO)
+        score = SHARPE_WEIGHT * ratios[0] + SORTINO_WEIGHT * ratios[1] + CALMAR_WEIGHT * ratios[2]
+        drawdown_factor = 1 - min(metrics.max_drawdown_relative, 1)
+        return -float(score) * drawdown_factor * trade_count_penalty(trade_count)
+
+
+class FastMultiMetricHyperOptLoss(IHyperOptLoss):
+    """
+    freqtrade's MultiMetricHyperOptLoss (profit, drawdown, profit factor, expectancy ratio,
+    winrate and trade count) on top of hyperopt_metrics, returning the same loss values.
+    """
+
+    @staticmethod
+    def hyperopt_loss_function(
+        results: DataFrame,
+        trade_count: int,
+        min_date: datetime,
+        max_date: datetime,
+        starting_balance: float,
+        *args,
+        **kwargs,
+    ) -> float:
+        """
+        Objective function, returns smaller number for better results
+        """
+        metrics = trade_metrics(results, min_date, max_date, starting_balance)
+        return multi_metric_loss(metrics, trade_count)
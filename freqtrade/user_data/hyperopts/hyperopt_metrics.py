@@ -0,0 +1,168 @@
+"""
+Vectorized trade metrics for hyperopt loss functions.
+
+Every loss in freqtrade.optimize.hyperopt_loss computes its statistics with separate pandas
+passes over the results frame (``calculate_sharpe``, ``calculate_max_drawdown``,
+``calculate_expectancy``, ...), and combining several of them repeats the work each epoch.
+``trade_metrics`` converts the needed ``results`` columns to NumPy arrays once and derives
+all common statistics from them, including the equity-curve drawdown. The values follow
+the definitions of freqtrade.data.metrics.
+"""
+from datetime import datetime
+from math import sqrt
+from typing import NamedTuple, Optional
+
+import numpy as np
+from pandas import DataFrame
+
+
+class TradeMetrics(NamedTuple):
+    trade_count: int
+    total_profit: float  # Sum of profit_abs
+    total_profit_ratio: float  # Sum of profit_ratio
+    mean_duration: float  # Mean trade_duration in minutes
+    winning_trades: int
+    losing_trades: int
+    winrate: float
+    gross_profit: float  # Sum of the winning trades' profit_abs
+    gross_loss: float  # Absolute sum of the losing trades' profit_abs
+    profit_factor: float  # gross_profit / gross_loss (inf without losses)
+    expectancy: float
+    expectancy_ratio: float
+    sharpe: float
+    sortino: float
+    calmar: float
+    max_drawdown_abs: float
+    max_drawdown_relative: float  # Relative account drawdown at the max absolute drawdown
+
+
+EMPTY_METRICS = TradeMetrics(
+    trade_count=0, total_profit=0.0, total_profit_ratio=0.0, mean_duration=0.0, winning_trades=0,
+    losing_trades=0, winrate=0.0, gross_profit=0.0, gross_loss=0.0, profit_factor=0.0, expectancy=0.0,
+    expectancy_ratio=100.0, sharpe=0.0, sortino=0.0, calmar=0.0, max_drawdown_abs=0.0,
+    max_drawdown_relative=0.0,
+)
+
+
+def annualized_ratio(expected_returns_mean: float, denominator: float, annualization_factor: int = 365) -> float:
+    """Same as freqtrade's ``_calculate_annualized_ratio`` (-100 for a zero/NaN denominator)."""
+    if denominator != 0 and not np.isnan(denominator):
+        return float(expected_returns_mean / denominator * sqrt(annualization_factor))
+    return -100.0
+
+
+def max_drawdown(profit: np.ndarray, starting_balance: float) -> tuple[float, float]:
+    """
+    Absolute and relative account drawdown of the equity curve of ``profit`` (in close order).
+
+    Same values as ``calculate_max_drawdown(...).drawdown_abs`` and
+    ``.relative_account_drawdown``, including its leading zero row.
+    """
+    cumulative = np.empty(len(profit) + 1)
+    cumulative[0] = 0.0
+    np.cumsum(profit, out=cumulative[1:])
+    high = np.maximum.accumulate(cumulative)
+    np.maximum(high, 0, out=high)
+    drawdown = cumulative - high
+    low = int(np.argmin(drawdown))
+    if starting_balance:
+        relative = (high[low] - cumulative[low]) / (starting_balance + high[low])
+    elif high[low]:
+        relative = (high[low] - cumulative[low]) / high[low]
+    else:
+        # Without profits before the low, pandas divides by a zero high value
+        relative = 0.0 if low == 0 else np.inf
+    return abs(float(drawdown[low])), float(relative)
+
+
+def trade_metrics(results: DataFrame, min_date: Optional[datetime], max_date: Optional[datetime],
+                  starting_balance: float) -> TradeMetrics:
+    """
+    Computes all TradeMetrics of a backtest results frame.
+
+    Args:
+        results (DataFrame): Hyperopt/backtest trades with profit_abs, profit_ratio,
+            trade_duration and close_date columns.
+        min_date (datetime): Start of the backtest period.
+        max_date (datetime): End of the backtest period.
+        starting_balance (float): Starting balance of the backtest wallet.
+
+    Returns:
+        TradeMetrics: Metrics of the trades (EMPTY_METRICS without trades).
+    """
+    trade_count = len(results)
+    if trade_count == 0:
+        return EMPTY_METRICS
+
+    profit = results['profit_abs'].to_numpy(dtype=np.float64)
+    close_dates = results['close_date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    # The equity curve is in close order, sorted like DataFrame.sort_values('close_date')
+    in_close_order = profit[np.argsort(close_dates, kind='quicksort')]
+
+    wins = profit > 0
+    losses = profit < 0
+    winning_trades = int(np.count_nonzero(wins))
+    losing_trades = int(np.count_nonzero(losses))
+    profit_sum = float(profit[wins].sum())
+    loss_sum = abs(float(profit[losses].sum()))
+    total_profit = float(profit.sum())
+
+    average_win = profit_sum / winning_trades if winning_trades else 0
+    average_loss = loss_sum / losing_trades if losing_trades else 0
+    winrate = winning_trades / trade_count
+    expectancy = winrate * average_win - (losing_trades / trade_count) * average_loss
+    expectancy_ratio = (1 + average_win / average_loss) * winrate - 1 if average_loss > 0 else 100.0
+
+    drawdown_abs, drawdown_relative = max_drawdown(in_close_order, starting_balance)
+
+    if min_date is None or max_date is None or min_date == max_date:
+        sharpe = sortino = calmar = 0.0
+    else:
+        days_period = max(1, (max_date - min_date).days)
+        returns = profit / starting_balance
+        expected_returns_mean = returns.sum() / days_period
+        sharpe = annualized_ratio(expected_returns_mean, returns.std())
+        sortino = annualized_ratio(expected_returns_mean, returns[losses].std() if losing_trades else np.nan)
+        calmar = annualized_ratio(total_profit / starting_balance / days_period * 100, drawdown_relative)
+
+    return TradeMetrics(
+        trade_count=trade_count,
+        total_profit=total_profit,
+        total_profit_ratio=float(results['profit_ratio'].to_numpy(dtype=np.float64).sum()),
+        mean_duration=float(results['trade_duration'].to_numpy(dtype=np.float64).mean()),
+        winning_trades=winning_trades,
+        losing_trades=losing_trades,
+        winrate=winrate,
+        gross_profit=profit_sum,
+        gross_loss=loss_sum,
+        profit_factor=profit_sum / loss_sum if loss_sum else np.inf,
+        expectancy=expectancy,
+        expectancy_ratio=expectancy_ratio,
+        sharpe=sharpe,
+        sortino=sortino,
+        calmar=calmar,
+        max_drawdown_abs=drawdown_abs,
+        max_drawdown_relative=drawdown_relative,
+    )
+
+
+def multi_metric_loss(metrics: TradeMetrics, trade_count: int, drawdown_mult: float = 0.055,
+                      expectancy_const: float = 2.0, pf_const: float = 1.0, winrate_const: float = 1.2,
+                      target_trade_amount: int = 50) -> float:
+    """
+    freqtrade's MultiMetricHyperOptLoss value (with its default constants) from TradeMetrics.
+    """
+    profit_factor = metrics.gross_profit / (metrics.gross_loss + 1e-6)
+    trade_count_penalty = 1.0
+    if trade_count < target_trade_amount:
+        trade_count_penalty = max(1 - abs(trade_count - target_trade_amount) / target_trade_amount, 0.1)
+    profit_draw_function = metrics.total_profit - (
+        metrics.max_drawdown_relative * metrics.total_profit
+    ) * (1 - drawdown_mult)
+    return -1 * float(
+        profit_draw_function
+        * np.log(profit_factor + pf_const)
+        * np.log(min(10, metrics.expectancy_ratio) + expectancy_const)
+        * np.log(winrate_const + metrics.winrate)
+        * trade_count_penalty
+    )
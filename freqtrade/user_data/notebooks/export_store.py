@@ -0,0 +1,368 @@
+"""
+Partitioned Parquet store of backtest exports, queried in bounded memory.
+
+``load_backtest_data`` / ``load_backtest_analysis_data`` load a whole export (every trade and,
+with ``--export signals``, every signal, rejected and exit candle of every pair) into pandas.
+``convert_exports`` converts each export once into hive-partitioned Parquet datasets::
+
+    <store>/trades/strategy=<name>/pair=<pair>/month=<YYYY-MM>/<run>-<n>.parquet
+    <store>/signals/...   <store>/rejected/...   <store>/exited/...
+
+where ``run`` is the export's file name (also a column, to select or compare runs). Pairs are
+URI-encoded in the directory names (``BTC%2FUSDT%3AUSDT``) and decoded when read.
+
+The queries (``pair_profit``, ``exit_reasons``, ``signal_latency``) read only the columns they
+need, skip the partitions excluded by their strategy/pair/date filters without opening them and
+aggregate batch by batch, so their memory does not grow with the size of the store.
+"""
+import json
+import logging
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from freqtrade.data.btanalysis import load_backtest_analysis_data, load_backtest_data, load_backtest_metadata
+from freqtrade.exchange import timeframe_to_minutes
+
+logger = logging.getLogger(__name__)
+
+TRADES = 'trades'
+CANDLE_KINDS = ('signals', 'rejected', 'exited')
+PARTITION_SCHEMA = pa.schema([('strategy', pa.string()), ('pair', pa.string()), ('month', pa.string())])
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor='hive')
+# Rows per Parquet row group, the unit read by one scan batch
+ROW_GROUP_SIZE = 64 * 1024
+MANIFEST = 'manifest.json'
+SCHEMA_FILE = '_common_metadata'
+
+
+def _date_column(kind: str) -> str:
+    return 'open_date' if kind == TRADES else 'date'
+
+
+def _export_files(results_dir: Path) -> list:
+    files = [path for path in Path(results_dir).glob('backtest-result-*.*')
+             if path.suffix == '.zip' or (path.suffix == '.json' and not path.name.endswith('.meta.json'))]
+    return sorted(files)
+
+
+def _utc(date) -> pd.Timestamp:
+    date = pd.Timestamp(date)
+    return date.tz_localize('UTC') if date.tzinfo is None else date
+
+
+def _read_manifest(store_dir: Path) -> dict:
+    try:
+        return json.loads((store_dir / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _entry_filled_ms(orders) -> float:
+    """Fill time (ms) of a trade's first entry order, NaN if unknown."""
+    for order in orders if isinstance(orders, list) else ():
+        if order.get('ft_is_entry') and order.get('order_filled_timestamp'):
+            return float(order['order_filled_timestamp'])
+    return np.nan
+
+
+def _write(kind_dir: Path, df: pd.DataFrame, run: str) -> None:
+    """Appends ``df`` (with strategy, pair and month columns) to the dataset of ``kind_dir``."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    ds.write_dataset(table, kind_dir, format='parquet', partitioning=PARTITIONING,
+                     basename_template=f'{run}-{{i}}.parquet', existing_data_behavior='overwrite_or_ignore',
+                     max_rows_per_group=ROW_GROUP_SIZE, min_rows_per_group=min(len(df), ROW_GROUP_SIZE))
+    # Columns differ between runs and strategies (indicators), the stored schema is their union
+    schema = table.schema.remove(table.schema.get_field_index('strategy'))
+    for column in ('pair', 'month'):
+        schema = schema.remove(schema.get_field_index(column))
+    path = kind_dir / SCHEMA_FILE
+    if path.exists():
+        schema = pa.unify_schemas([pq.read_schema(path), schema], promote_options='permissive')
+    pq.write_metadata(schema.remove_metadata(), path)
+
+
+def convert_export(path: Path, store_dir: Path) -> list:
+    """
+    Converts one backtest export (trades and, if exported, signal/rejected/exit candles).
+
+    Args:
+        path (Path): Export file (``backtest-result-<date>.zip``).
+        store_dir (Path): Store directory.
+
+    Returns:
+        list: Strategies of the export.
+    """
+    path, store_dir = Path(path), Path(store_dir)
+    run = path.stem
+    # Reconverting replaces all files of the run
+    for old in store_dir.glob(f'*/**/{run}-*.parquet'):
+        old.unlink()
+    metadata = load_backtest_metadata(path)
+    for strategy, meta in metadata.items():
+        trades = load_backtest_data(path, strategy=strategy)
+        if trades.empty:
+            continue
+        trades['entry_filled_date'] = pd.to_datetime(trades['orders'].map(_entry_filled_ms), unit='ms', utc=True)
+        trades = trades.drop(columns=['orders']).assign(
+            strategy=strategy, run=run, timeframe=meta['timeframe'],
+            month=trades['open_date'].dt.strftime('%Y-%m'))
+        _write(store_dir / TRADES, trades, run)
+
+    exported = zipfile.ZipFile(path).namelist() if path.suffix == '.zip' else None
+    for kind in CANDLE_KINDS:
+        if exported is not None and f'{run}_{kind}.pkl' not in exported:
+            # Exported without --export signals
+            continue
+        candles = load_backtest_analysis_data(path, kind)
+        for strategy, pairs in (candles or {}).items():
+            frames = [df.assign(strategy=strategy, pair=pair, run=run, month=df['date'].dt.strftime('%Y-%m'))
+                      for pair, df in pairs.items() if len(df)]
+            if frames:
+                _write(store_dir / kind, pd.concat(frames, ignore_index=True), run)
+            del frames
+        del candles
+    return list(metadata)
+
+
+def convert_exports(results_dir: Path, store_dir: Path, force: bool = False) -> list:
+    """
+    Converts the exports of ``results_dir`` not converted yet (or modified since).
+
+    Args:
+        results_dir (Path): ``user_data/backtest_results``.
+        store_dir (Path): Store directory.
+        force (bool): Reconvert every export.
+
+    Returns:
+        list: Names of the converted exports.
+    """
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {} if force else _read_manifest(store_dir)
+    converted = []
+    for path in _export_files(results_dir):
+        mtime = path.stat().st_mtime_ns
+        if manifest.get(path.stem, {}).get('mtime') == mtime:
+            continue
+        logger.info(f'Converting {path.name}')
+        strategies = convert_export(path, store_dir)
+        manifest[path.stem] = {'mtime': mtime, 'strategies': strategies}
+        (store_dir / MANIFEST).write_text(json.dumps(manifest, indent=1))
+        converted.append(path.stem)
+    return converted
+
+
+def list_runs(store_dir: Path) -> pd.DataFrame:
+    """Converted exports (``run``) with their strategies, oldest first."""
+    manifest = _read_manifest(Path(store_dir))
+    rows = [{'run': run, 'strategy': strategy} for run, entry in manifest.items() for strategy in entry['strategies']]
+    return pd.DataFrame(rows, columns=['run', 'strategy']).sort_values('run', ignore_index=True)
+
+
+def open_dataset(store_dir: Path, kind: str = TRADES) -> ds.Dataset:
+    """The ``kind`` dataset (trades, signals, rejected or exited) of the store."""
+    kind_dir = Path(store_dir) / kind
+    schema = pq.read_schema(kind_dir / SCHEMA_FILE)
+    for field in PARTITION_SCHEMA:
+        schema = schema.append(field)
+    return ds.dataset(kind_dir, schema=schema, format='parquet', partitioning=PARTITIONING)
+
+
+def build_filter(kind: str = TRADES, strategies=None, pairs=None, runs=None, start=None, end=None):
+    """
+    Dataset filter of the common query arguments.
+
+    Strategy, pair and month (from ``start``/``end``) are partition keys, so non-matching
+    partitions are never opened. ``start``/``end`` filter the trades' ``open_date`` or the
+    candles' ``date`` (end exclusive).
+    """
+    expressions = []
+    for field, values in (('strategy', strategies), ('pair', pairs), ('run', runs)):
+        if values is not None:
+            values = [values] if isinstance(values, str) else list(values)
+            expressions.append(ds.field(field).isin(values))
+    date = ds.field(_date_column(kind))
+    if start is not None:
+        start = _utc(start)
+        expressions += [ds.field('month') >= start.strftime('%Y-%m'), date >= start.to_pydatetime()]
+    if end is not None:
+        end = _utc(end)
+        expressions += [ds.field('month') <= end.strftime('%Y-%m'), date < end.to_pydatetime()]
+    expression = None
+    for part in expressions:
+        expression = part if expression is None else expression & part
+    return expression
+
+
+def scan(store_dir: Path, kind: str = TRADES, columns=None, batch_size: int = ROW_GROUP_SIZE, **filters):
+    """
+    Yields the matching rows of the ``kind`` dataset as ``pyarrow.RecordBatch``.
+
+    Args:
+        store_dir (Path): Store directory.
+        kind (str): trades, signals, rejected or exited.
+        columns (list): Columns to read (all if None).
+        batch_size (int): Maximum rows per batch.
+        **filters: strategies, pairs, runs, start, end (see build_filter).
+    """
+    dataset = open_dataset(store_dir, kind)
+    yield from dataset.to_batches(columns=columns, filter=build_filter(kind, **filters), batch_size=batch_size)
+
+
+def _stream_sums(batches, keys: list, derive) -> pd.DataFrame:
+    """
+    Sums per ``keys`` group over all batches, holding one batch and the running sums.
+
+    ``derive(table)`` returns ``{name: array}`` of the per-row values to sum.
+    """
+    totals = None
+    for batch in batches:
+        if not batch.num_rows:
+            continue
+        table = pa.Table.from_batches([batch])
+        values = derive(table)
+        grouped = pa.table({**{key: table[key] for key in keys}, **values})
+        partial = grouped.group_by(keys).aggregate([(name, 'sum') for name in values]).to_pandas()
+        partial.columns = [column.removesuffix('_sum') for column in partial.columns]
+        totals = partial if totals is None else pd.concat([totals, partial]).groupby(keys, as_index=False).sum()
+    return totals
+
+
+def _trade_sums(table: pa.Table) -> dict:
+    return {
+        'trades': pa.array(np.ones(table.num_rows, dtype=np.int64)),
+        'wins': pc.cast(pc.greater(table['profit_abs'], 0), pa.int64()),
+        'profit_abs': table['profit_abs'],
+        'profit_ratio': table['profit_ratio'],
+        'duration': table['trade_duration'],
+    }
+
+
+def _trade_summary(totals, keys: list) -> pd.DataFrame:
+    if totals is None:
+        return pd.DataFrame(columns=keys + ['trades', 'wins', 'profit_abs', 'profit_mean', 'winrate', 'avg_duration'])
+    totals['profit_mean'] = totals['profit_ratio'] / totals['trades']
+    totals['winrate'] = totals['wins'] / totals['trades']
+    totals['avg_duration'] = totals['duration'] / totals['trades']
+    return totals.drop(columns=['profit_ratio', 'duration'])
+
+
+def pair_profit(store_dir: Path, **filters) -> pd.DataFrame:
+    """
+    Trades, wins, total profit, mean profit ratio, winrate and average duration (minutes)
+    per strategy and pair, most profitable first.
+
+    Args:
+        store_dir (Path): Store directory.
+        **filters: strategies, pairs, runs, start, end (see build_filter).
+    """
+    keys = ['strategy', 'pair']
+    columns = keys + ['profit_abs', 'profit_ratio', 'trade_duration']
+    totals = _stream_sums(scan(store_dir, TRADES, columns, **filters), keys, _trade_sums)
+    summary = _trade_summary(totals, keys)
+    return summary.sort_values(['strategy', 'profit_abs'], ascending=[True, False], ignore_index=True)
+
+
+def exit_reasons(store_dir: Path, by_pair: bool = False, **filters) -> pd.DataFrame:
+    """
+    Trades, wins, total profit, mean profit ratio, winrate and average duration (minutes)
+    per strategy and exit reason (and pair with ``by_pair``), most frequent first.
+
+    Args:
+        store_dir (Path): Store directory.
+        by_pair (bool): Break the exit reasons down per pair.
+        **filters: strategies, pairs, runs, start, end (see build_filter).
+    """
+    keys = ['strategy'] + (['pair'] if by_pair else []) + ['exit_reason']
+    columns = keys + ['profit_abs', 'profit_ratio', 'trade_duration']
+    totals = _stream_sums(scan(store_dir, TRADES, columns, **filters), keys, _trade_sums)
+    summary = _trade_summary(totals, keys)
+    return summary.sort_values(keys[:-1] + ['trades'], ascending=[True] * (len(keys) - 1) + [False],
+                               ignore_index=True)
+
+
+def _partitions(dataset: ds.Dataset, expression) -> list:
+    """Distinct (strategy, pair) partitions matching ``expression``, from the file paths only."""
+    partitions = set()
+    for fragment in dataset.get_fragments(filter=expression):
+        keys = ds.get_partition_keys(fragment.partition_expression)
+        partitions.add((keys['strategy'], keys['pair']))
+    return sorted(partitions)
+
+
+def signal_latency(store_dir: Path, **filters) -> pd.DataFrame:
+    """
+    Time from the close of each trade's signal candle to its entry, per strategy and pair.
+
+    Every trade is matched with the last signal candle before its open date (as freqtrade
+    exports them, ``--export signals``) of the same run. ``entry_latency`` is the time from the
+    signal candle's close to the trade's open (the next candle's open, or later with
+    ``timeframe_detail`` / custom entries), ``fill_latency`` until its entry order was filled
+    (limit orders may wait several candles). Both in minutes. ``rejected`` counts the signals
+    that were not entered (max_open_trades, confirm_trade_entry, ...). Trades of runs exported
+    without signals stay unmatched (``trades`` - ``matched``).
+
+    One strategy/pair partition is loaded at a time.
+
+    Args:
+        store_dir (Path): Store directory.
+        **filters: strategies, pairs, runs, start, end (see build_filter).
+    """
+    trades_dataset = open_dataset(store_dir, TRADES)
+    signals_dataset = open_dataset(store_dir, 'signals')
+    rejected = None
+    if (Path(store_dir) / 'rejected' / SCHEMA_FILE).exists():
+        totals = _stream_sums(
+            scan(store_dir, 'rejected', ['strategy', 'pair'], **filters), ['strategy', 'pair'],
+            lambda table: {'rejected': pa.array(np.ones(table.num_rows, dtype=np.int64))})
+        rejected = totals.set_index(['strategy', 'pair'])['rejected'] if totals is not None else None
+
+    # Signal candles are up to a candle older than the trade, read them from a week earlier
+    signal_filters = dict(filters)
+    if filters.get('start') is not None:
+        signal_filters['start'] = pd.Timestamp(filters['start']) - pd.Timedelta(days=7)
+
+    rows = []
+    for strategy, pair in _partitions(trades_dataset, build_filter(TRADES, **filters)):
+        partition = {'strategies': strategy, 'pairs': pair}
+        trades = trades_dataset.to_table(
+            columns=['run', 'timeframe', 'open_date', 'entry_filled_date'],
+            filter=build_filter(TRADES, **{**filters, **partition})).to_pandas()
+        if trades.empty:
+            # Partitions only hold other runs
+            continue
+        signals = signals_dataset.to_table(
+            columns=['run', 'date'],
+            filter=build_filter('signals', **{**signal_filters, **partition})).to_pandas()
+        row = {'strategy': strategy, 'pair': pair, 'trades': len(trades), 'matched': 0}
+        if len(signals):
+            trades = trades.astype({'open_date': 'datetime64[us, UTC]'}).sort_values('open_date')
+            signals = signals.astype({'date': 'datetime64[us, UTC]'}).sort_values('date')
+            signals = signals.rename(columns={'date': 'signal_date'})
+            matched = pd.merge_asof(trades, signals, left_on='open_date', right_on='signal_date', by='run',
+                                    allow_exact_matches=False).dropna(subset=['signal_date'])
+            candle = pd.to_timedelta(matched['timeframe'].map(timeframe_to_minutes), unit='min')
+            signal_close = matched['signal_date'] + candle
+            entry = (matched['open_date'] - signal_close).dt.total_seconds() / 60
+            fill = (matched['entry_filled_date'] - signal_close).dt.total_seconds() / 60
+            row.update({
+                'matched': len(matched),
+                'entry_latency_mean': entry.mean(),
+                'entry_latency_max': entry.max(),
+                'fill_latency_mean': fill.mean(),
+                'fill_latency_median': fill.median(),
+                'fill_latency_p90': fill.quantile(0.9),
+                'fill_latency_max': fill.max(),
+                'fill_latency_candles': (fill / candle.dt.total_seconds() * 60).mean(),
+            })
+        if rejected is not None:
+            row['rejected'] = int(rejected.get((strategy, pair), 0))
+        rows.append(row)
+    return pd.DataFrame(rows)
@@ -1,8 +1,20 @@
 # https://jesse.trade/strategies/kama-trendfollowing
 import datetime
-from freqtrade.strategy import IStrategy, IntParameter, DecimalParameter
+import functools
+import time
+from freqtrade.strategy import IStrategy, IntParameter, DecimalParameter, timeframe_to_msecs
 from pandas import DataFrame
-import ta
+import numpy as np
+import pandas as pd
+
+from compact_frames import SIGNAL_DTYPE, FrameMemoryReport, compact_frame, frame_nbytes
+from incremental_indicators import KamaIndicatorState
+from indicator_engine import engine
+from profiling import profiled, profiler
+from shared_frames import frame_store
+from signal_engine import Param, SignalRules, apply_signals
+from signal_latency import latency_stage, signal_latency
+from snapshot_store import AtrSnapshotStore
 
 class KamaStrategy(IStrategy):
     """
@@ -21,14 +33,28 @@ class KamaStrategy(IStrategy):
         use_exit_signal (bool): Use sell signal logic.
         exit_profit_only (bool): Only sell if profitable.
         ignore_buying_expired_candle_after (int): Ignore buying after N candles.
+        use_incremental_indicators (bool): In live/dry-run, update indicators per new candle
+            from per-pair state instead of recomputing the whole dataframe.
+        use_compact_frames (bool): Store indicator columns as float32 and signal columns as int8,
+            for large pair universes (see compact_frames).
+        use_shared_frames (bool): Opt-in, in hyperopt: publish the analyzed dataframes to shared memory
+            once, so the workers attach them instead of loading a copy per epoch (see shared_frames).
+        track_signal_latency (bool): In live/dry-run, record the candle close to entry/exit signal
+            latency per pair and flag loop iterations longer than process_throttle_secs (see signal_latency).
+        atr_stoploss_multiplier (float): ATR multiple below the entry rate for the 'atr_stoploss' exit.
+        atr_takeprofit_multiplier (float): ATR multiple above the entry rate for the 'atr_takeprofit' exit.
         kama_window (IntParameter): Window size for KAMA calculation.
         adx_threshold (IntParameter): ADX threshold for trend strength.
         chop_threshold (IntParameter): Choppiness Index threshold for trendiness.
         bb_width_threshold (DecimalParameter): Bollinger Band width threshold.
 
     Methods:
+        bot_loop_start(current_time):
+            Times the loop iterations for the signal latency tracking (see track_signal_latency).
+
         populate_indicators(df, metadata):
             Adds KAMA, ADX, Choppiness Index, Bollinger Band width, ATR, and long-term KAMA indicators to the dataframe.
+            Uses incremental per-pair updates in live/dry-run mode (see use_incremental_indicators).
 
         populate_buy_trend(df, metadata):
             Sets buy signal when close is above KAMA and long-term KAMA, ADX and trendiness thresholds are met,
@@ -39,7 +65,7 @@ class KamaStrategy(IStrategy):
             and Bollinger Band width is below threshold.
 
         custom_exit(pair, trade, current_time, current_rate, current_profit, **kwargs):
-            (Optional) Example placeholder for ATR-based custom sell logic.
+            ATR-based stoploss/take profit exits, read from the per-pair last-candle snapshot in live mode.
     """
     INTERFACE_VERSION = 3
     # Enable shorting
@@ -56,15 +82,75 @@ class KamaStrategy(IStrategy):
     exit_profit_only = False
     ignore_buying_expired_candle_after = 0
 
+    # Live/dry-run only: O(1) indicator updates per new candle, full recompute on gaps or rewrites
+    use_incremental_indicators = True
+    # Opt-in: float32 indicators / int8 signals per analyzed dataframe, see compact
+    use_compact_frames = False
+    # Opt-in, hyperopt only: analyzed dataframes are mapped by the workers instead of copied, see shared_frames
+    use_shared_frames = False
+    # Live/dry-run only: candle close -> analyzed dataframe latency, see signal_latency
+    track_signal_latency = True
+
+    atr_stoploss_multiplier = 2
+    atr_takeprofit_multiplier = 3
+
     # timeframe = '30m'
-    # For multi-timeframe, you need to set this and implement populate_indicators accordingly
-    # informative_timeframes = {'4h': '4h'}
+    # Timeframe of the long-term KAMA, resampled from the strategy timeframe's candles
+    long_term_timeframe = '4h'
 
     kama_window = IntParameter(10, 50, default=30, space='buy')
     adx_threshold = IntParameter(40, 60, default=50, space='buy')
     chop_threshold = IntParameter(40, 60, default=50, space='buy')
     bb_width_threshold = DecimalParameter(0.01, 0.07, default=0.07, space='buy')
 
+    # 'kama'/'long_term_kama' are renamed to the epoch's kama_window arrays in hyperopt (see signal_masks)
+    signal_rules = SignalRules(
+        conditions={
+            'close_above_kama': ('close', '>', 'kama'),
+            'close_below_kama': ('close', '<', 'kama'),
+            'close_above_long_term_kama': ('close', '>', 'long_term_kama'),
+            'close_below_long_term_kama': ('close', '<', 'long_term_kama'),
+            'trending': ('adx', '>', Param('adx_threshold')),
+            'not_choppy': ('chop', '<', Param('chop_threshold')),
+            'narrow_bands': ('bb_width', '<', Param('bb_width_threshold', float)),
+        },
+        signals={
+            'enter_long': ['close_above_kama', 'trending', 'close_above_long_term_kama', 'not_choppy', 'narrow_bands'],
+            'enter_short': ['close_below_kama', 'trending', 'close_below_long_term_kama', 'not_choppy', 'narrow_bands'],
+            'exit_long': ['close_below_kama', 'trending', 'close_below_long_term_kama', 'not_choppy', 'narrow_bands'],
+            'exit_short': ['close_above_kama', 'trending', 'close_above_long_term_kama', 'not_choppy', 'narrow_bands'],
+        },
+    )
+
+    def __init__(self, config: dict) -> None:
+        super().__init__(config)
+        # Per-pair incremental indicator state, see populate_indicators_incremental
+        self._indicator_states: dict[str, KamaIndicatorState] = {}
+        # Last analyzed ATR per pair for custom_exit (live/dry-run only, see custom_exit)
+        self._atr_snapshots = AtrSnapshotStore(self.atr_stoploss_multiplier, self.atr_takeprofit_multiplier)
+        # Per-pair dataframe memory before/after compaction (use_compact_frames only)
+        self.memory_report = FrameMemoryReport(self.__class__.__name__)
+        # Step timings are exported to user_data/metrics (see profiling)
+        profiler.configure(config)
+        # Latencies are exported to user_data/metrics/signal_latency.json (see signal_latency)
+        signal_latency.configure(config)
+
+    @property
+    def signal_dtype(self):
+        """dtype of the enter/exit signal columns: int8 in compact mode, None (float NaN/1) otherwise."""
+        return SIGNAL_DTYPE if self.use_compact_frames else None
+
+    def is_live(self) -> bool:
+        """True in live and dry-run mode, where populate_indicators always sees the latest candles."""
+        return bool(self.dp) and self.dp.runmode.value in ('live', 'dry_run')
+
+    def bot_loop_start(self, current_time, **kwargs) -> None:
+        # Runs after the candles are refreshed and before the pairs are analyzed
+        if self.track_signal_latency and self.is_live():
+            signal_latency.loop_start()
+
+    @latency_stage('indicators')
+    @profiled('populate_indicators')
     def populate_indicators(self, df: DataFrame, metadata: dict) -> DataFrame:
         """
         Adds all required technical indicators to the dataframe for use in buy/sell logic.
@@ -75,47 +161,148 @@ class KamaStrategy(IStrategy):
             - Choppiness Index (custom implementation)
             - Bollinger Band width
             - ATR (Average True Range)
-            - Long-term KAMA (approximated by rolling mean of KAMA)
+            - Long-term KAMA (KAMA of the long_term_timeframe candles resampled from ``df``,
+              known from the candle that closes a long-term candle on, so no look-ahead;
+              NaN until kama_window long-term candles are complete)
+
+        In hyperopt, KAMA and long-term KAMA are left out: kama_window changes per epoch, the
+        signal methods read the epoch's window from the indicator engine (see window_columns).
 
         Args:
             df (DataFrame): The input DataFrame with OHLCV data.
-            metadata (dict): Additional information (not used here).
+            metadata (dict): Additional information, 'pair' is used as indicator cache key.
 
         Returns:
             DataFrame: The DataFrame with new indicator columns added.
         """
-        # Calculate KAMA (Kaufman's Adaptive Moving Average)
-        df['kama'] = ta.momentum.KAMAIndicator(df['close'], window=int(self.kama_window.value)).kama()
-        # Calculate ADX (Average Directional Index)
-        df['adx'] = ta.trend.ADXIndicator(df['high'], df['low'], df['close'], window=14).adx()
-        # Choppiness Index is not in ta, so we implement it
-        def choppiness(high, low, close, window=14):
-            # Calculate True Range (TR)
-            tr = ta.volatility.AverageTrueRange(high, low, close, window=1).average_true_range()
-            # Highest high and lowest low over the window
-            high_max = high.rolling(window).max()
-            low_min = low.rolling(window).min()
-            # Sum of TR over the window
-            sum_tr = tr.rolling(window).sum()
-            # Choppiness Index formula
-            chop = 100 * np.log10(sum_tr / (high_max - low_min)) / np.log10(window)
-            return chop
-        import numpy as np
-        # Calculate Choppiness Index
-        df['chop'] = choppiness(df['high'], df['low'], df['close'], window=14)
-        # Calculate Bollinger Band width
-        bb = ta.volatility.BollingerBands(df['close'], window=20, window_dev=2)
-        df['bb_width'] = (bb.bollinger_hband() - bb.bollinger_lband()) / df['close']
-        # Calculate ATR (Average True Range)
-        df['atr'] = ta.volatility.AverageTrueRange(df['high'], df['low'], df['close'], window=14).average_true_range()
-        # Calculate long-term KAMA as a rolling mean of KAMA (approximate higher timeframe trend)
-        df['long_term_kama'] = df['kama'].rolling(8).mean()  # Approximate 4h trend
+        if self.use_incremental_indicators and self.is_live():
+            return self.populate_indicators_incremental(df, metadata)
+
+        # Indicators come from the shared, memoized engine (see indicator_engine)
+        pair = metadata['pair']
+        # Hyperopt: freqtrade runs populate_indicators once per pair and every epoch loads its own
+        # copy of the analyzed dataframe, so columns for every kama_window would be loaded (and
+        # copied) per epoch. The signal methods compute the epoch's window instead (see window_columns).
+        hyperopt = len(self.kama_window.range) > 1
+        if not hyperopt:
+            # Calculate KAMA (Kaufman's Adaptive Moving Average), same values as ta.momentum.KAMAIndicator
+            df['kama'] = engine.compute('kama', df, pair, self.timeframe, window=int(self.kama_window.value))
+            # Long-term KAMA on the resampled long_term_timeframe candles (higher timeframe trend)
+            df['long_term_kama'] = self.long_term_kama(df, pair, int(self.kama_window.value))
+
+        # ATR, ADX and Choppiness Index share a single true range pass (same values as ta's
+        # ADXIndicator/AverageTrueRange and the TR-based Choppiness Index formula)
+        true_range = engine.compute('true_range', df, pair, self.timeframe, window=14, chop_window=14)
+        df['adx'] = true_range['adx']
+        df['chop'] = true_range['chop']
+        df['atr'] = true_range['atr']
+        # Calculate Bollinger Band width (same values as ta.volatility.BollingerBands)
+        bb = engine.compute('bollinger', df, pair, self.timeframe, window=20, stds=2)
+        df['bb_width'] = (bb['upper'] - bb['lower']) / df['close']
 
         # For tracking last trade index, Freqtrade doesn't support this natively in the dataframe
         # You can use custom logic in custom_buy/sell if needed
 
+        if self.is_live():
+            self._atr_snapshots.update_from_frame(pair, df)
+        df = self.compact(df, pair)
+        if hyperopt:
+            # Every epoch loads and copies this frame: consolidated once here (one block per
+            # dtype) instead of on every epoch's copy
+            df = df.copy()
+        if self.use_shared_frames and hyperopt:
+            df = frame_store.publish(df, pair)
         return df
 
+    def populate_indicators_incremental(self, df: DataFrame, metadata: dict) -> DataFrame:
+        """
+        Live/dry-run variant of populate_indicators producing the same columns.
+
+        Keeps a KamaIndicatorState per pair, so only candles that closed since the previous
+        call are processed. The state is rebuilt from the whole dataframe on the first call,
+        when kama_window changes, or when the candle history is gapped or rewritten.
+
+        Args:
+            df (DataFrame): The input DataFrame with OHLCV data.
+            metadata (dict): Additional information, 'pair' is used to select the state.
+
+        Returns:
+            DataFrame: The DataFrame with new indicator columns added.
+        """
+        window = int(self.kama_window.value)
+        state = self._indicator_states.get(metadata['pair'])
+        if state is None or state.kama_window != window:
+            state = self._indicator_states[metadata['pair']] = KamaIndicatorState(
+                window, long_term_ms=timeframe_to_msecs(self.long_term_timeframe))
+
+        start = time.perf_counter()
+        columns = state.update_frame(
+            df['date'].values.astype('datetime64[ms]').astype('int64'),
+            df['high'].to_numpy(dtype='float64'),
+            df['low'].to_numpy(dtype='float64'),
+            df['close'].to_numpy(dtype='float64'),
+            timeframe_to_msecs(self.timeframe),
+        )
+        if profiler.enabled:
+            profiler.record('indicator.kama_incremental', metadata['pair'], time.perf_counter() - start, len(df))
+        if not any(name in df.columns for name in columns):
+            # One block insert instead of a column-by-column __setitem__ (dominates the runtime here)
+            df = pd.concat([df, DataFrame(columns, index=df.index)], axis=1)
+        else:
+            for name, values in columns.items():
+                df[name] = values
+        self._atr_snapshots.update_from_frame(metadata['pair'], df)
+        return self.compact(df, metadata['pair'])
+
+    def long_term_kama(self, df: DataFrame, pair: str, window: int):
+        """KAMA(``window``) of the long_term_timeframe candles, aligned with ``df``'s candles."""
+        return engine.compute('resampled_kama', df, pair, self.timeframe, window=window,
+                              higher_timeframe=self.long_term_timeframe, candle_timeframe=self.timeframe)
+
+    def compact(self, df: DataFrame, pair: str) -> DataFrame:
+        """
+        Compact mode: returns the analyzed dataframe with float32 indicator columns and records
+        its memory before/after in memory_report. Returns ``df`` unchanged otherwise.
+        """
+        if not self.use_compact_frames:
+            return df
+        before = frame_nbytes(df)
+        df = compact_frame(df)
+        self.memory_report.record(pair, len(df), before, frame_nbytes(df))
+        return df
+
+    def window_columns(self, df: DataFrame, pair: str, window: int) -> dict:
+        """
+        KAMA and long-term KAMA of ``window`` for a hyperopt dataframe (analyzed without them):
+        ``{'kama_<window>': values, 'long_term_kama_<window>': values}``.
+
+        The engine memoizes them per pair and window, so each process computes a window once
+        and later epochs sampling it reuse the arrays. float32 in compact mode, like the
+        analyzed columns.
+        """
+        columns = {f'kama_{window}': engine.compute('kama', df, pair, self.timeframe, window=window),
+                   f'long_term_kama_{window}': self.long_term_kama(df, pair, window)}
+        if self.use_compact_frames:
+            columns = {name: values.astype(np.float32) for name, values in columns.items()}
+        return columns
+
+    def signal_masks(self, df: DataFrame, metadata: dict) -> dict:
+        """
+        Boolean masks of all entry/exit signals, see signal_rules.
+
+        Every comparison is evaluated once for all four signals, and the result is reused by
+        the populate_*_trend calls on the same dataframe.
+        """
+        if 'kama' in df.columns:
+            return self.signal_rules.evaluate(df, self)
+        # Hyperopt: only the epoch's kama_window is read, see populate_indicators
+        pair = metadata['pair']
+        window = int(self.kama_window.value)
+        aliases = {'kama': f'kama_{window}', 'long_term_kama': f'long_term_kama_{window}'}
+        return self.signal_rules.evaluate(df, self, aliases,
+                                          columns=functools.partial(self.window_columns, df, pair, window))
+
+    @profiled('populate_entry_trend')
     def populate_entry_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
         """
         Populates the 'enter_long' signal in the DataFrame based on custom trading conditions for Long positions.
@@ -139,20 +326,10 @@ class KamaStrategy(IStrategy):
         Returns:
             DataFrame: The DataFrame with the 'enter_long' column updated according to the strategy's buy conditions.
         """
-        df.loc[
-            (
-                (df['close'] > df['kama']) &
-                (df['adx'] > self.adx_threshold.value) &
-                (df['close'] > df['long_term_kama']) &
-                (df['chop'] < self.chop_threshold.value) &
-                (df['bb_width'] < float(self.bb_width_threshold.value))
-                # No direct way to check "at least 10 candles since last trade" in Freqtrade
-            ),
-            'enter_long'
-        ] = 1
-        
-        return df
+        # No direct way to check "at least 10 candles since last trade" in Freqtrade
+        return apply_signals(df, self.signal_masks(df, metadata), ['enter_long'], self.signal_dtype)
 
+    @profiled('populate_short_trend')
     def populate_short_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
         """
         Populates the 'enter_short' signal in the DataFrame based on custom trading conditions for Short positions.
@@ -172,18 +349,10 @@ class KamaStrategy(IStrategy):
         Returns:
             DataFrame: The DataFrame with the 'enter_short' column updated according to the strategy's short conditions.
         """
-        df.loc[
-            (
-                (df['close'] < df['kama']) &
-                (df['adx'] > self.adx_threshold.value) &
-                (df['close'] < df['long_term_kama']) &
-                (df['chop'] < self.chop_threshold.value) &
-                (df['bb_width'] < float(self.bb_width_threshold.value))
-            ),
-            'enter_short'
-        ] = 1
-        return df
+        return apply_signals(df, self.signal_masks(df, metadata), ['enter_short'], self.signal_dtype)
 
+    @latency_stage('signal')
+    @profiled('populate_exit_trend')
     def populate_exit_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
         """
         Populates the 'exit_long' and 'exit_short' signals in the DataFrame based on multiple technical indicators.
@@ -203,57 +372,40 @@ class KamaStrategy(IStrategy):
         Returns:
             DataFrame: The input DataFrame with the 'exit_long' and 'exit_short' columns updated where the exit conditions are met.
         """
-        # Exit long positions
-        df.loc[
-            (
-                (df['close'] < df['kama']) &
-                (df['adx'] > self.adx_threshold.value) &
-                (df['close'] < df['long_term_kama']) &
-                (df['chop'] < self.chop_threshold.value) &
-                (df['bb_width'] < float(self.bb_width_threshold.value))
-            ),
-            'exit_long'
-        ] = 1
-        
-        # Exit short positions (opposite conditions)
-        df.loc[
-            (
-                (df['close'] > df['kama']) &
-                (df['adx'] > self.adx_threshold.value) &
-                (df['close'] > df['long_term_kama']) &
-                (df['chop'] < self.chop_threshold.value) &
-                (df['bb_width'] < float(self.bb_width_threshold.value))
-            ),
-            'exit_short'
-        ] = 1
-        
-        return df
+        return apply_signals(df, self.signal_masks(df, metadata), ['exit_long', 'exit_short'], self.signal_dtype)
 
     # ATR-based stoploss/takeprofit is not natively supported in Freqtrade, but you can use custom_stoploss
     # or custom_exit for advanced logic if needed.
 
     def custom_exit(self, pair: str, trade, current_time, current_rate, current_profit, **kwargs):
         # Example: ATR-based take profit/stoploss (not exactly like Jesse, but similar)
-        # You can access indicators via self.dp.get_analyzed_dataframe(pair, self.timeframe)
-        df_tuple = self.dp.get_analyzed_dataframe(pair, self.timeframe)
-        if df_tuple is None or trade is None:
+        if trade is None:
             return None
 
-        df = df_tuple[0] if isinstance(df_tuple, tuple) else df_tuple
-        if df is None or len(df) == 0:
-            return None
-
-        # Find the current candle
-        last_candle = df.iloc[-1]
-        atr = last_candle.get('atr', None)
-        if atr is None:
-            return None
+        # Live/dry-run: populate_indicators stored the last analyzed candle's ATR bands for the pair
+        snapshot = self._atr_snapshots.get(pair)
+        if snapshot is None:
+            # Backtesting/hyperopt: the analyzed dataframe is sliced to the current candle
+            snapshot = self._snapshot_from_dataframe(pair)
+            if snapshot is None:
+                return None
 
         # Example logic: Sell if price drops below entry - 2*ATR (trailing stop)
-        if current_rate < (trade.open_rate - 2 * atr):
+        if current_rate < (trade.open_rate - snapshot.stop_distance):
             return 'atr_stoploss'
 
         # Example logic: Take profit if price exceeds entry + 3*ATR
-        if current_rate > (trade.open_rate + 3 * atr):
+        if current_rate > (trade.open_rate + snapshot.target_distance):
             return 'atr_takeprofit'
         return None
+
+    def _snapshot_from_dataframe(self, pair: str):
+        """Builds the ATR snapshot from the last row of the analyzed dataframe, None if unavailable."""
+        df_tuple = self.dp.get_analyzed_dataframe(pair, self.timeframe)
+        if df_tuple is None:
+            return None
+
+        df = df_tuple[0] if isinstance(df_tuple, tuple) else df_tuple
+        if df is None or len(df) == 0 or 'atr' not in df:
+            return None
+        return self._atr_snapshots.snapshot(None, df['atr'].iat[-1])
@@ -35,6 +35,13 @@ from freqtrade.strategy import (
 import talib.abstract as ta
 from technical import qtpylib
 
+from compact_frames import SIGNAL_DTYPE, FrameMemoryReport, compact_frame, frame_nbytes
+from indicator_engine import engine
+from indicator_registry import IndicatorRegistry, plot_config_columns
+from orderbook_cache import OrderBookCache
+from profiling import profiled, profiler
+from signal_engine import Param, Shift, SignalRules, apply_signals
+
 
 # This class is a sample. Feel free to customize it.
 class SampleStrategy(IStrategy):
@@ -98,6 +105,44 @@ class SampleStrategy(IStrategy):
     short_rsi = IntParameter(low=51, high=100, default=70, space="sell", optimize=True, load=True)
     exit_short_rsi = IntParameter(low=1, high=50, default=30, space="buy", optimize=True, load=True)
 
+    # Entry/exit conditions, each distinct comparison is evaluated once for all signals
+    signal_rules = SignalRules(
+        conditions={
+            "rsi_crossed_buy": ("rsi", "crossed_above", Param("buy_rsi")),  # RSI crosses above 30
+            "rsi_crossed_short": ("rsi", "crossed_above", Param("short_rsi")),  # RSI crosses above 70
+            "rsi_crossed_sell": ("rsi", "crossed_above", Param("sell_rsi")),  # RSI crosses above 70
+            "rsi_crossed_exit_short": ("rsi", "crossed_above", Param("exit_short_rsi")),  # RSI crosses above 30
+            "tema_below_bb_middle": ("tema", "<=", "bb_middleband"),  # Guard: tema below BB middle
+            "tema_above_bb_middle": ("tema", ">", "bb_middleband"),  # Guard: tema above BB middle
+            "tema_rising": ("tema", ">", Shift("tema")),  # Guard: tema is raising
+            "tema_falling": ("tema", "<", Shift("tema")),  # Guard: tema is falling
+            "has_volume": ("volume", ">", 0),  # Make sure Volume is not 0
+        },
+        signals={
+            "enter_long": ["rsi_crossed_buy", "tema_below_bb_middle", "tema_rising", "has_volume"],
+            "enter_short": ["rsi_crossed_short", "tema_above_bb_middle", "tema_falling", "has_volume"],
+            "exit_long": ["rsi_crossed_sell", "tema_above_bb_middle", "tema_falling", "has_volume"],
+            "exit_short": ["rsi_crossed_exit_short", "tema_below_bb_middle", "tema_rising", "has_volume"],
+        },
+    )
+
+    # Opt-in memory-compact dataframes for large pair universes (see compact_frames):
+    # float32 indicators, int8 signals, Bollinger upper/lower bands dropped after bb_percent/bb_width
+    use_compact_frames = False
+    compact_drop_columns = ("bb_lowerband", "bb_upperband")
+
+    # Indicator columns by provider, computed on demand (see indicator_columns)
+    indicator_registry = IndicatorRegistry()
+    # Columns read outside the signal rules (callbacks, backtesting-analysis), always computed
+    required_columns = ()
+
+    # Best bid/ask and depth columns from a background order book cache in live/dry-run
+    # (see orderbook_cache). Off by default, costs one depth request per pair every
+    # orderbook_ttl / 2 seconds, but never blocks populate_indicators.
+    use_orderbook_cache = False
+    orderbook_ttl = 10.0
+    orderbook_depth = 20
+
     # Number of candles the strategy requires before producing valid signals
     startup_candle_count: int = 200
 
@@ -128,6 +173,36 @@ class SampleStrategy(IStrategy):
         },
     }
 
+    def __init__(self, config: dict) -> None:
+        super().__init__(config)
+        # Per-pair dataframe memory before/after compaction (use_compact_frames only)
+        self.memory_report = FrameMemoryReport(self.__class__.__name__)
+        # Step timings are exported to user_data/metrics (see profiling)
+        profiler.configure(config)
+        self.orderbook_cache = None
+
+    def bot_start(self, **kwargs) -> None:
+        """
+        Creates the order book cache (use_orderbook_cache, live/dry-run only).
+        """
+        if self.use_orderbook_cache and self.dp and self.dp.runmode.value in ("live", "dry_run"):
+            self.orderbook_cache = OrderBookCache.from_config(
+                self.config, ttl=self.orderbook_ttl, depth=self.orderbook_depth
+            )
+
+    def bot_loop_start(self, current_time: datetime, **kwargs) -> None:
+        """
+        Keeps the order book cache refreshing the current whitelist.
+        :param current_time: datetime object, containing the current datetime
+        """
+        if self.orderbook_cache is not None:
+            self.orderbook_cache.set_pairs(self.dp.current_whitelist())
+
+    @property
+    def signal_dtype(self):
+        """dtype of the enter/exit signal columns: int8 in compact mode, None (float NaN/1) otherwise."""
+        return SIGNAL_DTYPE if self.use_compact_frames else None
+
     def informative_pairs(self):
         """
         Define additional, informative pair/interval combinations to be cached from the exchange.
@@ -141,226 +216,289 @@ class SampleStrategy(IStrategy):
         """
         return []
 
+    # Indicator providers
+    # ------------------------------------
+    # Each provider returns its columns and is only run when populate_indicators needs one of
+    # them (see indicator_columns). To add an indicator, register a provider for its columns,
+    # listing the columns it reads from the dataframe in ``requires``.
+    # Indicators are computed through the shared, memoized engine (see indicator_engine),
+    # so identical series are reused across strategies in the same process.
+
+    # Momentum Indicators
+    # ------------------------------------
+
+    # ADX
+    @indicator_registry.provides("adx")
+    def _adx(self, dataframe: DataFrame, pair: str) -> dict:
+        return {"adx": engine.compute("adx", dataframe, pair, self.timeframe)}
+
+    # # Plus Directional Indicator / Movement
+    # dataframe['plus_dm'] = ta.PLUS_DM(dataframe)
+    # dataframe['plus_di'] = ta.PLUS_DI(dataframe)
+
+    # # Minus Directional Indicator / Movement
+    # dataframe['minus_dm'] = ta.MINUS_DM(dataframe)
+    # dataframe['minus_di'] = ta.MINUS_DI(dataframe)
+
+    # # Aroon, Aroon Oscillator
+    # aroon = ta.AROON(dataframe)
+    # dataframe['aroonup'] = aroon['aroonup']
+    # dataframe['aroondown'] = aroon['aroondown']
+    # dataframe['aroonosc'] = ta.AROONOSC(dataframe)
+
+    # # Awesome Oscillator
+    # dataframe['ao'] = qtpylib.awesome_oscillator(dataframe)
+
+    # # Keltner Channel
+    # keltner = qtpylib.keltner_channel(dataframe)
+    # dataframe["kc_upperband"] = keltner["upper"]
+    # dataframe["kc_lowerband"] = keltner["lower"]
+    # dataframe["kc_middleband"] = keltner["mid"]
+    # dataframe["kc_percent"] = (
+    #     (dataframe["close"] - dataframe["kc_lowerband"]) /
+    #     (dataframe["kc_upperband"] - dataframe["kc_lowerband"])
+    # )
+    # dataframe["kc_width"] = (
+    #     (dataframe["kc_upperband"] - dataframe["kc_lowerband"]) / dataframe["kc_middleband"]
+    # )
+
+    # # Ultimate Oscillator
+    # dataframe['uo'] = ta.ULTOSC(dataframe)
+
+    # # Commodity Channel Index: values [Oversold:-100, Overbought:100]
+    # dataframe['cci'] = ta.CCI(dataframe)
+
+    # RSI
+    @indicator_registry.provides("rsi")
+    def _rsi(self, dataframe: DataFrame, pair: str) -> dict:
+        return {"rsi": engine.compute("rsi", dataframe, pair, self.timeframe)}
+
+    # # Inverse Fisher transform on RSI: values [-1.0, 1.0] (https://goo.gl/2JGGoy)
+    # rsi = 0.1 * (dataframe['rsi'] - 50)
+    # dataframe['fisher_rsi'] = (np.exp(2 * rsi) - 1) / (np.exp(2 * rsi) + 1)
+
+    # # Inverse Fisher transform on RSI normalized: values [0.0, 100.0] (https://goo.gl/2JGGoy)
+    # dataframe['fisher_rsi_norma'] = 50 * (dataframe['fisher_rsi'] + 1)
+
+    # # Stochastic Slow
+    # stoch = ta.STOCH(dataframe)
+    # dataframe['slowd'] = stoch['slowd']
+    # dataframe['slowk'] = stoch['slowk']
+
+    # Stochastic Fast
+    @indicator_registry.provides("fastd", "fastk")
+    def _stochf(self, dataframe: DataFrame, pair: str) -> dict:
+        stoch_fast = engine.compute("stochf", dataframe, pair, self.timeframe)
+        return {"fastd": stoch_fast["fastd"], "fastk": stoch_fast["fastk"]}
+
+    # # Stochastic RSI
+    # Please read https://github.com/freqtrade/freqtrade/issues/2961 before using this.
+    # STOCHRSI is NOT aligned with tradingview, which may result in non-expected results.
+    # stoch_rsi = ta.STOCHRSI(dataframe)
+    # dataframe['fastd_rsi'] = stoch_rsi['fastd']
+    # dataframe['fastk_rsi'] = stoch_rsi['fastk']
+
+    # MACD
+    @indicator_registry.provides("macd", "macdsignal", "macdhist")
+    def _macd(self, dataframe: DataFrame, pair: str) -> dict:
+        macd = engine.compute("macd", dataframe, pair, self.timeframe)
+        return {"macd": macd["macd"], "macdsignal": macd["macdsignal"], "macdhist": macd["macdhist"]}
+
+    # MFI
+    @indicator_registry.provides("mfi")
+    def _mfi(self, dataframe: DataFrame, pair: str) -> dict:
+        return {"mfi": engine.compute("mfi", dataframe, pair, self.timeframe)}
+
+    # # ROC
+    # dataframe['roc'] = ta.ROC(dataframe)
+
+    # Overlap Studies
+    # ------------------------------------
+
+    # Bollinger Bands
+    # Same values as qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=2)
+    @indicator_registry.provides("bb_lowerband", "bb_middleband", "bb_upperband")
+    def _bollinger(self, dataframe: DataFrame, pair: str) -> dict:
+        bollinger = engine.compute(
+            "bollinger", dataframe, pair, self.timeframe,
+            window=20, stds=2, source="typical", ddof=1, min_periods=1,
+        )
+        return {
+            "bb_lowerband": bollinger["lower"],
+            "bb_middleband": bollinger["mid"],
+            "bb_upperband": bollinger["upper"],
+        }
+
+    @indicator_registry.provides(
+        "bb_percent", "bb_width", requires=("bb_lowerband", "bb_middleband", "bb_upperband")
+    )
+    def _bollinger_derived(self, dataframe: DataFrame, pair: str) -> dict:
+        return {
+            "bb_percent": (dataframe["close"] - dataframe["bb_lowerband"]) / (
+                dataframe["bb_upperband"] - dataframe["bb_lowerband"]
+            ),
+            "bb_width": (dataframe["bb_upperband"] - dataframe["bb_lowerband"]) / dataframe[
+                "bb_middleband"
+            ],
+        }
+
+    # Bollinger Bands - Weighted (EMA based instead of SMA)
+    # weighted_bollinger = qtpylib.weighted_bollinger_bands(
+    #     qtpylib.typical_price(dataframe), window=20, stds=2
+    # )
+    # dataframe["wbb_upperband"] = weighted_bollinger["upper"]
+    # dataframe["wbb_lowerband"] = weighted_bollinger["lower"]
+    # dataframe["wbb_middleband"] = weighted_bollinger["mid"]
+    # dataframe["wbb_percent"] = (
+    #     (dataframe["close"] - dataframe["wbb_lowerband"]) /
+    #     (dataframe["wbb_upperband"] - dataframe["wbb_lowerband"])
+    # )
+    # dataframe["wbb_width"] = (
+    #     (dataframe["wbb_upperband"] - dataframe["wbb_lowerband"]) /
+    #     dataframe["wbb_middleband"]
+    # )
+
+    # # EMA - Exponential Moving Average
+    # dataframe['ema3'] = ta.EMA(dataframe, timeperiod=3)
+    # dataframe['ema5'] = ta.EMA(dataframe, timeperiod=5)
+    # dataframe['ema10'] = ta.EMA(dataframe, timeperiod=10)
+    # dataframe['ema21'] = ta.EMA(dataframe, timeperiod=21)
+    # dataframe['ema50'] = ta.EMA(dataframe, timeperiod=50)
+    # dataframe['ema100'] = ta.EMA(dataframe, timeperiod=100)
+
+    # # SMA - Simple Moving Average
+    # dataframe['sma3'] = ta.SMA(dataframe, timeperiod=3)
+    # dataframe['sma5'] = ta.SMA(dataframe, timeperiod=5)
+    # dataframe['sma10'] = ta.SMA(dataframe, timeperiod=10)
+    # dataframe['sma21'] = ta.SMA(dataframe, timeperiod=21)
+    # dataframe['sma50'] = ta.SMA(dataframe, timeperiod=50)
+    # dataframe['sma100'] = ta.SMA(dataframe, timeperiod=100)
+
+    # Parabolic SAR
+    @indicator_registry.provides("sar")
+    def _sar(self, dataframe: DataFrame, pair: str) -> dict:
+        return {"sar": engine.compute("sar", dataframe, pair, self.timeframe)}
+
+    # TEMA - Triple Exponential Moving Average
+    @indicator_registry.provides("tema")
+    def _tema(self, dataframe: DataFrame, pair: str) -> dict:
+        return {"tema": engine.compute("tema", dataframe, pair, self.timeframe, timeperiod=9)}
+
+    # Cycle Indicator
+    # ------------------------------------
+    # Hilbert Transform Indicator - SineWave
+    @indicator_registry.provides("htsine", "htleadsine")
+    def _ht_sine(self, dataframe: DataFrame, pair: str) -> dict:
+        hilbert = engine.compute("ht_sine", dataframe, pair, self.timeframe)
+        return {"htsine": hilbert["sine"], "htleadsine": hilbert["leadsine"]}
+
+    # Pattern Recognition - Bullish candlestick patterns
+    # ------------------------------------
+    # # Hammer: values [0, 100]
+    # dataframe['CDLHAMMER'] = ta.CDLHAMMER(dataframe)
+    # # Inverted Hammer: values [0, 100]
+    # dataframe['CDLINVERTEDHAMMER'] = ta.CDLINVERTEDHAMMER(dataframe)
+    # # Dragonfly Doji: values [0, 100]
+    # dataframe['CDLDRAGONFLYDOJI'] = ta.CDLDRAGONFLYDOJI(dataframe)
+    # # Piercing Line: values [0, 100]
+    # dataframe['CDLPIERCING'] = ta.CDLPIERCING(dataframe) # values [0, 100]
+    # # Morningstar: values [0, 100]
+    # dataframe['CDLMORNINGSTAR'] = ta.CDLMORNINGSTAR(dataframe) # values [0, 100]
+    # # Three White Soldiers: values [0, 100]
+    # dataframe['CDL3WHITESOLDIERS'] = ta.CDL3WHITESOLDIERS(dataframe) # values [0, 100]
+
+    # Pattern Recognition - Bearish candlestick patterns
+    # ------------------------------------
+    # # Hanging Man: values [0, 100]
+    # dataframe['CDLHANGINGMAN'] = ta.CDLHANGINGMAN(dataframe)
+    # # Shooting Star: values [0, 100]
+    # dataframe['CDLSHOOTINGSTAR'] = ta.CDLSHOOTINGSTAR(dataframe)
+    # # Gravestone Doji: values [0, 100]
+    # dataframe['CDLGRAVESTONEDOJI'] = ta.CDLGRAVESTONEDOJI(dataframe)
+    # # Dark Cloud Cover: values [0, 100]
+    # dataframe['CDLDARKCLOUDCOVER'] = ta.CDLDARKCLOUDCOVER(dataframe)
+    # # Evening Doji Star: values [0, 100]
+    # dataframe['CDLEVENINGDOJISTAR'] = ta.CDLEVENINGDOJISTAR(dataframe)
+    # # Evening Star: values [0, 100]
+    # dataframe['CDLEVENINGSTAR'] = ta.CDLEVENINGSTAR(dataframe)
+
+    # Pattern Recognition - Bullish/Bearish candlestick patterns
+    # ------------------------------------
+    # # Three Line Strike: values [0, -100, 100]
+    # dataframe['CDL3LINESTRIKE'] = ta.CDL3LINESTRIKE(dataframe)
+    # # Spinning Top: values [0, -100, 100]
+    # dataframe['CDLSPINNINGTOP'] = ta.CDLSPINNINGTOP(dataframe) # values [0, -100, 100]
+    # # Engulfing: values [0, -100, 100]
+    # dataframe['CDLENGULFING'] = ta.CDLENGULFING(dataframe) # values [0, -100, 100]
+    # # Harami: values [0, -100, 100]
+    # dataframe['CDLHARAMI'] = ta.CDLHARAMI(dataframe) # values [0, -100, 100]
+    # # Three Outside Up/Down: values [0, -100, 100]
+    # dataframe['CDL3OUTSIDE'] = ta.CDL3OUTSIDE(dataframe) # values [0, -100, 100]
+    # # Three Inside Up/Down: values [0, -100, 100]
+    # dataframe['CDL3INSIDE'] = ta.CDL3INSIDE(dataframe) # values [0, -100, 100]
+
+    # # Chart type
+    # # ------------------------------------
+    # # Heikin Ashi Strategy
+    # heikinashi = qtpylib.heikinashi(dataframe)
+    # dataframe['ha_open'] = heikinashi['open']
+    # dataframe['ha_close'] = heikinashi['close']
+    # dataframe['ha_high'] = heikinashi['high']
+    # dataframe['ha_low'] = heikinashi['low']
+
+    def is_plotting(self) -> bool:
+        """
+        True when the analyzed dataframe is plotted: plot-dataframe, the webserver, notebooks
+        (no trading runmode) and live/dry-run with the API server (FreqUI charts).
+        """
+        runmode = getattr(self.config.get("runmode"), "value", None)
+        if runmode in ("live", "dry_run"):
+            return self.config.get("api_server", {}).get("enabled", False)
+        return runmode not in ("backtest", "hyperopt")
+
+    def indicator_columns(self) -> set:
+        """
+        Indicator columns populate_indicators computes: the columns of the signal rules,
+        required_columns and, when plotting, the columns of plot_config.
+        :return: Set of column names
+        """
+        columns = self.signal_rules.columns | set(self.required_columns)
+        if self.is_plotting():
+            columns |= plot_config_columns(self.plot_config)
+        return columns
+
+    @profiled("populate_indicators")
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         """
-        Adds several different TA indicators to the given DataFrame
+        Adds the TA indicators the strategy uses to the given DataFrame
 
-        Performance Note: For the best performance be frugal on the number of indicators
-        you are using. Let uncomment only the indicator you are using in your strategies
-        or your hyperopt configuration, otherwise you will waste your memory and CPU usage.
+        Only the providers of indicator_columns() and their dependencies are run, so indicators
+        nothing reads (e.g. ADX, MFI, HT_SINE, or the plot-only SAR/MACD in backtests and
+        hyperopt) cost nothing.
         :param dataframe: Dataframe with data from the exchange
         :param metadata: Additional information, like the currently traded pair
         :return: a Dataframe with all mandatory indicators for the strategies
         """
-
-        # Momentum Indicators
-        # ------------------------------------
-
-        # ADX
-        dataframe["adx"] = ta.ADX(dataframe)
-
-        # # Plus Directional Indicator / Movement
-        # dataframe['plus_dm'] = ta.PLUS_DM(dataframe)
-        # dataframe['plus_di'] = ta.PLUS_DI(dataframe)
-
-        # # Minus Directional Indicator / Movement
-        # dataframe['minus_dm'] = ta.MINUS_DM(dataframe)
-        # dataframe['minus_di'] = ta.MINUS_DI(dataframe)
-
-        # # Aroon, Aroon Oscillator
-        # aroon = ta.AROON(dataframe)
-        # dataframe['aroonup'] = aroon['aroonup']
-        # dataframe['aroondown'] = aroon['aroondown']
-        # dataframe['aroonosc'] = ta.AROONOSC(dataframe)
-
-        # # Awesome Oscillator
-        # dataframe['ao'] = qtpylib.awesome_oscillator(dataframe)
-
-        # # Keltner Channel
-        # keltner = qtpylib.keltner_channel(dataframe)
-        # dataframe["kc_upperband"] = keltner["upper"]
-        # dataframe["kc_lowerband"] = keltner["lower"]
-        # dataframe["kc_middleband"] = keltner["mid"]
-        # dataframe["kc_percent"] = (
-        #     (dataframe["close"] - dataframe["kc_lowerband"]) /
-        #     (dataframe["kc_upperband"] - dataframe["kc_lowerband"])
-        # )
-        # dataframe["kc_width"] = (
-        #     (dataframe["kc_upperband"] - dataframe["kc_lowerband"]) / dataframe["kc_middleband"]
-        # )
-
-        # # Ultimate Oscillator
-        # dataframe['uo'] = ta.ULTOSC(dataframe)
-
-        # # Commodity Channel Index: values [Oversold:-100, Overbought:100]
-        # dataframe['cci'] = ta.CCI(dataframe)
-
-        # RSI
-        dataframe["rsi"] = ta.RSI(dataframe)
-
-        # # Inverse Fisher transform on RSI: values [-1.0, 1.0] (https://goo.gl/2JGGoy)
-        # rsi = 0.1 * (dataframe['rsi'] - 50)
-        # dataframe['fisher_rsi'] = (np.exp(2 * rsi) - 1) / (np.exp(2 * rsi) + 1)
-
-        # # Inverse Fisher transform on RSI normalized: values [0.0, 100.0] (https://goo.gl/2JGGoy)
-        # dataframe['fisher_rsi_norma'] = 50 * (dataframe['fisher_rsi'] + 1)
-
-        # # Stochastic Slow
-        # stoch = ta.STOCH(dataframe)
-        # dataframe['slowd'] = stoch['slowd']
-        # dataframe['slowk'] = stoch['slowk']
-
-        # Stochastic Fast
-        stoch_fast = ta.STOCHF(dataframe)
-        dataframe["fastd"] = stoch_fast["fastd"]
-        dataframe["fastk"] = stoch_fast["fastk"]
-
-        # # Stochastic RSI
-        # Please read https://github.com/freqtrade/freqtrade/issues/2961 before using this.
-        # STOCHRSI is NOT aligned with tradingview, which may result in non-expected results.
-        # stoch_rsi = ta.STOCHRSI(dataframe)
-        # dataframe['fastd_rsi'] = stoch_rsi['fastd']
-        # dataframe['fastk_rsi'] = stoch_rsi['fastk']
-
-        # MACD
-        macd = ta.MACD(dataframe)
-        dataframe["macd"] = macd["macd"]
-        dataframe["macdsignal"] = macd["macdsignal"]
-        dataframe["macdhist"] = macd["macdhist"]
-
-        # MFI
-        dataframe["mfi"] = ta.MFI(dataframe)
-
-        # # ROC
-        # dataframe['roc'] = ta.ROC(dataframe)
-
-        # Overlap Studies
-        # ------------------------------------
-
-        # Bollinger Bands
-        bollinger = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=2)
-        dataframe["bb_lowerband"] = bollinger["lower"]
-        dataframe["bb_middleband"] = bollinger["mid"]
-        dataframe["bb_upperband"] = bollinger["upper"]
-        dataframe["bb_percent"] = (dataframe["close"] - dataframe["bb_lowerband"]) / (
-            dataframe["bb_upperband"] - dataframe["bb_lowerband"]
-        )
-        dataframe["bb_width"] = (dataframe["bb_upperband"] - dataframe["bb_lowerband"]) / dataframe[
-            "bb_middleband"
-        ]
-
-        # Bollinger Bands - Weighted (EMA based instead of SMA)
-        # weighted_bollinger = qtpylib.weighted_bollinger_bands(
-        #     qtpylib.typical_price(dataframe), window=20, stds=2
-        # )
-        # dataframe["wbb_upperband"] = weighted_bollinger["upper"]
-        # dataframe["wbb_lowerband"] = weighted_bollinger["lower"]
-        # dataframe["wbb_middleband"] = weighted_bollinger["mid"]
-        # dataframe["wbb_percent"] = (
-        #     (dataframe["close"] - dataframe["wbb_lowerband"]) /
-        #     (dataframe["wbb_upperband"] - dataframe["wbb_lowerband"])
-        # )
-        # dataframe["wbb_width"] = (
-        #     (dataframe["wbb_upperband"] - dataframe["wbb_lowerband"]) /
-        #     dataframe["wbb_middleband"]
-        # )
-
-        # # EMA - Exponential Moving Average
-        # dataframe['ema3'] = ta.EMA(dataframe, timeperiod=3)
-        # dataframe['ema5'] = ta.EMA(dataframe, timeperiod=5)
-        # dataframe['ema10'] = ta.EMA(dataframe, timeperiod=10)
-        # dataframe['ema21'] = ta.EMA(dataframe, timeperiod=21)
-        # dataframe['ema50'] = ta.EMA(dataframe, timeperiod=50)
-        # dataframe['ema100'] = ta.EMA(dataframe, timeperiod=100)
-
-        # # SMA - Simple Moving Average
-        # dataframe['sma3'] = ta.SMA(dataframe, timeperiod=3)
-        # dataframe['sma5'] = ta.SMA(dataframe, timeperiod=5)
-        # dataframe['sma10'] = ta.SMA(dataframe, timeperiod=10)
-        # dataframe['sma21'] = ta.SMA(dataframe, timeperiod=21)
-        # dataframe['sma50'] = ta.SMA(dataframe, timeperiod=50)
-        # dataframe['sma100'] = ta.SMA(dataframe, timeperiod=100)
-
-        # Parabolic SAR
-        dataframe["sar"] = ta.SAR(dataframe)
-
-        # TEMA - Triple Exponential Moving Average
-        dataframe["tema"] = ta.TEMA(dataframe, timeperiod=9)
-
-        # Cycle Indicator
-        # ------------------------------------
-        # Hilbert Transform Indicator - SineWave
-        hilbert = ta.HT_SINE(dataframe)
-        dataframe["htsine"] = hilbert["sine"]
-        dataframe["htleadsine"] = hilbert["leadsine"]
-
-        # Pattern Recognition - Bullish candlestick patterns
-        # ------------------------------------
-        # # Hammer: values [0, 100]
-        # dataframe['CDLHAMMER'] = ta.CDLHAMMER(dataframe)
-        # # Inverted Hammer: values [0, 100]
-        # dataframe['CDLINVERTEDHAMMER'] = ta.CDLINVERTEDHAMMER(dataframe)
-        # # Dragonfly Doji: values [0, 100]
-        # dataframe['CDLDRAGONFLYDOJI'] = ta.CDLDRAGONFLYDOJI(dataframe)
-        # # Piercing Line: values [0, 100]
-        # dataframe['CDLPIERCING'] = ta.CDLPIERCING(dataframe) # values [0, 100]
-        # # Morningstar: values [0, 100]
-        # dataframe['CDLMORNINGSTAR'] = ta.CDLMORNINGSTAR(dataframe) # values [0, 100]
-        # # Three White Soldiers: values [0, 100]
-        # dataframe['CDL3WHITESOLDIERS'] = ta.CDL3WHITESOLDIERS(dataframe) # values [0, 100]
-
-        # Pattern Recognition - Bearish candlestick patterns
-        # ------------------------------------
-        # # Hanging Man: values [0, 100]
-        # dataframe['CDLHANGINGMAN'] = ta.CDLHANGINGMAN(dataframe)
-        # # Shooting Star: values [0, 100]
-        # dataframe['CDLSHOOTINGSTAR'] = ta.CDLSHOOTINGSTAR(dataframe)
-        # # Gravestone Doji: values [0, 100]
-        # dataframe['CDLGRAVESTONEDOJI'] = ta.CDLGRAVESTONEDOJI(dataframe)
-        # # Dark Cloud Cover: values [0, 100]
-        # dataframe['CDLDARKCLOUDCOVER'] = ta.CDLDARKCLOUDCOVER(dataframe)
-        # # Evening Doji Star: values [0, 100]
-        # dataframe['CDLEVENINGDOJISTAR'] = ta.CDLEVENINGDOJISTAR(dataframe)
-        # # Evening Star: values [0, 100]
-        # dataframe['CDLEVENINGSTAR'] = ta.CDLEVENINGSTAR(dataframe)
-
-        # Pattern Recognition - Bullish/Bearish candlestick patterns
-        # ------------------------------------
-        # # Three Line Strike: values [0, -100, 100]
-        # dataframe['CDL3LINESTRIKE'] = ta.CDL3LINESTRIKE(dataframe)
-        # # Spinning Top: values [0, -100, 100]
-        # dataframe['CDLSPINNINGTOP'] = ta.CDLSPINNINGTOP(dataframe) # values [0, -100, 100]
-        # # Engulfing: values [0, -100, 100]
-        # dataframe['CDLENGULFING'] = ta.CDLENGULFING(dataframe) # values [0, -100, 100]
-        # # Harami: values [0, -100, 100]
-        # dataframe['CDLHARAMI'] = ta.CDLHARAMI(dataframe) # values [0, -100, 100]
-        # # Three Outside Up/Down: values [0, -100, 100]
-        # dataframe['CDL3OUTSIDE'] = ta.CDL3OUTSIDE(dataframe) # values [0, -100, 100]
-        # # Three Inside Up/Down: values [0, -100, 100]
-        # dataframe['CDL3INSIDE'] = ta.CDL3INSIDE(dataframe) # values [0, -100, 100]
-
-        # # Chart type
-        # # ------------------------------------
-        # # Heikin Ashi Strategy
-        # heikinashi = qtpylib.heikinashi(dataframe)
-        # dataframe['ha_open'] = heikinashi['open']
-        # dataframe['ha_close'] = heikinashi['close']
-        # dataframe['ha_high'] = heikinashi['high']
-        # dataframe['ha_low'] = heikinashi['low']
+        pair = metadata["pair"]
+        dataframe = self.indicator_registry.populate(self, dataframe, pair, self.indicator_columns())
 
         # Retrieve best bid and best ask from the orderbook
         # ------------------------------------
-        """
-        # first check if dataprovider is available
-        if self.dp:
-            if self.dp.runmode.value in ('live', 'dry_run'):
-                ob = self.dp.orderbook(metadata['pair'], 1)
-                dataframe['best_bid'] = ob['bids'][0][0]
-                dataframe['best_ask'] = ob['asks'][0][0]
-        """
-
+        # Read from the background cache instead of a blocking dp.orderbook() per pair.
+        # Only the last candle gets the current book, NaN if the snapshot is stale.
+        if self.orderbook_cache is not None:
+            for column, value in self.orderbook_cache.features(pair).items():
+                values = np.full(len(dataframe), np.nan)
+                values[-1:] = value
+                dataframe[column] = values
+
+        if self.use_compact_frames:
+            before = frame_nbytes(dataframe)
+            dataframe = compact_frame(dataframe, drop=self.compact_drop_columns)
+            self.memory_report.record(pair, len(dataframe), before, frame_nbytes(dataframe))
         return dataframe
 
+    @profiled("populate_entry_trend")
     def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         """
         Based on TA indicators, populates the entry signal for the given dataframe
@@ -368,30 +506,10 @@ class SampleStrategy(IStrategy):
         :param metadata: Additional information, like the currently traded pair
         :return: DataFrame with entry columns populated
         """
-        dataframe.loc[
-            (
-                # Signal: RSI crosses above 30
-                (qtpylib.crossed_above(dataframe["rsi"], self.buy_rsi.value))
-                & (dataframe["tema"] <= dataframe["bb_middleband"])  # Guard: tema below BB middle
-                & (dataframe["tema"] > dataframe["tema"].shift(1))  # Guard: tema is raising
-                & (dataframe["volume"] > 0)  # Make sure Volume is not 0
-            ),
-            "enter_long",
-        ] = 1
-
-        dataframe.loc[
-            (
-                # Signal: RSI crosses above 70
-                (qtpylib.crossed_above(dataframe["rsi"], self.short_rsi.value))
-                & (dataframe["tema"] > dataframe["bb_middleband"])  # Guard: tema above BB middle
-                & (dataframe["tema"] < dataframe["tema"].shift(1))  # Guard: tema is falling
-                & (dataframe["volume"] > 0)  # Make sure Volume is not 0
-            ),
-            "enter_short",
-        ] = 1
-
-        return dataframe
+        masks = self.signal_rules.evaluate(dataframe, self)
+        return apply_signals(dataframe, masks, ["enter_long", "enter_short"], self.signal_dtype)
 
+    @profiled("populate_exit_trend")
     def populate_exit_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         """
         Based on TA indicators, populates the exit signal for the given dataframe
@@ -399,28 +517,5 @@ class SampleStrategy(IStrategy):
         :param metadata: Additional information, like the currently traded pair
         :return: DataFrame with exit columns populated
         """
-        dataframe.loc[
-            (
-                # Signal: RSI crosses above 70
-                (qtpylib.crossed_above(dataframe["rsi"], self.sell_rsi.value))
-                & (dataframe["tema"] > dataframe["bb_middleband"])  # Guard: tema above BB middle
-                & (dataframe["tema"] < dataframe["tema"].shift(1))  # Guard: tema is falling
-                & (dataframe["volume"] > 0)  # Make sure Volume is not 0
-            ),
-            "exit_long",
-        ] = 1
-
-        dataframe.loc[
-            (
-                # Signal: RSI crosses above 30
-                (qtpylib.crossed_above(dataframe["rsi"], self.exit_short_rsi.value))
-                &
-                # Guard: tema below BB middle
-                (dataframe["tema"] <= dataframe["bb_middleband"])
-                & (dataframe["tema"] > dataframe["tema"].shift(1))  # Guard: tema is raising
-                & (dataframe["volume"] > 0)  # Make sure Volume is not 0
-            ),
-            "exit_short",
-        ] = 1
-
-        return dataframe
+        masks = self.signal_rules.evaluate(dataframe, self)
+        return apply_signals(dataframe, masks, ["exit_long", "exit_short"], self.signal_dtype)
@@ -1,7 +1,9 @@
 # user_data/strategies/ScalpingStrategy.py
 from freqtrade.strategy.interface import IStrategy
 from pandas import DataFrame
-import talib.abstract as ta
+
+from batch_indicators import RsiBatch
+from indicator_engine import engine
 
 class ScalpingStrategy(IStrategy):
     # Strategy interface version - required for modern FreqTrade
@@ -12,8 +14,29 @@ class ScalpingStrategy(IStrategy):
     # Can this strategy go short?
     can_short: bool = False
 
+    rsi_period = 14
+    # Live/dry-run: RSI of the whole whitelist, updated per loop by the new candles (see bot_loop_start)
+    use_batched_rsi = True
+
+    def __init__(self, config: dict) -> None:
+        super().__init__(config)
+        self._rsi_batch = RsiBatch(self.rsi_period)
+
+    def is_live(self) -> bool:
+        return bool(self.dp) and self.dp.runmode.value in ('live', 'dry_run')
+
+    def bot_loop_start(self, current_time, **kwargs) -> None:
+        # Runs after the candles are refreshed and before the pairs are analyzed
+        if self.use_batched_rsi and self.is_live():
+            self._rsi_batch.update({pair: self.dp.ohlcv(pair, self.timeframe, copy=False)
+                                    for pair in self.dp.current_whitelist()})
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe['rsi'] = ta.RSI(dataframe, timeperiod=14)
+        rsi = self._rsi_batch.get(metadata['pair'], dataframe) if self.use_batched_rsi and self.is_live() else None
+        if rsi is None:
+            # Shared with SampleStrategy's RSI through the memoized indicator engine
+            rsi = engine.compute('rsi', dataframe, metadata['pair'], self.timeframe, timeperiod=self.rsi_period)
+        dataframe['rsi'] = rsi
         return dataframe
 
     def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
@@ -0,0 +1,137 @@
+"""
+Whitelist-wide indicator batches for live/dry-run.
+
+In live mode every pair's dataframe gains one candle per loop, so computing an indicator
+pair by pair is dominated by the per-call overhead. ``RsiBatch`` is updated once per loop
+(from the strategy's ``bot_loop_start``) with the candles of all whitelisted pairs and
+serves each pair's column to populate_indicators.
+
+Only the pairs whose last candle changed are updated. A pair whose previous last candle is
+still in its dataframe continues the Wilder recursion from the kept state over its new
+candles only (``rsi_2d_extend``, pairs with the same number of new candles together), which
+gives TA-Lib's values over the pair's history since it was first computed. New pairs, gaps
+and replaced candles are computed over their whole dataframe, in one ``rsi_2d`` pass.
+
+A pair's column is only served for the candles it was computed from (same last candle and
+length), so populate_indicators falls back to the per-pair computation otherwise.
+"""
+from collections import defaultdict
+
+import numpy as np
+
+from fast_indicators import rsi_2d, rsi_2d_extend
+
+
+class RsiBatch:
+    """
+    TA-Lib compatible RSI of many pairs, computed together.
+
+    Args:
+        timeperiod (int): RSI period.
+
+    Attributes:
+        hits (int): Columns served to populate_indicators.
+        misses (int): Requests for pairs or candles the batch was not computed for.
+        extended (int): Pair updates computed over the new candles only.
+        computed (int): Pair updates computed over the whole dataframe.
+    """
+
+    def __init__(self, timeperiod: int = 14):
+        self.timeperiod = timeperiod
+        self.hits = self.misses = 0
+        self.extended = self.computed = 0
+        # {pair: (last candle date, length)} the column was computed from
+        self._candles = {}
+        self._columns = {}
+        # {pair: (last close, smoothed gain, smoothed loss)} after the last candle
+        self._state = {}
+
+    def update(self, frames: dict) -> bool:
+        """
+        Updates the RSI of the pairs of ``{pair: OHLCV dataframe}`` whose candles changed.
+
+        Nothing is computed when no pair gained or changed candles since the previous
+        update (loops between two candles). Pairs missing from ``frames`` are dropped.
+
+        Returns:
+            bool: True when any pair was updated.
+        """
+        frames = {pair: df for pair, df in frames.items() if df is not None and len(df)}
+        for pair in set(self._candles) - set(frames):
+            del self._candles[pair], self._columns[pair], self._state[pair]
+        # {pair: (candle dates, close prices)} of the pairs whose candles changed
+        changed = {}
+        for pair, df in frames.items():
+            dates = df['date'].values
+            if self._candles.get(pair) != (dates[-1], len(dates)):
+                changed[pair] = (dates, df['close'].to_numpy(dtype=np.float64))
+        if not changed:
+            return False
+
+        # {new candles: [(pair, index of the previous last candle)]}
+        extend = defaultdict(list)
+        full = []
+        for pair, (dates, close) in changed.items():
+            start = self._continuation(pair, dates, close)
+            if start is None:
+                full.append(pair)
+            else:
+                extend[len(dates) - 1 - start].append((pair, start))
+
+        for pairs in extend.values():
+            close = np.stack([changed[pair][1][start:] for pair, start in pairs])
+            avg_gain = np.array([self._state[pair][1] for pair, _ in pairs])
+            avg_loss = np.array([self._state[pair][2] for pair, _ in pairs])
+            rsi = rsi_2d_extend(close, avg_gain, avg_loss, self.timeperiod)
+            for row, (pair, start) in enumerate(pairs):
+                # The kept rows of the previous column, aligned with the dataframe
+                column = self._columns[pair]
+                column = np.concatenate([column[len(column) - start - 1:], rsi[row]])
+                self._store(pair, *changed[pair], column, avg_gain[row], avg_loss[row])
+            self.extended += len(pairs)
+
+        if full:
+            length = max(len(changed[pair][0]) for pair in full)
+            # Right-aligned rows, shorter histories are NaN-padded on the left
+            close = np.full((len(full), length), np.nan)
+            for row, pair in enumerate(full):
+                close[row, length - len(changed[pair][1]):] = changed[pair][1]
+            rsi, avg_gain, avg_loss = rsi_2d(close, self.timeperiod, return_state=True)
+            for row, pair in enumerate(full):
+                dates, pair_close = changed[pair]
+                self._store(pair, dates, pair_close, rsi[row, length - len(dates):], avg_gain[row], avg_loss[row])
+            self.computed += len(full)
+        return True
+
+    def get(self, pair: str, df):
+        """The RSI column of ``pair`` if the batch was computed from ``df``'s candles, else None."""
+        candles = self._candles.get(pair)
+        if candles is None or not len(df) or candles != (df['date'].values[-1], len(df)):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._columns[pair]
+
+    def _continuation(self, pair: str, dates: np.ndarray, close: np.ndarray):
+        """
+        Index of the pair's previous last candle in ``dates`` if the RSI can be continued from
+        the kept state (same candle and close, no earlier candles than the kept column), else None.
+        """
+        candles = self._candles.get(pair)
+        if candles is None or np.isnan(self._state[pair][1]):
+            return None
+        last_date = candles[0]
+        # Usually one new candle
+        start = len(dates) - 2
+        if start < 0 or dates[start] != last_date:
+            start = int(np.searchsorted(dates, last_date))
+        if (start >= len(dates) - 1 or dates[start] != last_date or start >= len(self._columns[pair])
+                or close[start] != self._state[pair][0]):
+            return None
+        return start
+
+    def _store(self, pair: str, dates: np.ndarray, close: np.ndarray, column: np.ndarray,
+               avg_gain: float, avg_loss: float):
+        self._candles[pair] = (dates[-1], len(dates))
+        self._columns[pair] = column
+        self._state[pair] = (close[-1], float(avg_gain), float(avg_loss))
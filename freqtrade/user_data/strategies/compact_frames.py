@@ -0,0 +1,107 @@
+"""
+Memory-compact analyzed dataframes for large pair universes.
+
+freqtrade keeps the analyzed dataframe of every whitelisted pair in memory (and hyperopt
+keeps every pair's preprocessed frame), so with hundreds of futures pairs the float64
+indicator columns dominate the process size. In compact mode a strategy stores its
+indicator columns as float32, its signal columns as int8 (see signal_engine.apply_signals)
+and drops intermediates once the derived columns are computed. OHLCV columns stay float64,
+freqtrade uses them for rates and fills.
+
+``FrameMemoryReport`` records the per-pair size of each dataframe before and after the
+compaction and logs a summary periodically.
+"""
+import logging
+import time
+
+import numpy as np
+from pandas import DataFrame
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ('date', 'open', 'high', 'low', 'close', 'volume')
+# dtype of the enter/exit signal columns in compact mode
+SIGNAL_DTYPE = np.int8
+
+
+def frame_nbytes(df: DataFrame) -> int:
+    """Memory of ``df`` in bytes, including its index."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def compact_frame(df: DataFrame, drop=(), keep=OHLCV_COLUMNS) -> DataFrame:
+    """
+    Returns ``df`` with its float64 columns cast to float32 and ``drop`` removed.
+
+    Args:
+        df (DataFrame): Analyzed dataframe.
+        drop (iterable): Intermediate columns no longer needed (missing ones are ignored).
+        keep (iterable): Columns kept as they are (OHLCV by default).
+
+    Returns:
+        DataFrame: The compacted dataframe (``df`` itself when there is nothing to change).
+    """
+    drop = df.columns.intersection(list(drop))
+    if len(drop):
+        df = df.drop(columns=drop)
+    cast = {column: np.float32 for column, dtype in df.dtypes.items()
+            if dtype == np.float64 and column not in keep}
+    return df.astype(cast, copy=False) if cast else df
+
+
+class FrameMemoryReport:
+    """
+    Per-pair dataframe memory before and after compaction.
+
+    Args:
+        name (str): Name used in the log summary (the strategy).
+        log_interval (float): Seconds between two log summaries (0 disables logging).
+    """
+
+    def __init__(self, name: str, log_interval: float = 300.0):
+        self.name = name
+        self.log_interval = log_interval
+        self._pairs: dict[str, tuple] = {}
+        self._last_log = time.monotonic()
+
+    def record(self, pair: str, rows: int, before: int, after: int) -> None:
+        """Stores the latest ``(rows, bytes before, bytes after)`` of ``pair``."""
+        self._pairs[pair] = (rows, before, after)
+        self._maybe_log()
+
+    def summary(self) -> dict:
+        """Totals and per-pair averages over the recorded pairs."""
+        pairs = len(self._pairs)
+        rows = sum(entry[0] for entry in self._pairs.values())
+        before = sum(entry[1] for entry in self._pairs.values())
+        after = sum(entry[2] for entry in self._pairs.values())
+        return {
+            'pairs': pairs,
+            'rows': rows,
+            'bytes_before': before,
+            'bytes_after': after,
+            'pair_bytes_before': before / pairs if pairs else 0.0,
+            'pair_bytes_after': after / pairs if pairs else 0.0,
+            'saved_ratio': 1 - after / before if before else 0.0,
+        }
+
+    def pairs(self) -> dict:
+        """``{pair: (rows, bytes before, bytes after)}``."""
+        return dict(self._pairs)
+
+    def log_summary(self) -> None:
+        summary = self.summary()
+        logger.info('%s compact frames: %d pairs, %.1f KiB -> %.1f KiB per pair (%.0f%% saved), '
+                    '%.2f MiB -> %.2f MiB total', self.name, summary['pairs'],
+                    summary['pair_bytes_before'] / 1024, summary['pair_bytes_after'] / 1024,
+                    summary['saved_ratio'] * 100, summary['bytes_before'] / 2 ** 20,
+                    summary['bytes_after'] / 2 ** 20)
+
+    def clear(self) -> None:
+        self._pairs.clear()
+
+    def _maybe_log(self):
+        now = time.monotonic()
+        if self.log_interval and now - self._last_log >= self.log_interval:
+            self._last_log = now
+            self.log_summary()
@@ -0,0 +1,376 @@
+"""
+Fast indicator kernels for the AstroTrade strategies.
+
+The functions in this module are drop-in replacements for the ``ta`` indicator classes
+used by the strategies. The vectorizable parts are computed with NumPy and the
+recursive parts run in a Numba-compiled loop when Numba is installed (it falls back to
+plain Python otherwise). Results match ``ta`` to floating point precision.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba is optional
+    njit = None
+
+
+def _jit(func):
+    """Compile ``func`` with Numba when available, otherwise return it unchanged."""
+    if njit is None:
+        return func
+    return njit(cache=True, nogil=True)(func)
+
+
+@_jit
+def _kama_recursion(close, smoothing_constant):
+    kama = np.empty(close.shape[0])
+    first_value = True
+    for i in range(close.shape[0]):
+        sc = smoothing_constant[i]
+        if np.isnan(sc):
+            kama[i] = np.nan
+        elif first_value:
+            kama[i] = close[i]
+            first_value = False
+        else:
+            kama[i] = kama[i - 1] + sc * (close[i] - kama[i - 1])
+    return kama
+
+
+def efficiency_ratio(close: np.ndarray, window: int = 10) -> np.ndarray:
+    """
+    Kaufman efficiency ratio (net price change / sum of absolute changes).
+
+    Mirrors ``ta.momentum.KAMAIndicator``, including the wrap-around of ``np.roll`` on
+    the first rows. Rows without a full window are NaN.
+
+    Args:
+        close (np.ndarray): Close prices.
+        window (int): Lookback period.
+
+    Returns:
+        np.ndarray: The efficiency ratio, NaN where the window is incomplete.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = close.shape[0]
+    ratio = np.full(n, np.nan)
+    if n < window or window < 1:
+        return ratio
+    volatility = np.abs(close - np.roll(close, 1))
+    change = np.abs(close - np.roll(close, window))
+    # Windowed sums of the absolute one-bar changes, aligned to the window end.
+    denominator = np.convolve(volatility, np.ones(window), mode='valid')
+    ratio[window - 1:] = np.divide(
+        change[window - 1:], denominator,
+        out=np.zeros(n - window + 1), where=denominator != 0
+    )
+    return ratio
+
+
+def kama(close: np.ndarray, window: int = 10, pow1: int = 2, pow2: int = 30) -> np.ndarray:
+    """
+    Kaufman's Adaptive Moving Average.
+
+    Equivalent to ``ta.momentum.KAMAIndicator(close, window, pow1, pow2).kama()``.
+    Efficiency ratio and smoothing constants are vectorized, the adaptive recursion
+    runs in a compiled kernel.
+
+    Args:
+        close (np.ndarray): Close prices.
+        window (int): Efficiency ratio lookback period.
+        pow1 (int): Number of periods for the fastest EMA constant.
+        pow2 (int): Number of periods for the slowest EMA constant.
+
+    Returns:
+        np.ndarray: KAMA values, NaN for the first ``window - 1`` rows.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    fast = 2.0 / (pow1 + 1)
+    slow = 2.0 / (pow2 + 1.0)
+    smoothing_constant = (efficiency_ratio(close, window) * (fast - slow) + slow) ** 2.0
+    return _kama_recursion(close, smoothing_constant)
+
+
+@_jit
+def _true_range_kernel(high, low, close, window, chop_window):
+    n = high.shape[0]
+    atr = np.zeros(n)
+    adx = np.zeros(n)
+    plus_di = np.zeros(n)
+    minus_di = np.zeros(n)
+    chop_ratio = np.full(n, np.nan)
+    true_range = np.empty(n)
+
+    sum_tr = 0.0
+    sum_pos = 0.0
+    sum_neg = 0.0
+    sum_dx = 0.0
+    # Rolling true range sum for the Choppiness Index, using the same compensated
+    # add/remove updates as pandas' rolling().sum() so the results are bit-identical.
+    chop_sum = 0.0
+    chop_add_compensation = 0.0
+    chop_remove_compensation = 0.0
+    chop_same_count = 0
+    chop_prev = np.nan
+    for i in range(n):
+        # True range, computed once and shared by every indicator below.
+        if i == 0:
+            tr = high[0] - low[0]
+        else:
+            tr = max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        true_range[i] = tr
+
+        # ATR: mean of the first window, Wilder smoothing afterwards (zeros before).
+        if i == window - 1:
+            total = 0.0
+            for j in range(window):
+                total += true_range[j]
+            atr[i] = total / window
+        elif i >= window:
+            atr[i] = (atr[i - 1] * (window - 1) + tr) / float(window)
+
+        # Choppiness Index over the raw true range.
+        if i >= chop_window:
+            y = -true_range[i - chop_window] - chop_remove_compensation
+            t = chop_sum + y
+            chop_remove_compensation = t - chop_sum - y
+            chop_sum = t
+        y = tr - chop_add_compensation
+        t = chop_sum + y
+        chop_add_compensation = t - chop_sum - y
+        chop_sum = t
+        chop_same_count = chop_same_count + 1 if tr == chop_prev else 1
+        chop_prev = tr
+        if i >= chop_window - 1:
+            # pandas returns value * count for runs of identical values
+            total = tr * chop_window if chop_same_count >= chop_window else chop_sum
+            highest = high[i]
+            lowest = low[i]
+            for j in range(i - chop_window + 1, i):
+                highest = max(highest, high[j])
+                lowest = min(lowest, low[j])
+            chop_ratio[i] = total / (highest - lowest)
+
+        # Directional movement, undefined on the first row.
+        if i == 0:
+            continue
+        diff_up = high[i] - high[i - 1]
+        diff_down = low[i - 1] - low[i]
+        pos = diff_up if diff_up > diff_down and diff_up > 0 else 0.0
+        neg = diff_down if diff_down > diff_up and diff_down > 0 else 0.0
+        if i <= window:
+            sum_tr += tr
+            sum_pos += pos
+            sum_neg += neg
+            if i < window:
+                continue
+        else:
+            sum_tr = sum_tr - sum_tr / float(window) + tr
+            sum_pos = sum_pos - sum_pos / float(window) + pos
+            sum_neg = sum_neg - sum_neg / float(window) + neg
+
+        if sum_tr != 0:
+            di_pos = 100 * (sum_pos / sum_tr)
+            di_neg = 100 * (sum_neg / sum_tr)
+        else:
+            di_pos = 0.0
+            di_neg = 0.0
+        if i > window:
+            plus_di[i] = di_pos
+            minus_di[i] = di_neg
+        dx = 100 * abs((di_pos - di_neg) / (di_pos + di_neg)) if di_pos + di_neg != 0 else 0.0
+
+        if i < 2 * window - 1:
+            sum_dx += dx
+        elif i == 2 * window - 1:
+            adx[i] = (sum_dx + dx) / window
+        else:
+            adx[i] = ((adx[i - 1] * (window - 1)) + dx) / float(window)
+    return atr, adx, plus_di, minus_di, chop_ratio
+
+
+def true_range_indicators(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                          window: int = 14, chop_window: int = 14) -> dict:
+    """
+    ATR, +DI/-DI, ADX and Choppiness Index from a single true range pass.
+
+    Equivalent to ``ta.volatility.AverageTrueRange(window).average_true_range()``,
+    ``ta.trend.ADXIndicator(window)`` (``adx``, ``adx_pos``, ``adx_neg``) and the
+    Choppiness Index over ``chop_window`` candles, including their warm-up values
+    (zeros for ATR/ADX/DI, NaN for Choppiness).
+
+    Args:
+        high (np.ndarray): High prices.
+        low (np.ndarray): Low prices.
+        close (np.ndarray): Close prices.
+        window (int): ATR and ADX period.
+        chop_window (int): Choppiness Index period.
+
+    Returns:
+        dict: ``{'atr', 'adx', 'plus_di', 'minus_di', 'chop'}`` arrays.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        atr, adx, plus_di, minus_di, chop_ratio = _true_range_kernel(high, low, close, window, chop_window)
+        # NumPy's log10 (not the kernel's libm one) keeps Choppiness bit-identical to the pandas formula
+        chop = 100 * np.log10(chop_ratio) / np.log10(chop_window)
+    return {'atr': atr, 'adx': adx, 'plus_di': plus_di, 'minus_di': minus_di, 'chop': chop}
+
+
+def resample_closes(dates: np.ndarray, close: np.ndarray, candle_ms: int, target_ms: int) -> tuple:
+    """
+    Closes of the completed higher timeframe candles of a base candle series.
+
+    Higher timeframe candles are aligned to the epoch, like freqtrade's resampling. A
+    candle is complete once the series reaches its close time, its close is the close of
+    its last base candle. The still forming last candle is left out (no look-ahead).
+
+    Args:
+        dates (np.ndarray): Base candle open times as int64 milliseconds (sorted).
+        close (np.ndarray): Base candle close prices.
+        candle_ms (int): Base timeframe in milliseconds.
+        target_ms (int): Higher timeframe in milliseconds.
+
+    Returns:
+        tuple: ``(close_times, closes)`` of the completed higher timeframe candles.
+    """
+    if not len(dates):
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    buckets = dates - dates % target_ms
+    last = np.flatnonzero(np.r_[buckets[1:] != buckets[:-1], True])
+    close_times = buckets[last] + target_ms
+    complete = close_times <= dates[-1] + candle_ms
+    return close_times[complete], np.asarray(close, dtype=np.float64)[last[complete]]
+
+
+def merge_higher_timeframe(dates: np.ndarray, candle_ms: int, close_times: np.ndarray,
+                           values: np.ndarray) -> np.ndarray:
+    """
+    Aligns higher timeframe values with base candles, without look-ahead.
+
+    Each base candle gets the value of the last higher timeframe candle that closed at or
+    before its own close, like freqtrade's merge_informative_pair with ffill.
+    """
+    position = np.searchsorted(close_times, dates + candle_ms, side='right') - 1
+    merged = np.full(len(dates), np.nan)
+    known = position >= 0
+    merged[known] = values[position[known]]
+    return merged
+
+
+def resampled_kama(dates: np.ndarray, close: np.ndarray, candle_ms: int, target_ms: int,
+                   window: int = 10) -> np.ndarray:
+    """
+    KAMA of the higher timeframe candles (e.g. 4h from 15m), merged back onto the base candles.
+
+    Equivalent to resampling the base candles, computing ``kama`` on the higher timeframe
+    closes and merging it with ``merge_informative_pair(..., ffill=True)``.
+
+    Returns:
+        np.ndarray: Higher timeframe KAMA per base candle, NaN until its warm-up is complete.
+    """
+    dates = np.asarray(dates, dtype=np.int64)
+    close_times, closes = resample_closes(dates, close, candle_ms, target_ms)
+    return merge_higher_timeframe(dates, candle_ms, close_times, kama(closes, window=window))
+
+
+# TA-Lib's zero threshold (TA_IS_ZERO) for the RSI denominator
+TA_EPSILON = 1e-14
+
+
+def _wilder_smoothing(close, previous, avg_gain, avg_loss, timeperiod, reciprocal):
+    """One Wilder smoothing step of the gains/losses of all series, in place."""
+    step = close - previous
+    avg_gain *= timeperiod - 1
+    avg_gain += np.maximum(step, 0.0)
+    avg_gain *= reciprocal
+    avg_loss *= timeperiod - 1
+    avg_loss += np.maximum(-step, 0.0)
+    avg_loss *= reciprocal
+
+
+def _rsi_values(avg_gain, avg_loss, total, output):
+    """RSI of the smoothed gains/losses of all series into ``output``."""
+    np.add(avg_gain, avg_loss, out=total)
+    np.divide(avg_gain, total, out=output)
+    output *= 100
+    output[np.abs(total) < TA_EPSILON] = 0.0
+
+
+def rsi_2d(close: np.ndarray, timeperiod: int = 14, return_state: bool = False):
+    """
+    RSI with Wilder smoothing of many series at once, same values as TA-Lib's RSI per series.
+
+    The recursion runs once over the time axis, vectorized across the series (rows), so the
+    per-call overhead of computing one series at a time is paid once for all of them. Series
+    shorter than the array are left-padded with NaN, each row starts at its first value.
+
+    Args:
+        close (np.ndarray): Close prices, shape (series, time).
+        timeperiod (int): RSI period.
+        return_state (bool): Also return the smoothed gains/losses after the last candle,
+            to continue the series with rsi_2d_extend.
+
+    Returns:
+        np.ndarray: RSI of the same shape, NaN where TA-Lib returns NaN. With
+        ``return_state``, ``(rsi, avg_gain, avg_loss)``, NaN for series without an RSI yet.
+    """
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    rows, length = close.shape
+    avg_gain = np.full(rows, np.nan)
+    avg_loss = np.full(rows, np.nan)
+    rsi = np.full((length, rows), np.nan)
+    valid = ~np.isnan(close)
+    # Index of the first RSI value per row (TA-Lib's lookback after the leading NaNs)
+    first = np.where(valid.any(axis=1), valid.argmax(axis=1), length) + timeperiod
+    if rows and length >= 2 and first.min() < length:
+        # Time-major, so every step of the recursion reads and writes contiguous memory
+        close = np.ascontiguousarray(close.T)
+        # Rows by the index of their first RSI value (one group unless the histories differ)
+        seeds = {int(i): np.flatnonzero(first == i) for i in np.unique(first) if i < length}
+
+        # TA-Lib's compiled code multiplies by the reciprocal, dividing would differ in the last bit
+        reciprocal = 1.0 / timeperiod
+        total = np.empty(rows)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for i in range(int(first.min()), length):
+                # Wilder smoothing, rows that are not seeded yet stay NaN
+                _wilder_smoothing(close[i], close[i - 1], avg_gain, avg_loss, timeperiod, reciprocal)
+                seeded = seeds.get(i)
+                if seeded is not None:
+                    # Seed: sequential sums (np.cumsum adds in order) of the first gains/losses
+                    diff = np.nan_to_num(np.diff(close[:i + 1, seeded], axis=0))
+                    avg_gain[seeded] = np.cumsum(np.maximum(diff, 0.0), axis=0)[-1] * reciprocal
+                    avg_loss[seeded] = np.cumsum(np.maximum(-diff, 0.0), axis=0)[-1] * reciprocal
+                _rsi_values(avg_gain, avg_loss, total, rsi[i])
+    if return_state:
+        return rsi.T, avg_gain, avg_loss
+    return rsi.T
+
+
+def rsi_2d_extend(close: np.ndarray, avg_gain: np.ndarray, avg_loss: np.ndarray, timeperiod: int = 14) -> np.ndarray:
+    """
+    Continues the RSI of many series by new candles, from the state rsi_2d returned.
+
+    Args:
+        close (np.ndarray): Shape (series, 1 + new candles): each series' last processed close,
+            then its new closes.
+        avg_gain, avg_loss (np.ndarray): Smoothed gains/losses after the last processed candle,
+            updated in place.
+        timeperiod (int): RSI period.
+
+    Returns:
+        np.ndarray: RSI of the new candles, shape (series, new candles). The same values as
+        rsi_2d over the whole history.
+    """
+    close = np.ascontiguousarray(np.atleast_2d(np.asarray(close, dtype=np.float64)).T)
+    rsi = np.empty((close.shape[0] - 1, close.shape[1]))
+    total = np.empty(close.shape[1])
+    reciprocal = 1.0 / timeperiod
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i in range(1, close.shape[0]):
+            _wilder_smoothing(close[i], close[i - 1], avg_gain, avg_loss, timeperiod, reciprocal)
+            _rsi_values(avg_gain, avg_loss, total, rsi[i - 1])
+    return rsi.T
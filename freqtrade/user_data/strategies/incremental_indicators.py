@@ -0,0 +1,306 @@
+"""
+Incremental (stateful) indicator updates for KamaStrategy in live and dry-run mode.
+
+In live mode freqtrade re-analyzes the whole candle window every time a candle closes,
+although only the last row is new. ``KamaIndicatorState`` keeps the recursion state of
+every KamaStrategy indicator for one pair (last KAMA value, Wilder-smoothed ADX/ATR
+accumulators and fixed-size ring buffers), so each new candle is an O(1) update.
+The update rules reproduce the ``ta`` implementations row by row, including their
+warm-up behaviour, so the columns match a full recompute to floating point precision.
+
+The long-term KAMA runs on the higher timeframe (4h) candles resampled from the base
+candles. Its state is part of the same recursion: a higher timeframe candle is complete
+with the base candle that reaches its close time (or, after a gap, with the first candle
+of a later one), so its KAMA is only extended then and nothing is resampled per update.
+
+All rows, the first window (seed) included, run through one compiled kernel (Numba, see
+fast_indicators). The columns are kept in a buffer that grows at the end, only the rows of
+new candles are computed and written.
+"""
+import numpy as np
+
+from fast_indicators import _jit
+
+# KAMA fastest/slowest smoothing constants (ta defaults pow1=2, pow2=30).
+KAMA_FAST = 2.0 / (2 + 1)
+KAMA_SLOW = 2 / (30 + 1.0)
+
+# Slots of the recursion state array, see _update_kernel
+(ROWS, PREV_HIGH, PREV_LOW, PREV_CLOSE, KAMA, SUM_TR, SUM_POS, SUM_NEG, SUM_DX, ADX, SUM_ATR, ATR,
+ LONG_ROWS, LONG_KAMA, LONG_BUCKET, LONG_PENDING) = range(16)
+STATE_SIZE = 16
+
+
+@_jit
+def _kama_step(state, slot, row, close, closes, window):
+    """One step of ta's KAMA recursion on ``state[slot]``, ``closes`` is a ring of ``window + 1`` closes."""
+    size = window + 1
+    closes[row % size] = close
+    if row < window - 1:
+        return
+    if row == window - 1:
+        state[slot] = close
+        return
+    volatility = 0.0
+    for k in range(row - window + 1, row + 1):
+        volatility += abs(closes[k % size] - closes[(k - 1) % size])
+    ratio = abs(close - closes[(row - window) % size]) / volatility if volatility != 0 else 0.0
+    smoothing_constant = (ratio * (KAMA_FAST - KAMA_SLOW) + KAMA_SLOW) ** 2.0
+    state[slot] = state[slot] + smoothing_constant * (close - state[slot])
+
+
+@_jit
+def _long_term_step(state, close, closes, window):
+    """A higher timeframe candle closed at ``close``: extends the long-term KAMA."""
+    _kama_step(state, LONG_KAMA, int(state[LONG_ROWS]), close, closes, window)
+    state[LONG_ROWS] += 1
+
+
+@_jit
+def _update_kernel(dates, high, low, close, out, state, kama_closes, chop_ranges, chop_highs, chop_lows,
+                   bb_closes, long_closes, kama_window, adx_window, chop_window, bb_window, bb_dev,
+                   atr_window, candle_ms, target_ms):
+    for i in range(close.shape[0]):
+        row = int(state[ROWS])
+        h = high[i]
+        lo = low[i]
+        c = close[i]
+        prev_close = state[PREV_CLOSE]
+
+        # True range. ta's ATR/Choppiness use high - low on the first row,
+        # its ADX leaves the first row undefined.
+        if row == 0:
+            true_range = h - lo
+        else:
+            true_range = max(h - lo, abs(h - prev_close), abs(lo - prev_close))
+
+        # KAMA
+        _kama_step(state, KAMA, row, c, kama_closes, kama_window)
+        out[0, i] = state[KAMA]
+
+        # ADX: plain sums over the first full window, Wilder smoothing afterwards
+        out[1, i] = 0.0
+        if row > 0:
+            diff_up = h - state[PREV_HIGH]
+            diff_down = state[PREV_LOW] - lo
+            pos = diff_up if diff_up > diff_down and diff_up > 0 else 0.0
+            neg = diff_down if diff_down > diff_up and diff_down > 0 else 0.0
+            if row <= adx_window:
+                state[SUM_TR] += true_range
+                state[SUM_POS] += pos
+                state[SUM_NEG] += neg
+            else:
+                state[SUM_TR] = state[SUM_TR] - state[SUM_TR] / float(adx_window) + true_range
+                state[SUM_POS] = state[SUM_POS] - state[SUM_POS] / float(adx_window) + pos
+                state[SUM_NEG] = state[SUM_NEG] - state[SUM_NEG] / float(adx_window) + neg
+            if row >= adx_window:
+                if state[SUM_TR] != 0:
+                    di_pos = 100 * (state[SUM_POS] / state[SUM_TR])
+                    di_neg = 100 * (state[SUM_NEG] / state[SUM_TR])
+                else:
+                    di_pos = 0.0
+                    di_neg = 0.0
+                dx = 100 * abs((di_pos - di_neg) / (di_pos + di_neg)) if di_pos + di_neg != 0 else 0.0
+                if row < 2 * adx_window - 1:
+                    state[SUM_DX] += dx
+                elif row == 2 * adx_window - 1:
+                    state[ADX] = (state[SUM_DX] + dx) / adx_window
+                    out[1, i] = state[ADX]
+                else:
+                    state[ADX] = ((state[ADX] * (adx_window - 1)) + dx) / float(adx_window)
+                    out[1, i] = state[ADX]
+
+        # Choppiness Index ratio over the last chop_window candles (log10 applied by the caller)
+        slot = row % chop_window
+        chop_ranges[slot] = true_range
+        chop_highs[slot] = h
+        chop_lows[slot] = lo
+        out[2, i] = np.nan
+        if row >= chop_window - 1:
+            total = 0.0
+            highest = h
+            lowest = lo
+            for k in range(row - chop_window + 1, row + 1):
+                total += chop_ranges[k % chop_window]
+                highest = max(highest, chop_highs[k % chop_window])
+                lowest = min(lowest, chop_lows[k % chop_window])
+            if highest - lowest != 0:
+                out[2, i] = total / (highest - lowest)
+            elif total != 0:
+                out[2, i] = np.inf
+
+        # Bollinger Band width (population standard deviation, like ta)
+        bb_closes[row % bb_window] = c
+        out[3, i] = np.nan
+        if row >= bb_window - 1:
+            mean = 0.0
+            for k in range(bb_window):
+                mean += bb_closes[k]
+            mean /= bb_window
+            variance = 0.0
+            for k in range(bb_window):
+                variance += (bb_closes[k] - mean) ** 2
+            std = np.sqrt(variance / bb_window)
+            out[3, i] = ((mean + bb_dev * std) - (mean - bb_dev * std)) / c
+
+        # ATR: mean of the first window, Wilder smoothing afterwards (zeros before)
+        if row < atr_window - 1:
+            state[SUM_ATR] += true_range
+        elif row == atr_window - 1:
+            state[SUM_ATR] += true_range
+            state[ATR] = state[SUM_ATR] / atr_window
+        else:
+            state[ATR] = (state[ATR] * (atr_window - 1) + true_range) / float(atr_window)
+        out[4, i] = state[ATR]
+
+        # Long-term KAMA: the higher timeframe candle of the previous row is complete once a
+        # later one starts (gap), this row's once the row reaches its close time
+        bucket = dates[i] - dates[i] % target_ms
+        if state[LONG_PENDING] != 0 and bucket != state[LONG_BUCKET]:
+            _long_term_step(state, prev_close, long_closes, kama_window)
+        if dates[i] + candle_ms >= bucket + target_ms:
+            _long_term_step(state, c, long_closes, kama_window)
+            state[LONG_PENDING] = 0
+        else:
+            state[LONG_PENDING] = 1
+        state[LONG_BUCKET] = bucket
+        out[5, i] = state[LONG_KAMA]
+
+        state[PREV_HIGH] = h
+        state[PREV_LOW] = lo
+        state[PREV_CLOSE] = c
+        state[ROWS] = row + 1
+
+
+class KamaIndicatorState:
+    """
+    Per-pair indicator state for KamaStrategy.
+
+    Use ``update_frame`` with the full analyzed window on every call. It detects which
+    candles are new and only processes those. The state is rebuilt from scratch
+    (a full recompute) when the history is gapped, rewritten or shifted in a way
+    that cannot be reconciled with the cached columns.
+
+    Attributes:
+        kama_window (int): KAMA efficiency ratio window, also for the long-term KAMA.
+        columns (tuple): Names of the indicator columns ``update_frame`` returns.
+    """
+    columns = ('kama', 'adx', 'chop', 'bb_width', 'atr', 'long_term_kama')
+
+    __slots__ = (
+        'kama_window', 'adx_window', 'chop_window', 'bb_window', 'bb_dev', 'atr_window', 'long_term_ms',
+        'state', 'kama_closes', 'chop_ranges', 'chop_highs', 'chop_lows', 'bb_closes', 'long_closes',
+        'dates', 'values', 'end',
+    )
+
+    def __init__(self, kama_window: int, adx_window: int = 14, chop_window: int = 14,
+                 bb_window: int = 20, bb_dev: int = 2, atr_window: int = 14,
+                 long_term_ms: int = 4 * 3_600_000):
+        self.kama_window = kama_window
+        self.adx_window = adx_window
+        self.chop_window = chop_window
+        self.bb_window = bb_window
+        self.bb_dev = bb_dev
+        self.atr_window = atr_window
+        self.long_term_ms = long_term_ms
+        self.reset()
+
+    def reset(self):
+        """Forget all history, the next update starts a new series."""
+        self.state = np.zeros(STATE_SIZE)
+        self.state[[PREV_HIGH, PREV_LOW, PREV_CLOSE, KAMA, LONG_KAMA]] = np.nan
+        self.kama_closes = np.zeros(self.kama_window + 1)
+        self.long_closes = np.zeros(self.kama_window + 1)
+        self.chop_ranges = np.zeros(self.chop_window)
+        self.chop_highs = np.zeros(self.chop_window)
+        self.chop_lows = np.zeros(self.chop_window)
+        self.bb_closes = np.zeros(self.bb_window)
+        # Rows [0, end) of the buffers hold the processed candles (the latest ones at the end)
+        self.dates = np.empty(0, dtype=np.int64)
+        self.values = np.empty((len(self.columns), 0))
+        self.end = 0
+
+    def update_frame(self, dates: np.ndarray, high: np.ndarray, low: np.ndarray,
+                     close: np.ndarray, candle_ms: int) -> dict:
+        """
+        Bring the state up to date with an analyzed candle window.
+
+        Only candles after the last processed one are computed, the rows of the others are
+        already in the buffer. Falls back to a full recompute when the last processed candle
+        is missing or was rewritten, when the window starts before the buffered history, or
+        when the new candles are not contiguous.
+
+        Args:
+            dates (np.ndarray): Candle open times as int64 milliseconds.
+            high, low, close (np.ndarray): Candle prices.
+            candle_ms (int): Timeframe length in milliseconds.
+
+        Returns:
+            dict: ``{column: np.ndarray}`` aligned with ``dates``. The arrays are views of the
+            buffer, valid until the next update.
+        """
+        start = self._first_new_row(dates, high, low, close, candle_ms)
+        if start is None:
+            self.reset()
+            start = 0
+        if start < len(dates):
+            self._update_rows(dates[start:], high[start:], low[start:], close[start:], candle_ms, keep=start)
+        return dict(zip(self.columns, self.values[:, self.end - len(dates):self.end]))
+
+    def _update_rows(self, dates, high, low, close, candle_ms, keep):
+        """Runs the new candles through the kernel, appending their rows to the buffers."""
+        self._reserve(len(dates), keep)
+        rows = slice(self.end, self.end + len(dates))
+        self.dates[rows] = dates
+        out = self.values[:, rows]
+        _update_kernel(
+            np.ascontiguousarray(dates, dtype=np.int64),
+            np.ascontiguousarray(high, dtype=np.float64),
+            np.ascontiguousarray(low, dtype=np.float64),
+            np.ascontiguousarray(close, dtype=np.float64),
+            out, self.state, self.kama_closes, self.chop_ranges, self.chop_highs, self.chop_lows,
+            self.bb_closes, self.long_closes, self.kama_window, self.adx_window, self.chop_window,
+            self.bb_window, float(self.bb_dev), self.atr_window, int(candle_ms), int(self.long_term_ms),
+        )
+        # Same results as the pandas/NumPy formula for degenerate windows (inf/NaN).
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[2] = 100 * np.log10(out[2]) / np.log10(self.chop_window)
+        self.end = rows.stop
+
+    def _first_new_row(self, dates, high, low, close, candle_ms):
+        """Index of the first unprocessed candle of the window, None if it needs a full recompute."""
+        if self.end == 0 or len(dates) == 0:
+            return None
+        last_date = self.dates[self.end - 1]
+        position = int(np.searchsorted(dates, last_date))
+        overlap = position + 1
+        if (
+            position >= len(dates)
+            or dates[position] != last_date
+            or overlap > self.end
+            or dates[0] != self.dates[self.end - overlap]
+            or high[position] != self.state[PREV_HIGH]
+            or low[position] != self.state[PREV_LOW]
+            or close[position] != self.state[PREV_CLOSE]
+            or np.any(np.diff(dates[position:]) != candle_ms)
+        ):
+            return None
+        return overlap
+
+    def _reserve(self, new_rows: int, keep: int):
+        """Room for ``new_rows`` rows after the buffered ones, of which only the last ``keep`` are kept."""
+        if self.end + new_rows <= self.dates.shape[0]:
+            return
+        if keep + new_rows > self.dates.shape[0] // 2:
+            # Twice the window, so the rows are only moved once every window length of candles
+            capacity = max(2 * (keep + new_rows), 64)
+            dates = np.empty(capacity, dtype=np.int64)
+            values = np.empty((len(self.columns), capacity))
+        else:
+            dates = self.dates
+            values = self.values
+        dates[:keep] = self.dates[self.end - keep:self.end]
+        values[:, :keep] = self.values[:, self.end - keep:self.end]
+        self.dates = dates
+        self.values = values
+        self.end = keep
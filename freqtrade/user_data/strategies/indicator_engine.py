@@ -0,0 +1,266 @@
+"""
+Shared, memoized indicator engine for the AstroTrade strategies.
+
+KamaStrategy, SampleStrategy and ScalpingStrategy compute overlapping indicators on the
+same pair/timeframe candles. They all request them through the module-level ``engine``.
+It caches every computed series under (pair, timeframe, candle range, indicator, params)
+with LRU eviction, so running or comparing several strategies in one process (for example
+``backtesting --strategy-list``, hyperopt reruns or a notebook) never computes an identical
+series twice.
+
+The cache is bounded by the bytes of the cached arrays (``max_bytes``, default 1 GiB per
+process), not by an entry count: hyperopt of KamaStrategy caches a KAMA and a long-term KAMA
+per pair and kama_window value (82 series per pair, about 44 MiB for two years of 15m
+candles), which a fixed number of entries cannot size for both many pairs and long
+histories. Results larger than the whole budget are returned without being cached.
+
+Indicators are registered with ``@engine.register(name)``. Each registered function takes
+the OHLCV dataframe plus keyword parameters and returns an array (single output) or a dict
+of arrays. Cached arrays are read-only and shared between callers. Computations are timed
+as step ``indicator.<name>`` and cache hits counted by ``profiling.profiler``.
+"""
+import inspect
+import logging
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import talib.abstract as ta
+from freqtrade.exchange import timeframe_to_msecs
+
+from fast_indicators import kama, resampled_kama, true_range_indicators
+from profiling import profiler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+class IndicatorEngine:
+    """
+    LRU-memoized indicator computations shared by all strategies in the process.
+
+    Attributes:
+        max_bytes (int): Maximum total size of the cached arrays in bytes, least recently
+            used results are evicted above it.
+        nbytes (int): Current total size of the cached arrays.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that computed the indicator.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, log_interval: float = 300.0):
+        self.max_bytes = max_bytes
+        self.log_interval = log_interval
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._indicators = {}
+        self._defaults = {}
+        self._cache = OrderedDict()
+        self._last_log = time.monotonic()
+
+    def register(self, name: str):
+        """Decorator registering ``func(df, **params)`` as indicator ``name``."""
+        def decorator(func):
+            self._indicators[name] = func
+            # Defaults are part of the key, so rsi() and rsi(timeperiod=14) share an entry
+            self._defaults[name] = {
+                parameter.name: parameter.default
+                for parameter in inspect.signature(func).parameters.values()
+                if parameter.default is not inspect.Parameter.empty
+            }
+            return func
+        return decorator
+
+    @staticmethod
+    def cache_key(name: str, df: pd.DataFrame, pair: str, timeframe: str, params: dict) -> tuple:
+        """
+        Cache key of an indicator request.
+
+        Besides the last candle timestamp, the first timestamp and the length are part of the
+        key: frames ending on the same candle but starting elsewhere yield different values
+        for recursive indicators (KAMA, ADX, ATR, ...).
+        """
+        dates = df['date']
+        candles = (dates.iat[0], dates.iat[-1], len(df)) if len(df) else (None, None, 0)
+        return (pair, timeframe, *candles, name, tuple(sorted(params.items())))
+
+    def compute(self, name: str, df: pd.DataFrame, pair: str, timeframe: str, **params):
+        """
+        Returns indicator ``name`` for ``df``, computing it only on a cache miss.
+
+        Args:
+            name (str): Registered indicator name.
+            df (DataFrame): OHLCV dataframe of ``pair``/``timeframe``.
+            pair (str): Pair the dataframe belongs to.
+            timeframe (str): Timeframe of the dataframe.
+            **params: Indicator parameters (part of the cache key).
+
+        Returns:
+            np.ndarray or dict: Read-only array(s) aligned with ``df``.
+        """
+        params = {**self._defaults[name], **params}
+        key = self.cache_key(name, df, pair, timeframe, params)
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            if profiler.enabled:
+                profiler.record_hit(f'indicator.{name}')
+        else:
+            self.misses += 1
+            start = time.perf_counter()
+            result = _freeze(self._indicators[name](df, **params))
+            if profiler.enabled:
+                profiler.record(f'indicator.{name}', pair, time.perf_counter() - start, len(df))
+            size = _nbytes(result)
+            if size <= self.max_bytes:
+                self._cache[key] = result
+                self.nbytes += size
+                while self.nbytes > self.max_bytes:
+                    self.nbytes -= _nbytes(self._cache.popitem(last=False)[1])
+        self._maybe_log()
+        return result
+
+    def stats(self) -> dict:
+        """Cache hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._cache),
+            'nbytes': self.nbytes,
+            'max_bytes': self.max_bytes,
+        }
+
+    def log_stats(self):
+        """Log the cache hit/miss counters."""
+        stats = self.stats()
+        logger.info('Indicator engine: %(hits)d hits, %(misses)d misses (%(hit_rate).1f%% hit rate), '
+                    '%(entries)d cached (%(mib).1f of %(max_mib).0f MiB)',
+                    {**stats, 'hit_rate': stats['hit_rate'] * 100, 'mib': stats['nbytes'] / 2 ** 20,
+                     'max_mib': stats['max_bytes'] / 2 ** 20})
+
+    def clear(self):
+        """Drop all cached results and reset the counters."""
+        self._cache.clear()
+        self.nbytes = 0
+        self.hits = self.misses = 0
+
+    def _maybe_log(self):
+        now = time.monotonic()
+        if now - self._last_log >= self.log_interval:
+            self._last_log = now
+            self.log_stats()
+
+    def __reduce_ex__(self, protocol):
+        # Hyperopt pickles the strategy class by value, with the module globals its methods use.
+        # The shared engine goes by reference: each worker imports its own instead of receiving
+        # this process' cache with every task.
+        if self is engine:
+            return 'engine'
+        return super().__reduce_ex__(protocol)
+
+
+def _nbytes(result) -> int:
+    """Size of a cached result (array or dict of arrays) in bytes."""
+    if isinstance(result, dict):
+        return sum(values.nbytes for values in result.values())
+    return result.nbytes
+
+
+def _freeze(result):
+    """Convert an indicator result to read-only NumPy arrays."""
+    if isinstance(result, pd.DataFrame):
+        result = {column: result[column] for column in result.columns}
+    if isinstance(result, dict):
+        return {name: _freeze(values) for name, values in result.items()}
+    array = np.array(result, dtype=np.float64)
+    array.flags.writeable = False
+    return array
+
+
+engine = IndicatorEngine()
+
+
+# KAMA / true range kernels (ta-compatible values, see fast_indicators)
+
+@engine.register('kama')
+def _kama(df, window=10):
+    return kama(df['close'].to_numpy(), window=window)
+
+
+@engine.register('resampled_kama')
+def _resampled_kama(df, window=10, higher_timeframe='4h', candle_timeframe='15m'):
+    """KAMA of the ``higher_timeframe`` candles resampled from the ``candle_timeframe`` ones."""
+    return resampled_kama(df['date'].values.astype('datetime64[ms]').astype('int64'), df['close'].to_numpy(),
+                          timeframe_to_msecs(candle_timeframe), timeframe_to_msecs(higher_timeframe), window=window)
+
+
+@engine.register('true_range')
+def _true_range(df, window=14, chop_window=14):
+    return true_range_indicators(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(),
+                                 window=window, chop_window=chop_window)
+
+
+@engine.register('bollinger')
+def _bollinger(df, window=20, stds=2, source='close', ddof=0, min_periods=None):
+    """
+    Bollinger Bands over ``close`` or the ``typical`` price.
+
+    ``ddof=0, min_periods=None`` gives ta.volatility.BollingerBands, ``source='typical',
+    ddof=1, min_periods=1`` gives technical.qtpylib.bollinger_bands(typical_price(df)).
+    """
+    if source == 'typical':
+        series = (df['high'] + df['low'] + df['close']) / 3.0
+    else:
+        series = df[source]
+    rolling = series.rolling(window, min_periods=window if min_periods is None else min_periods)
+    mid = rolling.mean()
+    std = rolling.std(ddof=ddof)
+    return {'lower': mid - std * stds, 'mid': mid, 'upper': mid + std * stds}
+
+
+# TA-Lib indicators
+
+@engine.register('rsi')
+def _rsi(df, timeperiod=14):
+    return ta.RSI(df, timeperiod=timeperiod)
+
+
+@engine.register('adx')
+def _adx(df, timeperiod=14):
+    """TA-Lib ADX (its warm-up differs from the ta-compatible 'true_range' ADX)."""
+    return ta.ADX(df, timeperiod=timeperiod)
+
+
+@engine.register('stochf')
+def _stochf(df):
+    return ta.STOCHF(df)
+
+
+@engine.register('macd')
+def _macd(df):
+    return ta.MACD(df)
+
+
+@engine.register('mfi')
+def _mfi(df):
+    return ta.MFI(df)
+
+
+@engine.register('sar')
+def _sar(df):
+    return ta.SAR(df)
+
+
+@engine.register('tema')
+def _tema(df, timeperiod=9):
+    return ta.TEMA(df, timeperiod=timeperiod)
+
+
+@engine.register('ht_sine')
+def _ht_sine(df):
+    return ta.HT_SINE(df)
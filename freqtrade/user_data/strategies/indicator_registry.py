@@ -0,0 +1,119 @@
+"""
+Declarative, demand-driven indicator columns.
+
+A strategy declares how each indicator column is produced (``@registry.provides``) and
+which other columns that needs (``requires``), instead of computing every indicator in
+populate_indicators. ``IndicatorRegistry.populate`` computes only the providers of the
+demanded columns plus their dependencies, in dependency order. Typical demand is the
+columns of the strategy's signal rules (``SignalRules.columns``), the columns its
+callbacks read and, when the dataframe is plotted, the columns of ``plot_config``.
+
+A provider is a function ``provider(strategy, dataframe, pair)`` returning
+``{column: values}`` for all of its columns (one TA-Lib call may produce several, e.g.
+MACD). Demanded columns without a provider (OHLCV) must already be in the dataframe.
+"""
+from pandas import DataFrame
+
+
+class Provider:
+    """A registered provider: its function, produced columns and required columns."""
+    __slots__ = ('func', 'columns', 'requires')
+
+    def __init__(self, func, columns: tuple, requires: tuple):
+        self.func = func
+        self.columns = columns
+        self.requires = requires
+
+
+def plot_config_columns(plot_config: dict) -> set:
+    """Columns referenced by a freqtrade ``plot_config`` (main plot, subplots and fill_to)."""
+    plots = [plot_config.get('main_plot', {}), *plot_config.get('subplots', {}).values()]
+    columns = set()
+    for plot in plots:
+        for column, settings in plot.items():
+            columns.add(column)
+            if isinstance(settings, dict) and 'fill_to' in settings:
+                columns.add(settings['fill_to'])
+    return columns
+
+
+class IndicatorRegistry:
+    """
+    Indicator columns by provider, resolved on demand.
+
+    Attributes:
+        providers (dict): ``{column: Provider}`` for every registered column.
+    """
+
+    def __init__(self):
+        self.providers: dict[str, Provider] = {}
+        self._plans = {}
+
+    def provides(self, *columns: str, requires=()):
+        """
+        Decorator registering ``func(strategy, dataframe, pair)`` as the provider of ``columns``.
+
+        Args:
+            columns (str): Columns returned by the provider.
+            requires (iterable): Columns the provider reads from the dataframe.
+        """
+        def decorator(func):
+            provider = Provider(func, columns, tuple(requires))
+            for column in columns:
+                if column in self.providers:
+                    raise ValueError(f'Indicator column {column} is registered twice')
+                self.providers[column] = provider
+            self._plans.clear()
+            return func
+        return decorator
+
+    def plan(self, columns) -> list:
+        """
+        Providers needed for ``columns``, dependencies first.
+
+        Args:
+            columns (iterable): Demanded columns.
+
+        Returns:
+            list: Providers in computation order, each once.
+        """
+        key = frozenset(columns)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = []
+            visiting = set()
+
+            def visit(column):
+                provider = self.providers.get(column)
+                if provider is None or provider in plan:
+                    return
+                if provider in visiting:
+                    raise ValueError(f'Indicator column {column} depends on itself')
+                visiting.add(provider)
+                for required in provider.requires:
+                    visit(required)
+                visiting.discard(provider)
+                plan.append(provider)
+
+            for column in sorted(key):
+                visit(column)
+            self._plans[key] = plan
+        return plan
+
+    def populate(self, strategy, dataframe: DataFrame, pair: str, columns) -> DataFrame:
+        """
+        Adds the demanded ``columns`` and their dependencies to ``dataframe``.
+
+        Args:
+            strategy: Passed to the providers (timeframe, parameters, ...).
+            dataframe (DataFrame): OHLCV dataframe of ``pair``.
+            pair (str): Pair of the dataframe.
+            columns (iterable): Demanded columns.
+
+        Returns:
+            DataFrame: ``dataframe`` with the computed columns.
+        """
+        for provider in self.plan(columns):
+            for column, values in provider.func(strategy, dataframe, pair).items():
+                dataframe[column] = values
+        return dataframe
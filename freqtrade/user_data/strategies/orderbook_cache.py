@@ -0,0 +1,259 @@
+"""
+Per-pair order book snapshots, refreshed concurrently in the background.
+
+``dp.orderbook(pair, n)`` in populate_indicators is one blocking exchange round trip per
+pair and loop. ``OrderBookCache`` runs its own asyncio event loop in a daemon thread that
+refreshes the books of all registered pairs concurrently (at most ``concurrency`` requests
+in flight) every ``refresh_secs``. Strategies read the last snapshot with ``get`` /
+``features``, which never wait for the exchange.
+
+Every snapshot carries its staleness metadata: when it was fetched (wall clock), the
+exchange timestamp if any and the request's round trip. A snapshot older than ``ttl`` is
+stale (refreshes failing or timing out, exchange stalled) and ``features`` returns NaN for it.
+
+The fetcher is any ``async fetch(pair, limit) -> ccxt order book`` callable; ``CcxtFetcher``
+uses a dedicated ccxt async client built from the bot config (public endpoint, no keys), so
+the bot's own exchange client and event loop are not shared across threads.
+"""
+import asyncio
+import logging
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class BookSnapshot:
+    """
+    One order book of a pair.
+
+    Attributes:
+        bids (np.ndarray): (levels x 2) price/amount, best first.
+        asks (np.ndarray): (levels x 2) price/amount, best first.
+        fetched_at (float): Wall clock (epoch seconds) when the response arrived.
+        timestamp (float): Exchange timestamp of the book (epoch seconds), or None.
+        latency (float): Round trip of the request in seconds.
+    """
+    __slots__ = ('bids', 'asks', 'fetched_at', 'timestamp', 'latency')
+
+    def __init__(self, bids, asks, fetched_at: float, timestamp=None, latency: float = 0.0):
+        self.bids = np.asarray(bids, dtype=np.float64).reshape(-1, 2)
+        self.asks = np.asarray(asks, dtype=np.float64).reshape(-1, 2)
+        self.fetched_at = fetched_at
+        self.timestamp = timestamp
+        self.latency = latency
+
+    @property
+    def best_bid(self) -> float:
+        return self.bids[0, 0] if len(self.bids) else np.nan
+
+    @property
+    def best_ask(self) -> float:
+        return self.asks[0, 0] if len(self.asks) else np.nan
+
+    @property
+    def mid(self) -> float:
+        return (self.best_bid + self.best_ask) / 2
+
+    @property
+    def spread(self) -> float:
+        """Bid/ask spread relative to the mid price."""
+        return (self.best_ask - self.best_bid) / self.mid
+
+    def depth(self, levels: int) -> tuple:
+        """(bid amount, ask amount) of the best ``levels`` levels."""
+        return self.bids[:levels, 1].sum(), self.asks[:levels, 1].sum()
+
+    def imbalance(self, levels: int) -> float:
+        """(bid - ask) / (bid + ask) amount of the best ``levels`` levels, in [-1, 1]."""
+        bid, ask = self.depth(levels)
+        return (bid - ask) / (bid + ask) if bid + ask else np.nan
+
+    def age(self, now: float = None) -> float:
+        """Seconds since the snapshot was fetched."""
+        return (time.time() if now is None else now) - self.fetched_at
+
+
+class CcxtFetcher:
+    """
+    ``fetch(pair, limit)`` through a ccxt async client of the bot's exchange.
+
+    The client is created on the first call, inside the cache's event loop.
+
+    Args:
+        config (dict): Bot configuration (exchange name, ccxt_config, ccxt_async_config).
+    """
+
+    def __init__(self, config: dict):
+        exchange = config['exchange']
+        self.name = exchange['name'].lower()
+        self.ccxt_config = {**exchange.get('ccxt_config', {}), **exchange.get('ccxt_async_config', {})}
+        self._client = None
+
+    async def __call__(self, pair: str, limit: int) -> dict:
+        if self._client is None:
+            import ccxt.async_support as ccxt_async
+            self._client = getattr(ccxt_async, self.name)(self.ccxt_config)
+        return await self._client.fetch_order_book(pair, limit)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+class OrderBookCache:
+    """
+    Order book snapshots of the registered pairs, refreshed by a background event loop.
+
+    Args:
+        fetch: ``async fetch(pair, limit)`` returning a ccxt order book dict.
+        ttl (float): Snapshots older than this (seconds) are stale.
+        refresh_secs (float): Refresh period of every pair (default ``ttl / 2``).
+        depth (int): Levels requested per side.
+        concurrency (int): Maximum requests in flight.
+        timeout (float): Requests taking longer are abandoned (default ``ttl``).
+
+    Attributes:
+        refreshes (int): Successful refreshes.
+        errors (int): Failed or timed out refreshes.
+    """
+
+    def __init__(self, fetch, ttl: float = 10.0, refresh_secs: float = None, depth: int = 20,
+                 concurrency: int = 8, timeout: float = None):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.refresh_secs = refresh_secs if refresh_secs is not None else ttl / 2
+        self.depth = depth
+        self.concurrency = concurrency
+        self.timeout = timeout if timeout is not None else ttl
+        self.refreshes = self.errors = 0
+        self.pairs = ()
+        self._snapshots: dict[str, BookSnapshot] = {}
+        self._in_flight = set()
+        self._failing = set()
+        self._loop = None
+        self._thread = None
+        self._stopped = None
+
+    @classmethod
+    def from_config(cls, config: dict, **kwargs) -> 'OrderBookCache':
+        """Cache fetching through a ccxt async client of the bot's exchange (see CcxtFetcher)."""
+        return cls(CcxtFetcher(config), **kwargs)
+
+    def set_pairs(self, pairs) -> None:
+        """Pairs to keep refreshed (e.g. the current whitelist), starts the refresh loop if needed."""
+        self.pairs = tuple(pairs)
+        for pair in set(self._snapshots) - set(self.pairs):
+            self._snapshots.pop(pair, None)
+        if self._thread is None:
+            self.start()
+
+    def get(self, pair: str):
+        """The pair's last snapshot (possibly stale), or None before the first refresh. Never blocks."""
+        return self._snapshots.get(pair)
+
+    def is_stale(self, snapshot: BookSnapshot, now: float = None) -> bool:
+        return snapshot is None or snapshot.age(now) > self.ttl
+
+    def features(self, pair: str, levels: int = 5) -> dict:
+        """
+        Best bid/ask and depth features of the pair's snapshot.
+
+        Returns:
+            dict: best_bid, best_ask, spread, book_imbalance (of ``levels`` levels) and book_age
+            (seconds). All NaN without a snapshot, all but book_age NaN for a stale one.
+        """
+        snapshot = self.get(pair)
+        now = time.time()
+        features = dict.fromkeys(('best_bid', 'best_ask', 'spread', 'book_imbalance', 'book_age'), np.nan)
+        if snapshot is not None:
+            features['book_age'] = snapshot.age(now)
+            if not self.is_stale(snapshot, now):
+                features.update(best_bid=snapshot.best_bid, best_ask=snapshot.best_ask,
+                                spread=snapshot.spread, book_imbalance=snapshot.imbalance(levels))
+        return features
+
+    def stats(self) -> dict:
+        """Refresh counters, staleness and request latencies of the current snapshots."""
+        now = time.time()
+        snapshots = [self._snapshots.get(pair) for pair in self.pairs]
+        ages = [snapshot.age(now) for snapshot in snapshots if snapshot is not None]
+        latencies = [snapshot.latency for snapshot in snapshots if snapshot is not None]
+        return {
+            'pairs': len(self.pairs),
+            'snapshots': len(ages),
+            'stale': sum(self.is_stale(snapshot, now) for snapshot in snapshots),
+            'refreshes': self.refreshes,
+            'errors': self.errors,
+            'max_age': max(ages, default=np.nan),
+            'mean_latency': float(np.mean(latencies)) if latencies else np.nan,
+        }
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._stopped = asyncio.Event()
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._run(),),
+                                        name='orderbook-cache', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the refresh loop and closes the fetcher. Snapshots stay readable."""
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join()
+        self._loop.close()
+        self._thread = self._loop = None
+
+    async def _run(self) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        try:
+            while not self._stopped.is_set():
+                # A pair whose previous request is still pending is skipped, it does not hold up the others
+                for pair in self.pairs:
+                    if pair not in self._in_flight:
+                        self._in_flight.add(pair)
+                        task = asyncio.create_task(self._refresh(pair, semaphore))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), self.refresh_secs)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            close = getattr(self.fetch, 'close', None)
+            if close is not None:
+                await close()
+
+    async def _refresh(self, pair: str, semaphore: asyncio.Semaphore) -> None:
+        try:
+            async with semaphore:
+                start = time.perf_counter()
+                book = await asyncio.wait_for(self.fetch(pair, self.depth), self.timeout)
+                latency = time.perf_counter() - start
+            timestamp = book.get('timestamp')
+            if pair in self.pairs:
+                self._snapshots[pair] = BookSnapshot(
+                    [level[:2] for level in book['bids']], [level[:2] for level in book['asks']],
+                    time.time(), timestamp / 1000 if timestamp else None, latency)
+            self.refreshes += 1
+            self._failing.discard(pair)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            self.errors += 1
+            # Logged once per pair until it recovers
+            log = logger.debug if pair in self._failing else logger.warning
+            self._failing.add(pair)
+            log(f'Order book refresh of {pair} failed: {error!r}')
+        finally:
+            self._in_flight.discard(pair)
@@ -0,0 +1,244 @@
+"""
+Analyzed dataframes published once into a memory-mapped file, attached zero-copy by workers.
+
+freqtrade's hyperopt analyzes every pair once, dumps the analyzed dataframes into one pickle
+file, and every worker loads the whole file again at the start of every epoch: each worker
+holds a private copy of every column and pays the deserialization per epoch.
+
+``SharedFrameStore.publish`` appends the columns of an analyzed dataframe to one store file
+(in /dev/shm when available, i.e. shared memory) and returns it as a ``SharedFrame``, whose
+columns are read-only views of the mapped file. A SharedFrame (and its ``.copy()``, which
+freqtrade takes after populate_indicators) pickles as a reference to its columns in the file,
+so the pickle only holds the column layout. Unpickling maps the file (once per process) and
+rebuilds the frame from views: the workers share the page cache instead of copying.
+
+Numeric, bool and naive datetime columns are mapped; timezone-aware datetime columns (the
+candle date) are stored as int64 and rebuilt with the public DatetimeIndex constructor on
+attach, which copies them. Other columns (strings, objects) are pickled inline. Frames
+derived from a SharedFrame (slices, new columns) pickle normally, as do SharedFrames whose
+columns or length no longer match the published layout.
+
+The file is mapped read-only and the inline columns are read-only too. With pandas
+copy-on-write (always on since pandas 3) a write to an attached frame copies the column
+first; without it, the write raises ValueError ("assignment destination is read-only")
+instead of modifying the published frame. Either way the published data never changes.
+
+The store file is removed when the publishing process exits; files left behind by killed
+processes are removed by the next store.
+"""
+import atexit
+import logging
+import os
+import tempfile
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+logger = logging.getLogger(__name__)
+
+SHARED_MEMORY_DIR = Path('/dev/shm')
+FILE_PREFIX = 'astrotrade-frames-'
+# Column offsets are aligned to cache lines
+ALIGNMENT = 64
+
+# Mapped store files of this process: {path: np.memmap}
+_MAPPED = {}
+# Attached frames of this process: {(path, frame number): SharedFrame}
+_ATTACHED = {}
+
+
+def _mapped(path: str, size: int) -> np.ndarray:
+    """The store file mapped read-only, remapped if it grew past ``size`` since it was mapped."""
+    mapped = _MAPPED.get(path)
+    if mapped is None or len(mapped) < size:
+        mapped = _MAPPED[path] = np.memmap(path, dtype=np.uint8, mode='r')
+    return mapped
+
+
+def _column_values(mapped: np.ndarray, layout: tuple, rows: int):
+    offset, dtype, unit, tz = layout
+    values = mapped[offset:offset + rows * np.dtype(dtype).itemsize].view(dtype)
+    if unit is None:
+        return values
+    values = values.view(f'M8[{unit}]')
+    if tz is None:
+        return values
+    # The stored values are UTC, the constructor copies them (a single column per frame)
+    return pd.DatetimeIndex(values, tz='UTC').tz_convert(tz).array
+
+
+def attach_frame(spec: dict) -> 'SharedFrame':
+    """
+    Rebuilds a published frame from its layout, mapping the store file read-only.
+
+    Every call returns a shallow copy of one frame per layout and process. Its mapped and
+    inline columns are read-only: a write copies the column first (pandas copy-on-write)
+    or raises ValueError, it never reaches the mapping or the other attached copies.
+
+    Args:
+        spec (dict): Layout returned by SharedFrameStore.publish (``SharedFrame.shared``).
+
+    Returns:
+        SharedFrame: Frame whose mapped columns are views of the store file.
+    """
+    key = (spec['path'], spec['frame'])
+    frame = _ATTACHED.get(key)
+    if frame is None:
+        rows = spec['rows']
+        mapped = _mapped(spec['path'], spec['end'])
+        columns = {}
+        for column in spec['columns']:
+            layout = spec['mapped'].get(column)
+            if layout is None:
+                columns[column] = values = spec['inline'][column]
+                values.flags.writeable = False
+            else:
+                columns[column] = _column_values(mapped, layout, rows)
+        index = pd.RangeIndex(*spec['index']) if isinstance(spec['index'], tuple) else spec['index']
+        frame = _ATTACHED[key] = SharedFrame(columns, index=index, copy=False)
+        object.__setattr__(frame, 'shared', spec)
+    return frame.copy(deep=False)
+
+
+class SharedFrame(DataFrame):
+    """
+    DataFrame published in a SharedFrameStore, pickled as a reference to the store file.
+
+    Attributes:
+        shared (dict): Published layout, None for frames derived from a SharedFrame.
+    """
+    shared = None
+
+    @property
+    def _constructor(self):
+        return SharedFrame
+
+    def __finalize__(self, other, method=None, **kwargs):
+        self = super().__finalize__(other, method=method, **kwargs)
+        # Only an identical copy keeps the reference, derived frames have other content
+        if method == 'copy' and isinstance(other, SharedFrame) and other.shared is not None:
+            object.__setattr__(self, 'shared', other.shared)
+        return self
+
+    def __reduce_ex__(self, protocol):
+        spec = self.shared
+        if spec is not None and len(self) == spec['rows'] and list(self.columns) == spec['columns']:
+            return attach_frame, (spec,)
+        return super().__reduce_ex__(protocol)
+
+
+class SharedFrameStore:
+    """
+    Append-only store file of published dataframes, one file per publishing process.
+
+    Args:
+        directory (Path): Directory of the store file, /dev/shm by default (the system's
+            temporary directory where /dev/shm does not exist).
+
+    Attributes:
+        path (Path): The store file of this process, None before the first publish.
+        frames (int): Published frames.
+        nbytes (int): Size of the store file.
+    """
+
+    def __init__(self, directory: Path = None):
+        if directory is None:
+            directory = SHARED_MEMORY_DIR if SHARED_MEMORY_DIR.is_dir() else Path(tempfile.gettempdir())
+        self.directory = Path(directory)
+        self.path = None
+        self.frames = 0
+        self.nbytes = 0
+        self._pid = None
+        self._file = None
+        atexit.register(self.close)
+
+    def _create(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.remove_orphans(self.directory)
+        self._pid = os.getpid()
+        self.path = self.directory / f'{FILE_PREFIX}{self._pid}-{uuid.uuid4().hex[:8]}'
+        self.frames = self.nbytes = 0
+        self._file = self.path.open('wb')
+
+    def publish(self, df: DataFrame, name: str = None) -> SharedFrame:
+        """
+        Appends the columns of ``df`` to the store file.
+
+        Args:
+            df (DataFrame): Analyzed dataframe, not modified.
+            name (str): Name for the log (e.g. the pair).
+
+        Returns:
+            SharedFrame: ``df`` with its numeric, bool and datetime columns mapped from the file.
+        """
+        if self._pid != os.getpid():
+            # First publish of this process (a forked process does not append to its parent's file)
+            self._create()
+        spec = {
+            'path': str(self.path),
+            'frame': self.frames,
+            'rows': len(df),
+            'columns': list(df.columns),
+            'index': ((df.index.start, df.index.stop, df.index.step) if isinstance(df.index, pd.RangeIndex)
+                      else df.index),
+            'mapped': {},
+            'inline': {},
+        }
+        for column in df.columns:
+            series = df[column]
+            unit = tz = None
+            if isinstance(series.dtype, pd.DatetimeTZDtype) or series.dtype.kind == 'M':
+                unit, tz = series.dt.unit, series.dt.tz
+                # UTC values of tz-aware columns, the naive ones as they are
+                values = series.to_numpy(dtype=f'datetime64[{unit}]').view('int64')
+            else:
+                values = series.to_numpy()
+                if values.dtype.kind not in 'biuf':
+                    spec['inline'][column] = series.to_numpy(copy=True)
+                    continue
+            self.nbytes += self._file.write(b'\0' * (-self.nbytes % ALIGNMENT))
+            spec['mapped'][column] = (self.nbytes, values.dtype.str, unit, None if tz is None else str(tz))
+            self.nbytes += self._file.write(np.ascontiguousarray(values).tobytes())
+        self._file.flush()
+        spec['end'] = self.nbytes
+        self.frames += 1
+        logger.debug(f'Published {name or "frame"}: {len(df)} rows, {len(spec["mapped"])} mapped columns, '
+                     f'store {self.nbytes / 2 ** 20:.1f} MiB')
+        return attach_frame(spec)
+
+    def close(self) -> None:
+        """Removes the store file (publishing process only, the workers just unmap it)."""
+        if self._pid != os.getpid():
+            return
+        self._file.close()
+        _MAPPED.pop(str(self.path), None)
+        for key in [key for key in _ATTACHED if key[0] == str(self.path)]:
+            del _ATTACHED[key]
+        self.path.unlink(missing_ok=True)
+        self._pid = self._file = None
+
+    def __reduce_ex__(self, protocol):
+        # Hyperopt pickles the strategy class by value, with the module globals its methods use.
+        # The process store goes by reference (its open file does not pickle): every worker
+        # imports its own.
+        if self is frame_store:
+            return 'frame_store'
+        return super().__reduce_ex__(protocol)
+
+    @staticmethod
+    def remove_orphans(directory: Path) -> None:
+        """Removes store files of processes that no longer exist."""
+        for path in Path(directory).glob(f'{FILE_PREFIX}*'):
+            try:
+                os.kill(int(path.name[len(FILE_PREFIX):].split('-')[0]), 0)
+            except ProcessLookupError:
+                path.unlink(missing_ok=True)
+            except (ValueError, PermissionError):
+                continue
+
+
+# Store of the analyzed dataframes published by this process's strategies
+frame_store = SharedFrameStore()
@@ -0,0 +1,214 @@
+"""
+Declarative signal rules with shared subexpressions.
+
+A strategy declares its comparisons once (``conditions``) and each signal column as the
+conjunction of some of them (``signals``). ``SignalRules.evaluate`` resolves parameters,
+evaluates every distinct comparison exactly once as a NumPy boolean array, combines the
+signals in one pass (identical conjunctions are combined only once), and memoizes the
+result for the dataframe, so populate_entry_trend and populate_exit_trend share one
+evaluation.
+
+Operands are column names (optionally renamed per call through ``aliases``, or read from
+arrays passed as ``columns`` instead of the dataframe), numbers,
+``Param`` (a hyperoptable parameter's current value) or ``Shift`` (a column shifted down
+by some candles). Operators are ``>``, ``>=``, ``<``, ``<=`` and ``crossed_above`` /
+``crossed_below`` (technical.qtpylib semantics).
+"""
+import operator
+import weakref
+
+import numpy as np
+
+COMPARISONS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+
+
+class Param:
+    """Operand resolving to ``getattr(strategy, name).value`` (cast with ``cast``)."""
+    __slots__ = ('name', 'cast')
+
+    def __init__(self, name: str, cast=None):
+        self.name = name
+        self.cast = cast
+
+    def resolve(self, strategy):
+        value = getattr(strategy, self.name).value
+        return self.cast(value) if self.cast else value
+
+
+class Shift:
+    """Operand resolving to ``column.shift(periods)``."""
+    __slots__ = ('column', 'periods')
+
+    def __init__(self, column: str, periods: int = 1):
+        self.column = column
+        self.periods = periods
+
+
+def parameter_values(parameter) -> list:
+    """
+    All values of an Int/DecimalParameter's search space.
+
+    Same values as ``parameter.range`` in hyperopt's indicator step, which falls back to
+    ``[value]`` while epochs are evaluated.
+    """
+    if hasattr(parameter, 'decimals'):
+        scale = pow(10, parameter.decimals)
+        return [round(n * pow(0.1, parameter.decimals), parameter.decimals)
+                for n in range(int(parameter.low * scale), int(parameter.high * scale) + 1)]
+    return list(range(int(parameter.low), int(parameter.high) + 1))
+
+
+def _operand(value, strategy, aliases):
+    if isinstance(value, Param):
+        return ('value', value.resolve(strategy))
+    if isinstance(value, Shift):
+        return ('shift', aliases.get(value.column, value.column), value.periods)
+    if isinstance(value, str):
+        return ('column', aliases.get(value, value))
+    return ('value', value)
+
+
+def _column_arrays(columns) -> dict:
+    if callable(columns):
+        columns = columns()
+    return {('column', name): np.asarray(values, dtype=np.float64) for name, values in (columns or {}).items()}
+
+
+def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+    shifted = np.empty(len(values), dtype=np.float64)
+    shifted[:periods] = np.nan
+    shifted[periods:] = values[:len(values) - periods]
+    return shifted
+
+
+class SignalRules:
+    """
+    Signal columns defined as conjunctions of named comparisons.
+
+    Args:
+        conditions (dict): ``{name: (left, op, right)}``.
+        signals (dict): ``{column: [condition names]}``, every condition must hold.
+    """
+
+    def __init__(self, conditions: dict, signals: dict):
+        unknown = {name for names in signals.values() for name in names} - conditions.keys()
+        if unknown:
+            raise ValueError(f'Unknown signal conditions: {sorted(unknown)}')
+        self.conditions = conditions
+        self.signals = signals
+        self._memo = None
+
+    @property
+    def columns(self) -> set:
+        """Dataframe columns the conditions read (``Shift`` operands included, before aliases)."""
+        columns = set()
+        for left, _, right in self.conditions.values():
+            for value in (left, right):
+                if isinstance(value, Shift):
+                    columns.add(value.column)
+                elif isinstance(value, str):
+                    columns.add(value)
+        return columns
+
+    def evaluate(self, df, strategy, aliases: dict = None, columns: dict = None) -> dict:
+        """
+        Evaluates all signals for ``df``.
+
+        Args:
+            df (DataFrame): Analyzed dataframe.
+            strategy: Object the ``Param`` operands are read from.
+            aliases (dict): Optional column renames, e.g. ``{'kama': 'kama_30'}``.
+            columns (dict or callable): Optional ``{name: values}`` aligned with ``df``, read
+                instead of ``df[name]`` (e.g. indicators kept out of the dataframe). A callable
+                returning the dict is only called when the result is not memoized.
+
+        Returns:
+            dict: ``{column: np.ndarray[bool]}`` for every declared signal.
+        """
+        aliases = aliases or {}
+        resolved = {name: self._resolve(condition, strategy, aliases)
+                    for name, condition in self.conditions.items()}
+        key = tuple(sorted(resolved.items()))
+        memo = self._memo
+        if memo is not None and memo[0]() is df and memo[1] == key and memo[2] == len(df):
+            return memo[3]
+
+        arrays = _column_arrays(columns)
+        comparisons = {expression: self._compare(df, expression, arrays) for expression in set(resolved.values())}
+
+        combined = {}
+        masks = {}
+        for column, names in self.signals.items():
+            expressions = frozenset(resolved[name] for name in names)
+            if expressions not in combined:
+                mask = np.ones(len(df), dtype=bool)
+                for expression in expressions:
+                    np.logical_and(mask, comparisons[expression], out=mask)
+                combined[expressions] = mask
+            masks[column] = combined[expressions]
+
+        self._memo = (weakref.ref(df), key, len(df), masks)
+        return masks
+
+    @staticmethod
+    def _resolve(condition, strategy, aliases):
+        left, op, right = condition
+        return _operand(left, strategy, aliases), op, _operand(right, strategy, aliases)
+
+    @staticmethod
+    def _compare(df, expression, arrays):
+        def values(operand):
+            if operand[0] == 'value':
+                return operand[1]
+            if operand not in arrays:
+                column = ('column', operand[1])
+                if column not in arrays:
+                    arrays[column] = df[operand[1]].to_numpy(dtype=np.float64)
+                if operand[0] == 'shift':
+                    arrays[operand] = _shift(arrays[column], operand[2])
+            return arrays[operand]
+
+        left, op, right = expression
+        if op in COMPARISONS:
+            return COMPARISONS[op](values(left), values(right))
+
+        # crossed_above / crossed_below: compare the current and the previous candle
+        shifted = [operand if operand[0] == 'value' else ('shift', operand[1], 1) for operand in (left, right)]
+        if right[0] == 'value':
+            # qtpylib turns scalars into a Series, whose shift leaves the first row undefined
+            previous_right = _shift(np.full(len(df), right[1], dtype=np.float64), 1)
+        else:
+            previous_right = values(shifted[1])
+        previous_left = values(shifted[0])
+        if op == 'crossed_above':
+            return (values(left) > values(right)) & (previous_left <= previous_right)
+        if op == 'crossed_below':
+            return (values(left) < values(right)) & (previous_left >= previous_right)
+        raise ValueError(f'Unknown signal operator: {op}')
+
+
+def apply_signals(df, masks: dict, columns, dtype=None):
+    """
+    Sets ``columns`` to 1 where their mask is True, like ``df.loc[mask, column] = 1``.
+
+    Existing values are kept elsewhere, new columns are NaN elsewhere. With ``dtype``
+    (compact frames, e.g. ``np.int8``) the columns hold 0/1 of that type, 0 instead of NaN.
+    """
+    for column in columns:
+        mask = masks[column]
+        if dtype is not None:
+            values = mask.astype(dtype)
+            if column in df.columns:
+                values |= (df[column].to_numpy() == 1).astype(dtype)
+        elif column in df.columns:
+            values = df[column].to_numpy(dtype=np.float64, copy=True)
+            values[mask] = 1
+        else:
+            values = np.where(mask, 1.0, np.nan)
+        df[column] = values
+    return df
@@ -0,0 +1,297 @@
+"""
+Candle-close-to-signal latency of the live/dry-run loop.
+
+A limit entry placed late into the candle has less of ``unfilledtimeout`` left to fill, so
+the strategy records per pair, for every newly closed candle it analyzes:
+
+    close      : candle close (candle date + timeframe, exchange time)
+    arrival    : start of the loop iteration that analyzed it (freqtrade refreshes the
+                 candles right before ``bot_loop_start``)
+    analysis   : populate_indicators called for the pair
+    indicators : populate_indicators returned
+    signal     : populate_exit_trend returned, i.e. enter_long/enter_short are in the
+                 analyzed dataframe the bot reads
+
+The records are kept in a fixed-size ring buffer (``capacity`` candles, all pairs) for the
+p50/p90/p99 of every stage, and every latency is also counted into a fixed-bucket histogram
+since start. ``bot_loop_start`` times the loop iterations and flags those that took longer
+than ``process_throttle_secs``.
+
+The numbers are logged as a summary every ``log_interval`` seconds and written as JSON every
+``export_interval`` seconds, by default ``user_data/metrics/signal_latency.json`` (readable
+by the API server or any other process, the file is replaced atomically).
+"""
+import functools
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from freqtrade.exchange import timeframe_to_seconds
+
+logger = logging.getLogger(__name__)
+
+# Timestamps of one analyzed candle (epoch seconds)
+TIMESTAMPS = ('close', 'arrival', 'analysis', 'indicators', 'signal')
+# Latency name: (from, to)
+STAGES = {
+    'fetch': ('close', 'arrival'),
+    'queue': ('arrival', 'analysis'),
+    'indicators': ('analysis', 'indicators'),
+    'signals': ('indicators', 'signal'),
+    'total': ('close', 'signal'),
+}
+# Upper bounds of the histogram buckets in seconds, the last bucket is everything above
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 15.0, 30.0, 60.0, 120.0, 300.0)
+
+RECORD_DTYPE = np.dtype([('pair', 'int32'), ('entry', 'int8'), ('loop', 'int64')]
+                        + [(name, 'float64') for name in TIMESTAMPS])
+
+
+def isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec='milliseconds')
+
+
+class SignalLatency:
+    """
+    Ring buffer and histograms of the per-candle latencies, plus the loop iteration times.
+
+    Args:
+        capacity (int): Analyzed candles kept for the quantiles (all pairs).
+        log_interval (float): Seconds between two log summaries (0 disables them).
+        export_interval (float): Seconds between two JSON file writes.
+        overrun_tolerance (float): Iterations longer than ``process_throttle_secs`` times
+            (1 + overrun_tolerance) are flagged, the worker itself adds some overhead.
+
+    Attributes:
+        throttle_secs (float): process_throttle_secs of the config.
+        iterations (int): Loop iterations seen by loop_start.
+        overruns (int): Loop iterations that took longer than throttle_secs.
+        records (int): Analyzed candles recorded since start.
+    """
+
+    def __init__(self, capacity: int = 4096, log_interval: float = 300.0, export_interval: float = 60.0,
+                 overrun_tolerance: float = 0.1):
+        self.capacity = capacity
+        self.log_interval = log_interval
+        self.export_interval = export_interval
+        self.overrun_tolerance = overrun_tolerance
+        self.export_path = None
+        self.throttle_secs = 5.0
+        self.clear()
+
+    def clear(self) -> None:
+        self.iterations = 0
+        self.overruns = 0
+        self.records = 0
+        self._ring = np.zeros(self.capacity, dtype=RECORD_DTYPE)
+        self._histograms = {stage: np.zeros(len(BUCKETS) + 1, dtype='int64') for stage in STAGES}
+        self._pair_ids: dict[str, int] = {}
+        self._pending: dict[str, dict] = {}
+        # Candle close of the last recorded candle per pair, a candle is only recorded once
+        self._last_close: dict[str, float] = {}
+        self._first_loop_start = None
+        self._loop_start = None
+        self._loop_pairs = 0
+        self.last_loop = None
+        self.recent_overruns = deque(maxlen=20)
+        self._last_log = self._last_export = time.monotonic()
+
+    def configure(self, config: dict, filename: str = 'signal_latency.json') -> None:
+        """Reads process_throttle_secs and exports to ``<user_data_dir>/metrics/<filename>``."""
+        self.throttle_secs = float(config.get('internals', {}).get('process_throttle_secs', 5))
+        user_data_dir = config.get('user_data_dir')
+        if user_data_dir and self.export_path is None:
+            self.export_path = Path(user_data_dir) / 'metrics' / filename
+
+    def loop_start(self) -> None:
+        """Called from bot_loop_start: closes the previous iteration and starts the next one."""
+        now = time.time()
+        if self._loop_start is not None:
+            seconds = now - self._loop_start
+            overrun = seconds > self.throttle_secs * (1 + self.overrun_tolerance)
+            self.last_loop = {'start': isoformat(self._loop_start), 'seconds': round(seconds, 3),
+                              'pairs': self._loop_pairs, 'overrun': overrun}
+            if overrun:
+                self.overruns += 1
+                self.recent_overruns.append(self.last_loop)
+                logger.warning('Loop iteration took %.2fs (%d pairs analyzed), process_throttle_secs is %gs',
+                               seconds, self._loop_pairs, self.throttle_secs)
+        self.iterations += 1
+        if self._first_loop_start is None:
+            self._first_loop_start = now
+        self._loop_start = now
+        self._loop_pairs = 0
+        self._maybe_flush()
+
+    def analysis_start(self, pair: str, close: float) -> None:
+        """
+        populate_indicators was called for ``pair`` with a last candle closing at ``close``.
+        Candles already recorded (process_only_new_candles = False) and candles that closed
+        before the bot's first loop iteration (startup time, not loop latency) are ignored.
+        """
+        if self._loop_start is None or close < self._first_loop_start or self._last_close.get(pair) == close:
+            self._pending.pop(pair, None)
+            return
+        self._pending[pair] = {'close': close, 'arrival': self._loop_start, 'analysis': time.time()}
+
+    def mark(self, pair: str, name: str) -> None:
+        """Sets timestamp ``name`` of the pair's candle being analyzed."""
+        pending = self._pending.get(pair)
+        if pending is not None:
+            pending[name] = time.time()
+
+    def signal(self, pair: str, entry: int) -> None:
+        """
+        The analyzed dataframe of ``pair`` is complete: records the candle.
+
+        Args:
+            pair (str): The analyzed pair.
+            entry (int): 1 / -1 if the last candle has an enter_long / enter_short signal, else 0.
+        """
+        pending = self._pending.pop(pair, None)
+        if pending is None or 'indicators' not in pending:
+            return
+        pending['signal'] = time.time()
+        pair_id = self._pair_ids.setdefault(pair, len(self._pair_ids))
+        record = self._ring[self.records % self.capacity]
+        record['pair'] = pair_id
+        record['entry'] = entry
+        record['loop'] = self.iterations
+        for name in TIMESTAMPS:
+            record[name] = pending[name]
+        for stage, (start, end) in STAGES.items():
+            self._histograms[stage][np.searchsorted(BUCKETS, pending[end] - pending[start])] += 1
+        self.records += 1
+        self._last_close[pair] = pending['close']
+        self._loop_pairs += 1
+
+    def recent(self) -> np.ndarray:
+        """The records in the ring buffer, oldest first."""
+        if self.records <= self.capacity:
+            return self._ring[:self.records]
+        return np.roll(self._ring, -(self.records % self.capacity))
+
+    def latencies(self, records: np.ndarray = None) -> dict:
+        """``{stage: latencies in seconds}`` of ``records`` (default: the ring buffer)."""
+        records = self.recent() if records is None else records
+        return {stage: records[end] - records[start] for stage, (start, end) in STAGES.items()}
+
+    def summary(self) -> dict:
+        """The loop counters, per stage quantiles and histogram, and the last candle per pair."""
+        records = self.recent()
+        stages = {}
+        for stage, values in self.latencies(records).items():
+            quantiles = np.percentile(values, [50, 90, 99]).tolist() if len(values) else [None] * 3
+            stages[stage] = {
+                'count': int(self._histograms[stage].sum()),
+                'p50': quantiles[0],
+                'p90': quantiles[1],
+                'p99': quantiles[2],
+                'max': float(values.max()) if len(values) else None,
+                'histogram': {'le': [*BUCKETS, 'inf'], 'counts': self._histograms[stage].tolist()},
+            }
+        # Candles with an entry signal: the latency that decides the fill of the limit entry
+        entries = records[records['entry'] != 0]
+        entry_latency = entries['signal'] - entries['close']
+        names = list(self._pair_ids)
+        pairs = {}
+        for record in records[::-1]:
+            pair = names[record['pair']]
+            if pair not in pairs:
+                pairs[pair] = {'close': isoformat(record['close']), 'entry': int(record['entry']),
+                               **{stage: round(float(record[end] - record[start]), 4)
+                                  for stage, (start, end) in STAGES.items()}}
+        return {
+            'process_throttle_secs': self.throttle_secs,
+            'iterations': self.iterations,
+            'overruns': self.overruns,
+            'last_loop': self.last_loop,
+            'recent_overruns': list(self.recent_overruns),
+            'candles': self.records,
+            'stages': stages,
+            'entries': {'count': len(entries),
+                        'total_p50': float(np.median(entry_latency)) if len(entries) else None,
+                        'total_max': float(entry_latency.max()) if len(entries) else None},
+            'pairs': dict(sorted(pairs.items())),
+        }
+
+    def log_summary(self) -> None:
+        """Logs every stage's quantiles and the loop overruns."""
+        if not self.records:
+            return
+        summary = self.summary()
+        lines = [f'{"stage":<12}{"count":>8}{"p50 s":>9}{"p90 s":>9}{"p99 s":>9}{"max s":>9}']
+        for stage, values in summary['stages'].items():
+            lines.append(f'{stage:<12}{values["count"]:>8}{values["p50"]:>9.3f}{values["p90"]:>9.3f}'
+                         f'{values["p99"]:>9.3f}{values["max"]:>9.3f}')
+        lines.append(f'{self.iterations} loop iterations, {self.overruns} longer than '
+                     f'process_throttle_secs ({self.throttle_secs:g}s)')
+        logger.info('Candle close to signal latency:\n%s', '\n'.join(lines))
+
+    def export(self) -> None:
+        """Writes the summary as JSON atomically (readers never see a partial file)."""
+        if self.export_path is None:
+            return
+        summary = self.summary()
+        summary['updated'] = isoformat(time.time())
+        self.export_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.export_path.with_suffix(f'.{os.getpid()}.tmp')
+        temporary.write_text(json.dumps(summary, indent=1))
+        os.replace(temporary, self.export_path)
+
+    def _maybe_flush(self):
+        now = time.monotonic()
+        if self.log_interval and now - self._last_log >= self.log_interval:
+            self._last_log = now
+            self.log_summary()
+        if self.export_path is not None and now - self._last_export >= self.export_interval:
+            self._last_export = now
+            try:
+                self.export()
+            except OSError as error:
+                logger.warning('Could not write %s: %s', self.export_path, error)
+
+
+signal_latency = SignalLatency()
+
+
+def entry_direction(dataframe) -> int:
+    """1 / -1 if the last candle has an enter_long / enter_short signal, else 0."""
+    if not len(dataframe):
+        return 0
+    if 'enter_long' in dataframe and dataframe['enter_long'].iat[-1] == 1:
+        return 1
+    if 'enter_short' in dataframe and dataframe['enter_short'].iat[-1] == 1:
+        return -1
+    return 0
+
+
+def latency_stage(stage: str):
+    """
+    Decorator recording the latency timestamps around a strategy method
+    ``method(self, dataframe, metadata)``: 'indicators' for populate_indicators, 'signal' for
+    the last populate method freqtrade calls (populate_exit_trend). Records only when the
+    strategy's ``track_signal_latency`` is set and it runs live/dry-run (``is_live()``).
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, dataframe, metadata):
+            if not (self.track_signal_latency and self.is_live()):
+                return method(self, dataframe, metadata)
+            pair = metadata['pair']
+            if stage == 'indicators' and len(dataframe):
+                close = dataframe['date'].iat[-1].timestamp() + timeframe_to_seconds(self.timeframe)
+                signal_latency.analysis_start(pair, close)
+            result = method(self, dataframe, metadata)
+            if stage == 'indicators':
+                signal_latency.mark(pair, 'indicators')
+            else:
+                signal_latency.signal(pair, entry_direction(result))
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,69 @@
+"""
+O(1) last-candle snapshot store for per-trade callbacks.
+
+``custom_exit`` runs for every open trade on every throttle tick. Reading the last ATR from
+the analyzed dataframe (``dp.get_analyzed_dataframe`` + ``df.iloc[-1]``) builds a pandas
+Series for a single float each time. populate_indicators records the values the callbacks
+need once per candle in a ``__slots__`` record per pair, so a callback becomes one dict lookup.
+"""
+
+
+class AtrSnapshot:
+    """
+    Last analyzed candle of one pair as seen by the ATR exits.
+
+    Attributes:
+        date: Open time of the last analyzed candle (None for detached snapshots).
+        atr (float): ATR of that candle.
+        stop_distance (float): Distance of the ATR stoploss below the entry rate.
+        target_distance (float): Distance of the ATR take profit above the entry rate.
+    """
+    __slots__ = ('date', 'atr', 'stop_distance', 'target_distance')
+
+    def __init__(self, date, atr: float, stop_distance: float, target_distance: float):
+        self.date = date
+        self.atr = atr
+        self.stop_distance = stop_distance
+        self.target_distance = target_distance
+
+
+class AtrSnapshotStore:
+    """
+    Per-pair ``AtrSnapshot`` records, updated in place on every analyzed candle.
+
+    Args:
+        stop_multiplier (float): ATR multiple of the stoploss band.
+        target_multiplier (float): ATR multiple of the take profit band.
+    """
+
+    def __init__(self, stop_multiplier: float, target_multiplier: float):
+        self.stop_multiplier = stop_multiplier
+        self.target_multiplier = target_multiplier
+        self._snapshots: dict[str, AtrSnapshot] = {}
+
+    def snapshot(self, date, atr: float) -> AtrSnapshot:
+        """Builds a detached snapshot (used when the store has nothing for a pair)."""
+        return AtrSnapshot(date, atr, self.stop_multiplier * atr, self.target_multiplier * atr)
+
+    def update(self, pair: str, date, atr: float) -> None:
+        """Records the last analyzed candle of ``pair``."""
+        snapshot = self._snapshots.get(pair)
+        if snapshot is None:
+            self._snapshots[pair] = self.snapshot(date, atr)
+        else:
+            snapshot.date = date
+            snapshot.atr = atr
+            snapshot.stop_distance = self.stop_multiplier * atr
+            snapshot.target_distance = self.target_multiplier * atr
+
+    def update_from_frame(self, pair: str, df) -> None:
+        """Records the last row of an analyzed dataframe with an 'atr' column."""
+        if len(df) and 'atr' in df.columns:
+            self.update(pair, df['date'].iat[-1], float(df['atr'].iat[-1]))
+
+    def get(self, pair: str):
+        """Returns the pair's ``AtrSnapshot``, or None if it was never analyzed."""
+        return self._snapshots.get(pair)
+
+    def clear(self) -> None:
+        self._snapshots.clear()